@@ -10,46 +10,66 @@ from dotenv import load_dotenv
 load_dotenv()
 import logging
 from datetime import datetime
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, render_template, stream_with_context
 from flask_socketio import SocketIO, emit
 from flask_cors import CORS
 
-# Import all Mama Bear systems
-from services.mama_bear_complete_system import initialize_complete_system, get_mama_bear_system
-from services.mama_bear_model_manager import MamaBearModelManager
-from services.mama_bear_orchestration import initialize_orchestration
-from services.mama_bear_memory_system import initialize_enhanced_memory
-from services.mama_bear_workflow_logic import initialize_workflow_intelligence
-from services.mama_bear_monitoring import MamaBearMonitoring
-
-# Import enhanced features
-from services.enhanced_scrapybara_manager import enhanced_scrapybara
-from services.enhanced_mama_bear_orchestrator import mama_bear_orchestrator, TaskType
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('podplay_sanctuary.log'),
-        logging.StreamHandler()
-    ]
-)
+# Mama Bear systems are imported lazily during staged startup
+from services.startup import StartupStage, get_startup_profiler, get_startup_state
+from services.logging_pipeline import configure_logging, set_request_id, get_request_id, shutdown_logging
+from services.state_store import get_state_store, get_socketio_message_queue
+from services.idempotency import idempotent
+from services.socket_router import get_socket_router
+
+# Configure logging (queue-based, handlers run on a background thread)
+configure_logging(log_file=os.getenv('LOG_FILE', 'podplay_sanctuary.log'))
 logger = logging.getLogger(__name__)
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'mama-bear-sanctuary-2024')
 
-# Initialize SocketIO
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+# Initialize SocketIO (a message queue lets any worker emit to any client)
+socketio = SocketIO(
+    app,
+    cors_allowed_origins="*",
+    async_mode='threading',
+    message_queue=get_socketio_message_queue()
+)
 
 # Enable CORS
 CORS(app)
 
+# Every Socket.IO event is registered through the router (one handler per event)
+socket_router = get_socket_router()
+socket_router.bind(socketio)
+
 # Global system reference
 mama_bear_system = None
 
+def get_mama_bear_system():
+    """Get the Mama Bear system, or None until staged startup has finished"""
+    return mama_bear_system
+
+def _enhanced_orchestration():
+    """Import the enhanced orchestrator module on first use"""
+    return get_startup_profiler().import_module('services.enhanced_mama_bear_orchestrator')
+
+def _enhanced_scrapybara():
+    """Import the enhanced Scrapybara manager on first use"""
+    module = get_startup_profiler().import_module('services.enhanced_scrapybara_manager')
+    return module.get_enhanced_scrapybara()
+
+@app.before_request
+def bind_request_id():
+    """Tag every log line for this request with a request ID"""
+    set_request_id(request.headers.get('X-Request-ID'))
+
+@app.after_request
+def add_request_id_header(response):
+    response.headers['X-Request-ID'] = get_request_id() or ''
+    return response
+
 @app.route('/')
 def index():
     """Main landing page"""
@@ -84,7 +104,8 @@ async def health_check():
             return jsonify({
                 'status': 'initializing',
                 'timestamp': datetime.now().isoformat(),
-                'message': 'Mama Bear is waking up...'
+                'message': 'Mama Bear is waking up...',
+                'startup': get_startup_state().get_status()
             }), 202
     except Exception as e:
         logger.error(f"Health check failed: {e}")
@@ -94,6 +115,15 @@ async def health_check():
             'error': str(e)
         }), 500
 
+@app.route('/api/startup')
+def startup_status():
+    """Get startup readiness and per-module/per-component timings"""
+    return jsonify({
+        'state': get_startup_state().get_status(),
+        'profile': get_startup_profiler().report(),
+        'timestamp': datetime.now().isoformat()
+    })
+
 @app.route('/api/status')
 async def get_status():
     """Get detailed system status"""
@@ -184,6 +214,68 @@ async def memory_stats():
         logger.error(f"Memory stats request failed: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/memory/search')
+async def memory_search():
+    """Full-text search over a user's stored conversations"""
+    try:
+        user_id = request.args.get('user_id', 'anonymous')
+        query = request.args.get('q', '').strip()
+        page_context = request.args.get('page_context') or None
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+
+        if not query:
+            return jsonify({'error': 'Query parameter q is required'}), 400
+
+        system = get_mama_bear_system()
+        if not system or not system.memory_manager:
+            return jsonify({'error': 'Memory manager not available'}), 503
+
+        search = getattr(system.memory_manager, 'search_conversations', None)
+        if search is None:
+            return jsonify({'error': 'Conversation search not supported by this memory manager'}), 501
+
+        results = await search(user_id, query, page_context=page_context, limit=limit)
+        return jsonify({'success': True, 'query': query, 'count': len(results), 'results': results})
+
+    except Exception as e:
+        logger.error(f"Memory search request failed: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/memory/history')
+async def memory_history():
+    """Paginated conversation history (cursor-based), or the full history as NDJSON with format=ndjson"""
+    try:
+        user_id = request.args.get('user_id', 'anonymous')
+        page_context = request.args.get('page_context') or None
+        cursor = request.args.get('cursor') or None
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+
+        system = get_mama_bear_system()
+        if not system or not system.memory_manager:
+            return jsonify({'error': 'Memory manager not available'}), 503
+
+        memory = system.memory_manager
+        if not hasattr(memory, 'get_conversation_history_page'):
+            return jsonify({'error': 'Conversation history not supported by this memory manager'}), 501
+
+        if request.args.get('format') == 'ndjson':
+            return Response(
+                stream_with_context(memory.export_conversation_history(user_id, page_context)),
+                mimetype='application/x-ndjson',
+                headers={'Content-Disposition': 'attachment; filename="conversation-history.ndjson"'}
+            )
+
+        try:
+            page = await memory.get_conversation_history_page(user_id, page_context, limit=limit, cursor=cursor)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify({'success': True, 'count': len(page['conversations']), **page})
+
+    except Exception as e:
+        logger.error(f"Memory history request failed: {e}")
+        return jsonify({'error': str(e)}), 500
+
 # Chat endpoints
 @app.route('/api/chat', methods=['POST'])
 async def chat():
@@ -243,6 +335,7 @@ async def chat():
 
 # Agent Plan endpoints
 @app.route('/api/plans', methods=['POST'])
+@idempotent('plans')
 async def create_plan():
     """Create an agent execution plan"""
     try:
@@ -333,6 +426,7 @@ async def run_subtask(plan_id, subtask_id):
 
 # VM Management endpoints
 @app.route('/api/vm/create', methods=['POST'])
+@idempotent('vm_create')
 async def create_vm():
     """Create a VM instance"""
     try:
@@ -362,6 +456,7 @@ async def create_vm():
 
 # Scout autonomous task endpoint
 @app.route('/api/scout/execute', methods=['POST'])
+@idempotent('scout_execute')
 async def execute_scout_task():
     """Execute an autonomous Scout task"""
     try:
@@ -394,22 +489,27 @@ async def execute_scout_task():
         }), 500
 
 # SocketIO Events
-@socketio.on('connect')
+@socket_router.on('connect')
 def handle_connect():
     """Handle client connection"""
     logger.info(f"Client connected: {request.sid}")
+    get_state_store().put('socket_sessions', request.sid, {
+        'connected_at': datetime.now().isoformat(),
+        'worker_pid': os.getpid()
+    })
     emit('connection_status', {
         'status': 'connected',
         'message': '🐻 Mama Bear is ready to help!',
         'timestamp': datetime.now().isoformat()
     })
 
-@socketio.on('disconnect')
+@socket_router.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
     logger.info(f"Client disconnected: {request.sid}")
+    get_state_store().delete('socket_sessions', request.sid)
 
-@socketio.on('mama_bear_message')
+@socket_router.on('mama_bear_message')
 async def handle_mama_bear_message(data):
     """Handle real-time Mama Bear messages"""
     try:
@@ -467,7 +567,16 @@ async def handle_mama_bear_message(data):
             'timestamp': datetime.now().isoformat()
         })
 
-@socketio.on('get_system_status')
+@socket_router.on('create_agent_plan')
+async def handle_plan_creation(data):
+    """Handle agent plan creation"""
+    system = get_mama_bear_system()
+    if not system:
+        emit('agent_plan_error', {'error': 'System not available'})
+        return
+    await system.handle_plan_creation(data)
+
+@socket_router.on('get_system_status')
 async def handle_system_status():
     """Handle system status requests"""
     try:
@@ -483,6 +592,7 @@ async def handle_system_status():
 
 # 🚀 Enhanced Computer Use Agent & Browser Routes
 @app.route('/api/enhanced/submit-task', methods=['POST'])
+@idempotent('enhanced_submit_task')
 async def submit_enhanced_task():
     """Submit a task to the enhanced orchestrator"""
     try:
@@ -493,9 +603,10 @@ async def submit_enhanced_task():
         priority = data.get('priority', 1)
         
         # Convert string to TaskType enum
-        task_type = TaskType(task_type_str)
+        enhanced = _enhanced_orchestration()
+        task_type = enhanced.TaskType(task_type_str)
         
-        task_id = await mama_bear_orchestrator.submit_task(
+        task_id = await enhanced.get_mama_bear_orchestrator().submit_task(
             task_description=task_description,
             task_type=task_type,
             user_id=user_id,
@@ -520,7 +631,7 @@ async def create_shared_browser():
         user_id = data.get('user_id', 'anonymous')
         initial_url = data.get('initial_url')
         
-        session = await enhanced_scrapybara.create_shared_browser_session(
+        session = await _enhanced_scrapybara().create_shared_browser_session(
             user_id=user_id,
             initial_url=initial_url
         )
@@ -548,9 +659,10 @@ async def execute_computer_use():
         user_id = data.get('user_id', 'anonymous')
         
         # Submit as computer use task
-        task_id = await mama_bear_orchestrator.submit_task(
+        enhanced = _enhanced_orchestration()
+        task_id = await enhanced.get_mama_bear_orchestrator().submit_task(
             task_description=task_description,
-            task_type=TaskType.COMPUTER_USE,
+            task_type=enhanced.TaskType.COMPUTER_USE,
             user_id=user_id,
             priority=2
         )
@@ -566,7 +678,7 @@ async def execute_computer_use():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 # Enhanced Socket.IO events
-@socketio.on('enhanced_task_progress')
+@socket_router.on('enhanced_task_progress')
 async def handle_task_progress_request(data):
     """Handle real-time task progress requests"""
     try:
@@ -575,7 +687,7 @@ async def handle_task_progress_request(data):
             emit('enhanced_task_error', {'error': 'Task ID required'})
             return
         
-        status = await mama_bear_orchestrator.get_task_status(task_id)
+        status = await _enhanced_orchestration().get_mama_bear_orchestrator().get_task_status(task_id)
         emit('enhanced_task_progress', status)
         
     except Exception as e:
@@ -612,15 +724,30 @@ async def startup():
     
     logger.info("🐻 Starting Podplay Sanctuary...")
     
+    state = get_startup_state()
+    profiler = get_startup_profiler()
+    
     try:
-        # Initialize the complete Mama Bear system
-        mama_bear_system = await initialize_complete_system(app, socketio)
+        # Stage 1: import the system modules
+        state.transition(StartupStage.IMPORTING)
+        complete_system = profiler.import_module('services.mama_bear_complete_system')
         
+        # Stage 2: initialize the complete Mama Bear system
+        state.transition(StartupStage.INITIALIZING)
+        mama_bear_system = await complete_system.initialize_complete_system(app, socketio)
+        
+        if len(mama_bear_system.agents) < len(complete_system.SPECIALIZED_AGENTS):
+            state.transition(StartupStage.DEGRADED)
+        else:
+            state.transition(StartupStage.READY)
+        
+        profiler.log_report()
         logger.info("✅ Podplay Sanctuary is ready!")
         logger.info("🌟 Mama Bear is awake and ready to help Nathan!")
         
     except Exception as e:
         logger.error(f"❌ Failed to start Podplay Sanctuary: {e}")
+        state.transition(StartupStage.FAILED, error=str(e))
         raise
 
 # Shutdown function
@@ -630,10 +757,18 @@ async def shutdown():
     
     logger.info("🐻 Shutting down Podplay Sanctuary...")
     
+    state = get_startup_state()
+    if state.stage in (StartupStage.READY, StartupStage.DEGRADED, StartupStage.FAILED):
+        state.transition(StartupStage.STOPPING)
+    
     if mama_bear_system:
         await mama_bear_system.shutdown()
     
+    if state.stage == StartupStage.STOPPING:
+        state.transition(StartupStage.STOPPED)
+    
     logger.info("✅ Podplay Sanctuary shutdown complete")
+    shutdown_logging()
 
 if __name__ == '__main__':
     # Run the startup sequence
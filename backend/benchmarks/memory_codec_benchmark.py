@@ -0,0 +1,89 @@
+"""
+Podplay Sanctuary Memory Codec Benchmark
+Compares the binary record codec with pickle for synthetic conversation
+memories: encode/decode throughput and total encoded size.
+
+    python benchmarks/memory_codec_benchmark.py --records 20000 --embedding-dim 0 256
+"""
+import argparse
+import json
+import os
+import pickle
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services import memory_codec
+from services.mama_bear_memory_system import MEMORY_RECORD_SCHEMA, MemoryImportance, MemoryRecord, MemoryType
+
+WORDS = ['deploy', 'docker', 'react', 'flask', 'memory', 'vector', 'please', 'help', 'the', 'build',
+         'error', 'fix', 'model', 'quota', 'socket', 'workspace', 'research', 'cache', 'api', 'thanks']
+AGENTS = ['research_specialist', 'devops_specialist', 'scout_commander', 'model_coordinator']
+
+def synthetic_record(rng: random.Random, i: int, dim: int) -> MemoryRecord:
+    message = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 40)))
+    response = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(40, 200)))
+    return MemoryRecord(
+        id=f"memory_{i:08d}",
+        type=MemoryType.CONVERSATION,
+        content={
+            'user_message': message,
+            'agent_response': response,
+            'agent_id': rng.choice(AGENTS),
+            'complexity_score': rng.randint(1, 10),
+            'sentiment': {'positive': rng.random(), 'negative': rng.random(), 'neutral': rng.random()},
+            'metadata': {'model_used': 'gemini-2.5-flash', 'attempts': rng.randint(1, 3)}
+        },
+        user_id=f"user_{rng.randrange(100)}",
+        agent_id=rng.choice(AGENTS),
+        importance=rng.choice(list(MemoryImportance)),
+        tags=rng.sample(WORDS, 4),
+        created_at=datetime(2024, 1, 1) + timedelta(seconds=rng.randrange(10 ** 7)),
+        embedding=[rng.uniform(-1, 1) for _ in range(dim)] if dim else None
+    )
+
+def measure(records, encode, decode):
+    start = time.perf_counter()
+    blobs = [encode(record) for record in records]
+    encode_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for blob in blobs:
+        decode(blob)
+    decode_s = time.perf_counter() - start
+
+    total = sum(len(blob) for blob in blobs)
+    return {
+        'encode_per_sec': round(len(records) / encode_s),
+        'decode_per_sec': round(len(records) / decode_s),
+        'avg_bytes': round(total / len(records), 1),
+        'total_mb': round(total / 1024 / 1024, 2)
+    }
+
+def run(count: int, dim: int, seed: int):
+    rng = random.Random(seed)
+    records = [synthetic_record(rng, i, dim) for i in range(count)]
+    return {
+        'records': count,
+        'embedding_dim': dim,
+        'pickle': measure(records, lambda r: pickle.dumps(r, protocol=pickle.HIGHEST_PROTOCOL), pickle.loads),
+        'codec': measure(records, MEMORY_RECORD_SCHEMA.encode, memory_codec.decode)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=20000)
+    parser.add_argument('--embedding-dim', type=int, nargs='+', default=[0, 256])
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    for dim in args.embedding_dim:
+        print(json.dumps(run(args.records, dim, args.seed)), flush=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Podplay Sanctuary Memory Embeddings Benchmark
+Measures encode throughput, brute-force vs IVF search latency and IVF recall@k
+for one user's vector index at several corpus sizes.
+
+    python benchmarks/memory_embeddings_benchmark.py --sizes 10000 100000 1000000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+import numpy as np
+
+from services.memory_embeddings import HashedTfidfEncoder, UserVectorIndex
+
+TOPICS = [
+    'python', 'docker', 'kubernetes', 'react', 'flask', 'socket', 'gemini', 'deploy', 'database',
+    'sqlite', 'vector', 'memory', 'browser', 'scrapybara', 'workspace', 'research', 'testing',
+    'logging', 'monitoring', 'quota', 'model', 'frontend', 'css', 'api', 'auth', 'cache'
+]
+FILLER = ['please', 'help', 'with', 'the', 'issue', 'how', 'do', 'i', 'fix', 'my', 'setup', 'error',
+          'build', 'again', 'today', 'project', 'thanks', 'works', 'now', 'after', 'change']
+
+def synthetic_memory(rng: random.Random) -> str:
+    topics = rng.sample(TOPICS, 3)
+    words = [rng.choice(topics) if rng.random() < 0.4 else rng.choice(FILLER) for _ in range(rng.randint(12, 40))]
+    words += [f"{topics[0]}_{rng.randint(0, 2000)}"]
+    return ' '.join(words)
+
+def percentile(values, pct):
+    return round(float(np.percentile(values, pct)), 3)
+
+def run(size: int, dim: int, queries: int, k: int, nprobe: int, seed: int):
+    rng = random.Random(seed)
+    encoder = HashedTfidfEncoder(dim=dim)
+    texts = [synthetic_memory(rng) for _ in range(size)]
+
+    start = time.perf_counter()
+    vectors = np.stack([encoder.encode(text) for text in texts])
+    encode_s = time.perf_counter() - start
+
+    index = UserVectorIndex(dim, ivf_threshold=0, nprobe=nprobe)
+    index.add_many([f"m{i}" for i in range(size)], vectors)
+
+    start = time.perf_counter()
+    index.build_ivf()
+    build_s = time.perf_counter() - start
+
+    query_vectors = [encoder.encode(texts[rng.randrange(size)] + ' ' + rng.choice(FILLER), update_stats=False)
+                     for _ in range(queries)]
+
+    exact_ms, ivf_ms, recalls = [], [], []
+    for query in query_vectors:
+        t0 = time.perf_counter()
+        exact = index.search(query, k, exact=True)
+        t1 = time.perf_counter()
+        approx = index.search(query, k)
+        t2 = time.perf_counter()
+
+        exact_ms.append((t1 - t0) * 1000)
+        ivf_ms.append((t2 - t1) * 1000)
+        truth = {memory_id for memory_id, _ in exact}
+        recalls.append(len(truth & {memory_id for memory_id, _ in approx}) / max(1, len(truth)))
+
+    return {
+        'memories': size,
+        'dim': dim,
+        'encode_per_sec': round(size / encode_s),
+        'ivf_lists': index.ivf.nlist,
+        'nprobe': nprobe,
+        'ivf_build_s': round(build_s, 2),
+        'brute_p50_ms': percentile(exact_ms, 50),
+        'brute_p95_ms': percentile(exact_ms, 95),
+        'ivf_p50_ms': percentile(ivf_ms, 50),
+        'ivf_p95_ms': percentile(ivf_ms, 95),
+        f'ivf_recall_at_{k}': round(float(np.mean(recalls)), 3)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--dim', type=int, default=256)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--nprobe', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        print(json.dumps(run(size, args.dim, args.queries, args.k, args.nprobe, args.seed)), flush=True)
+
+if __name__ == '__main__':
+    main()
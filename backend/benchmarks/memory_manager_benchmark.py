@@ -0,0 +1,138 @@
+"""
+Podplay Sanctuary Memory Manager Benchmark
+Compares MemoryManager's pooled WAL connections with the previous
+connection-per-call access pattern (rollback journal, run on the event
+loop) for save_interaction and get_context throughput, and reports the
+worst event-loop stall observed while each workload runs.
+
+    python benchmarks/memory_manager_benchmark.py --operations 2000 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+os.environ.setdefault('MEM0_MEMORY_ENABLED', 'false')
+
+from services.memory_manager import MemoryManager
+
+PAGES = ['main_chat', 'vm_hub', 'scout', 'mcp_hub']
+
+class ConnectionPerCallBaseline:
+    """The access pattern MemoryManager used before the pool: a new connection per query, on the loop"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        with sqlite3.connect(db_path) as conn:
+            MemoryManager._create_schema(conn)
+
+    async def save_interaction(self, user_id, page_context, message, response, metadata=None):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                INSERT INTO conversations (user_id, page_context, message, response, metadata)
+                VALUES (?, ?, ?, ?, ?)
+            """, (user_id, page_context, message, response, json.dumps(metadata or {})))
+            conn.commit()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                DELETE FROM conversations
+                WHERE user_id = ? AND page_context = ? AND id NOT IN (
+                    SELECT id FROM conversations WHERE user_id = ? AND page_context = ?
+                    ORDER BY timestamp DESC LIMIT 1000
+                )
+            """, (user_id, page_context, user_id, page_context))
+            conn.commit()
+
+    async def get_context(self, user_id, page_context, limit=10):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            summary = conn.execute(
+                "SELECT * FROM conversation_summaries WHERE user_id = ? AND page_context = ?", (user_id, page_context)
+            ).fetchone()
+            rows = conn.execute("""
+                SELECT id, message, response, metadata, timestamp FROM conversations
+                WHERE user_id = ? AND page_context = ? AND id > ? ORDER BY id DESC LIMIT ?
+            """, (user_id, page_context, summary['summarized_through_id'] if summary else 0, limit)).fetchall()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("SELECT preferences FROM user_preferences WHERE user_id = ?", (user_id,)).fetchone()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                SELECT memory_key, memory_value FROM session_memory
+                WHERE user_id = ? AND page_context = ? AND expires_at > datetime('now')
+            """, (user_id, page_context)).fetchall()
+        return [dict(row) for row in rows]
+
+async def measure(operation, count: int, concurrency: int):
+    """Ops/sec for `count` calls with `concurrency` in flight, plus the largest loop stall"""
+    stall = {'max_ms': 0.0}
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            stall['max_ms'] = max(stall['max_ms'], (time.perf_counter() - start) * 1000 - 1)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            await operation(i)
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(count)])
+    elapsed = time.perf_counter() - start
+    done.set()
+    await tick
+    return {'ops_per_sec': round(count / elapsed), 'max_loop_stall_ms': round(stall['max_ms'], 2)}
+
+async def run_workloads(target, count: int, concurrency: int, users: int, seed: int):
+    rng = random.Random(seed)
+    pairs = [(f"user_{rng.randrange(users)}", rng.choice(PAGES)) for _ in range(count)]
+
+    async def save(i):
+        user_id, page = pairs[i]
+        await target.save_interaction(user_id, page, f"Question {i} about deploys", f"Answer {i}. " + 'x' * 400,
+                                      {'model_used': 'gemini-2.5-flash'})
+
+    async def read(i):
+        user_id, page = pairs[i]
+        await target.get_context(user_id, page)
+
+    return {
+        'save_interaction': await measure(save, count, concurrency),
+        'get_context': await measure(read, count, concurrency)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--operations', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        baseline = ConnectionPerCallBaseline(os.path.join(directory, 'baseline.db'))
+        before = asyncio.run(run_workloads(baseline, args.operations, args.concurrency, args.users, args.seed))
+
+        manager = MemoryManager(db_path=os.path.join(directory, 'pooled.db'))
+        manager.compactor.interval = 3600  # Keep summarization out of the measurement
+        after = asyncio.run(run_workloads(manager, args.operations, args.concurrency, args.users, args.seed))
+        manager.close()
+
+    print(json.dumps({'operations': args.operations, 'concurrency': args.concurrency,
+                      'before': before, 'after': after}, indent=2))
+
+if __name__ == '__main__':
+    main()
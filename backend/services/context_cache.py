@@ -0,0 +1,125 @@
+# backend/services/context_cache.py
+"""
+🐻 Mama Bear Context Cache
+Per-(user, page) cache of built conversation contexts, invalidated or
+patched in place by the writes that change them
+"""
+
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, str]
+
+class ContextCache:
+    """
+    LRU of context dicts keyed by (user_id, page_context). Entries also
+    remember the parameters they were built with, and expire after `ttl`
+    seconds so writes from other processes are picked up eventually.
+
+    A read that misses takes `version(key)` before querying and passes it to
+    `put`; a write that lands in between is newer than that version, so the
+    stale result is not cached. Writes are stamped from one counter and the
+    stamps live in their own bounded LRU. A forgotten stamp is treated as
+    the newest one dropped, which can only turn away puts, never admit
+    stale ones.
+    """
+
+    def __init__(self, max_entries: int = 2000, ttl: float = 60.0, max_stamps: int = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_stamps = max_stamps or 2 * max_entries
+        self._entries: 'OrderedDict[Key, Tuple[Hashable, float, Dict[str, Any]]]' = OrderedDict()
+        self._user_keys: Dict[str, set] = defaultdict(set)  # user_id -> keys with an entry
+        self._clock = 0
+        self._stamps: 'OrderedDict[Key, int]' = OrderedDict()  # Last write per key; (user_id, None) is user-wide
+        self._floor = 0  # Newest stamp dropped from _stamps
+        self._lock = threading.Lock()
+        self.metrics = defaultdict(int)
+
+    def version(self, key: Key) -> int:
+        with self._lock:
+            return self._clock
+
+    def _stamp(self, key: Key):
+        self._clock += 1
+        self._stamps[key] = self._clock
+        self._stamps.move_to_end(key)
+        while len(self._stamps) > self.max_stamps:
+            _, stamp = self._stamps.popitem(last=False)
+            self._floor = stamp
+
+    def _written_since(self, key: Key, version: int) -> bool:
+        last_write = max(self._stamps.get(key, self._floor), self._stamps.get((key[0], None), self._floor))
+        return last_write > version
+
+    def _drop(self, key: Key) -> bool:
+        if self._entries.pop(key, None) is None:
+            return False
+        keys = self._user_keys[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self._user_keys[key[0]]
+        return True
+
+    def get(self, key: Key, params: Hashable) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.monotonic():
+                self._drop(key)  # Expired
+                entry = None
+            if entry is None or entry[0] != params:
+                self.metrics['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.metrics['hits'] += 1
+            return copy.deepcopy(entry[2])  # Callers may add to or edit what they get back
+
+    def put(self, key: Key, params: Hashable, context: Dict[str, Any], version: int):
+        with self._lock:
+            if self._written_since(key, version):
+                self.metrics['stale_puts'] += 1
+                return
+            self._entries[key] = (params, time.monotonic() + self.ttl, copy.deepcopy(context))
+            self._entries.move_to_end(key)
+            self._user_keys[key[0]].add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.metrics['evictions'] += 1
+
+    def invalidate(self, key: Key):
+        with self._lock:
+            self._stamp(key)
+            if self._drop(key):
+                self.metrics['invalidations'] += 1
+
+    def update(self, user_id: str, apply: Callable[[Dict[str, Any]], None], page_context: str = None):
+        """Patch cached contexts for a user (or one of their pages) in place"""
+        with self._lock:
+            # Reads already in flight saw the old value; keep them out of the cache
+            self._stamp((user_id, page_context))
+            for key in self._user_keys.get(user_id, ()):
+                if page_context is None or key[1] == page_context:
+                    apply(self._entries[key][2])
+                    self.metrics['updates'] += 1
+
+    def get_status(self) -> Dict[str, Any]:
+        hits, misses = self.metrics['hits'], self.metrics['misses']
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'version_stamps': len(self._stamps),
+            'ttl_s': self.ttl,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 3) if hits + misses else None,
+            'invalidations': self.metrics['invalidations'],
+            'updates': self.metrics['updates'],
+            'stale_puts': self.metrics['stale_puts'],
+            'evictions': self.metrics['evictions']
+        }
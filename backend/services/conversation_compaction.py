@@ -0,0 +1,181 @@
+# backend/services/conversation_compaction.py
+"""
+🐻 Mama Bear Conversation Compaction
+Rolls older conversation turns into an incrementally updated summary per
+(user, page) in the background, and fits summary + recent turns into a
+prompt token budget
+"""
+
+import asyncio
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (previous summary, [(message, response), ...] oldest first) -> new summary
+Summarizer = Callable[[str, List[Tuple[str, str]]], Awaitable[str]]
+
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)"""
+    return (len(text) + 3) // 4
+
+def _first_sentence(text: str, max_chars: int) -> str:
+    sentence = SENTENCE_END.split(text.strip(), 1)[0]
+    return sentence if len(sentence) <= max_chars else sentence[:max_chars - 1].rstrip() + '…'
+
+def format_turn(message: str, response: str) -> str:
+    return f"User: {message}\nMama Bear: {response}"
+
+async def extractive_summary(previous: str, turns: List[Tuple[str, str]], max_chars: int = 1600) -> str:
+    """
+    Local stub summarizer: keeps the opening sentence of each question and
+    answer, dropping the oldest lines first once over `max_chars`
+    """
+    lines = [line for line in (previous or '').splitlines() if line]
+    for message, response in turns:
+        lines.append(f"- Asked: {_first_sentence(message, 160)} | Answered: {_first_sentence(response, 200)}")
+
+    while len(lines) > 1 and sum(len(line) + 1 for line in lines) > max_chars:
+        lines.pop(0)
+    return '\n'.join(lines)
+
+def model_summarizer(model_manager, max_chars: int = 1600) -> Summarizer:
+    """Summarize with the cheapest (flash) model, falling back to the local stub"""
+
+    async def summarize(previous: str, turns: List[Tuple[str, str]]) -> str:
+        transcript = '\n\n'.join(format_turn(message, response) for message, response in turns)
+        prompt = (
+            f"Update this running summary of a conversation in at most {max_chars} characters. "
+            "Keep user goals, decisions, facts and open questions; drop pleasantries.\n\n"
+            f"Current summary:\n{previous or '(none)'}\n\nNew turns:\n{transcript}\n\nUpdated summary:"
+        )
+        try:
+            result = await model_manager.generate_response(prompt=prompt, model_preference='flash')
+            if result.get('success') and result.get('content'):
+                return result['content'].strip()[:max_chars]
+        except Exception as e:
+            logger.warning(f"Model summarization failed, using local summary: {e}")
+        return await extractive_summary(previous, turns, max_chars)
+
+    return summarize
+
+def fit_to_budget(summary: str, turns: List[Dict[str, Any]], token_budget: int) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Keep as many of the newest turns (given newest first) as fit in
+    `token_budget` alongside the summary. The newest turn is always kept,
+    its response trimmed if needed. Returns (turns oldest first, tokens used).
+    """
+    used = estimate_tokens(summary) if summary else 0
+    kept = []
+    for turn in turns:
+        cost = estimate_tokens(format_turn(turn['message'], turn['response']))
+        if used + cost > token_budget:
+            if not kept:
+                room = max((token_budget - used) * 4 - len(turn['message']) - 20, 200)
+                turn = dict(turn, response=turn['response'][:room] + '…')
+                kept.append(turn)
+                used += estimate_tokens(format_turn(turn['message'], turn['response']))
+            break
+        kept.append(turn)
+        used += cost
+    return list(reversed(kept)), used
+
+class ConversationCompactor:
+    """
+    Background worker that summarizes conversations flagged by new
+    interactions. Runs on its own thread and event loop so it is independent
+    of whichever loop handled the request.
+    """
+
+    def __init__(self, compact: Callable[[str, str, Summarizer], Awaitable[Optional[int]]],
+                 summarizer: Summarizer = None, interval: float = 2.0, max_keys_per_pass: int = 32):
+        self.compact = compact
+        self.summarizer = summarizer or extractive_summary
+        self.interval = interval
+        self.max_keys_per_pass = max_keys_per_pass
+
+        self._pending: Dict[Tuple[str, str], None] = {}  # Insertion-ordered set
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+        self.metrics = defaultdict(float)
+
+    def notify(self, user_id: str, page_context: str):
+        with self._lock:
+            self._pending[(user_id, page_context)] = None
+        if self._worker is None:
+            self.start()
+        self._wake.set()
+
+    def start(self):
+        with self._lock:
+            if self._worker is None and not self._stop.is_set():
+                self._worker = threading.Thread(target=self._run, name='conversation-compactor', daemon=True)
+                self._worker.start()
+
+    def _take_batch(self) -> List[Tuple[str, str]]:
+        with self._lock:
+            keys = list(self._pending)[:self.max_keys_per_pass]
+            for key in keys:
+                del self._pending[key]
+            return keys
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            while not self._stop.is_set():
+                self._wake.wait()
+                self._wake.clear()
+                # Let a burst of interactions coalesce into one pass
+                if self._stop.wait(self.interval):
+                    break
+                while not self._stop.is_set():
+                    keys = self._take_batch()
+                    if not keys:
+                        break
+                    loop.run_until_complete(self.run_pass(keys))
+        finally:
+            loop.close()
+
+    def stop(self, timeout: float = None):
+        """Stop the worker after the summary in progress, if any; pending keys are dropped"""
+        self._stop.set()
+        self._wake.set()
+        with self._lock:
+            worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+
+    async def run_pass(self, keys: List[Tuple[str, str]]):
+        start = time.perf_counter()
+        for user_id, page_context in keys:
+            try:
+                summarized = await self.compact(user_id, page_context, self.summarizer)
+                if summarized:
+                    self.metrics['summaries_updated'] += 1
+                    self.metrics['turns_summarized'] += summarized
+            except Exception as e:
+                self.metrics['failures'] += 1
+                logger.error(f"Conversation compaction failed for {user_id}/{page_context}: {e}")
+        self.metrics['passes'] += 1
+        self.metrics['pass_ms_total'] += (time.perf_counter() - start) * 1000
+
+    def get_status(self) -> Dict[str, Any]:
+        passes = self.metrics['passes']
+        return {
+            'pending': len(self._pending),
+            'passes': int(passes),
+            'summaries_updated': int(self.metrics['summaries_updated']),
+            'turns_summarized': int(self.metrics['turns_summarized']),
+            'failures': int(self.metrics['failures']),
+            'avg_pass_ms': round(self.metrics['pass_ms_total'] / passes, 2) if passes else None
+        }
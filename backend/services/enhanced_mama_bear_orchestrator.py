@@ -12,8 +12,10 @@ from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
 from enum import Enum
 
-from .enhanced_scrapybara_manager import enhanced_scrapybara
+from .enhanced_scrapybara_manager import get_enhanced_scrapybara
 from .mama_bear_memory_system import EnhancedMemoryManager
+from .startup import LazyComponent
+from .state_store import get_state_store
 
 logger = logging.getLogger(__name__)
 
@@ -43,8 +45,10 @@ class AgentTask:
 class EnhancedMamaBearOrchestrator:
     """Orchestrates multiple Mama Bear agents with enhanced capabilities"""
     
-    def __init__(self):
+    def __init__(self, state_store=None):
+        # Tasks executing in this process; every task is mirrored to the shared store
         self.active_tasks: Dict[str, AgentTask] = {}
+        self.task_store = (state_store or get_state_store()).namespace('enhanced_tasks')
         self.agent_pool = {
             'research_specialist': {'status': 'available', 'capabilities': ['research', 'analysis']},
             'browser_automation': {'status': 'available', 'capabilities': ['browser_automation', 'web_scraping']},
@@ -52,8 +56,34 @@ class EnhancedMamaBearOrchestrator:
             'collaboration_manager': {'status': 'available', 'capabilities': ['collaboration', 'session_management']},
             'multi_instance_coordinator': {'status': 'available', 'capabilities': ['multi_instance', 'parallel_processing']}
         }
-        self.memory_manager = EnhancedMemoryManager()
-        
+        self._memory_manager = None
+    
+    @property
+    def memory_manager(self) -> EnhancedMemoryManager:
+        """Memory manager, created on first use so construction stays cheap"""
+        if self._memory_manager is None:
+            self._memory_manager = EnhancedMemoryManager()
+        return self._memory_manager
+    
+    def _task_to_dict(self, task: AgentTask) -> Dict[str, Any]:
+        """Serialize a task for the shared store"""
+        data = asdict(task)
+        data['task_type'] = task.task_type.value
+        data['created_at'] = task.created_at.isoformat() if task.created_at else None
+        return data
+    
+    def _persist_task(self, task: AgentTask):
+        """Mirror task state so any worker can answer status requests"""
+        try:
+            self.task_store[task.task_id] = self._task_to_dict(task)
+        except Exception as e:
+            logger.error(f"Failed to persist task {task.task_id}: {e}")
+    
+    def _record_step(self, task: AgentTask, step: str):
+        """Append a progress step and publish it"""
+        task.progress['steps'].append(step)
+        self._persist_task(task)
+
     async def submit_task(self, task_description: str, task_type: TaskType, user_id: str, priority: int = 1) -> str:
         """Submit a new task to the orchestrator"""
         task_id = f"task_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
@@ -69,6 +99,7 @@ class EnhancedMamaBearOrchestrator:
         )
         
         self.active_tasks[task_id] = task
+        self._persist_task(task)
         
         # Assign to appropriate agent
         await self._assign_task(task)
@@ -101,11 +132,13 @@ class EnhancedMamaBearOrchestrator:
             task.assigned_agent = best_agent
             task.status = "assigned"
             self.agent_pool[best_agent]['status'] = 'busy'
+            self._persist_task(task)
             
             # Execute task asynchronously
             asyncio.create_task(self._execute_task(task))
         else:
             task.status = "waiting"
+            self._persist_task(task)
             logger.warning(f"No available agent for task {task.task_id}")
     
     async def _execute_task(self, task: AgentTask):
@@ -113,6 +146,7 @@ class EnhancedMamaBearOrchestrator:
         try:
             task.status = "executing"
             task.progress['status'] = 'in_progress'
+            self._persist_task(task)
             
             if task.task_type == TaskType.RESEARCH:
                 result = await self._execute_research_task(task)
@@ -143,94 +177,96 @@ class EnhancedMamaBearOrchestrator:
             logger.error(f"Task {task.task_id} failed: {e}")
         
         finally:
+            self._persist_task(task)
+            
             # Free up the agent
             if task.assigned_agent:
                 self.agent_pool[task.assigned_agent]['status'] = 'available'
     
     async def _execute_research_task(self, task: AgentTask) -> Dict[str, Any]:
         """Execute a research task"""
-        task.progress['steps'].append("Starting research...")
+        self._record_step(task, "Starting research...")
         
         # Extract research topics from description
         research_topics = [task.description]  # Simplified - could use NLP to extract multiple topics
         
-        result = await enhanced_scrapybara.multi_instance_research(
+        result = await get_enhanced_scrapybara().multi_instance_research(
             research_topics=research_topics,
             user_id=task.user_id
         )
         
-        task.progress['steps'].append("Research completed")
+        self._record_step(task, "Research completed")
         return result
     
     async def _execute_browser_task(self, task: AgentTask) -> Dict[str, Any]:
         """Execute a browser automation task"""
-        task.progress['steps'].append("Creating browser session...")
+        self._record_step(task, "Creating browser session...")
         
         # Create shared browser session
-        session = await enhanced_scrapybara.create_shared_browser_session(
+        session = await get_enhanced_scrapybara().create_shared_browser_session(
             user_id=task.user_id,
             initial_url="https://google.com"
         )
         
         task.instance_id = session.instance_id
-        task.progress['steps'].append(f"Browser session created: {session.session_id}")
+        self._record_step(task, f"Browser session created: {session.session_id}")
         
         # Execute browser actions
-        result = await enhanced_scrapybara.execute_browser_action(
+        result = await get_enhanced_scrapybara().execute_browser_action(
             session_id=session.session_id,
             action=task.description,
             user_id=task.user_id
         )
         
-        task.progress['steps'].append("Browser automation completed")
+        self._record_step(task, "Browser automation completed")
         return result
     
     async def _execute_computer_use_task(self, task: AgentTask) -> Dict[str, Any]:
         """Execute a computer use agent task"""
-        task.progress['steps'].append("Starting computer use agent...")
+        self._record_step(task, "Starting computer use agent...")
         
         # Start new instance for computer use
-        instance = await enhanced_scrapybara.client.start_ubuntu()
+        instance = await get_enhanced_scrapybara().client.start_ubuntu()
         task.instance_id = instance.id
         
-        task.progress['steps'].append(f"Instance created: {instance.id}")
+        self._record_step(task, f"Instance created: {instance.id}")
         
         # Execute computer use task
-        result = await enhanced_scrapybara.computer_use_agent_task(
+        result = await get_enhanced_scrapybara().computer_use_agent_task(
             instance_id=instance.id,
             task_description=task.description
         )
         
-        task.progress['steps'].append("Computer use task completed")
+        self._record_step(task, "Computer use task completed")
         return result
     
     async def _execute_multi_instance_task(self, task: AgentTask) -> Dict[str, Any]:
         """Execute a multi-instance parallel task"""
-        task.progress['steps'].append("Starting multi-instance execution...")
+        self._record_step(task, "Starting multi-instance execution...")
         
         # Parse task for multiple subtasks
         # This is simplified - could use NLP to break down complex tasks
         subtasks = [task.description]  # For now, treat as single task
         
-        result = await enhanced_scrapybara.multi_instance_research(
+        result = await get_enhanced_scrapybara().multi_instance_research(
             research_topics=subtasks,
             user_id=task.user_id
         )
         
-        task.progress['steps'].append("Multi-instance execution completed")
+        self._record_step(task, "Multi-instance execution completed")
         return result
     
     async def _execute_collaboration_task(self, task: AgentTask) -> Dict[str, Any]:
         """Execute a collaboration task"""
-        task.progress['steps'].append("Setting up collaboration session...")
+        self._record_step(task, "Setting up collaboration session...")
         
         # Create shared session
-        session = await enhanced_scrapybara.create_shared_browser_session(
+        session = await get_enhanced_scrapybara().create_shared_browser_session(
             user_id=task.user_id
         )
         
         task.instance_id = session.instance_id
-        task.progress['steps'].append(f"Collaboration session: {session.session_id}")
+        self._record_step(task, f"Collaboration session: {session.session_id}")
         
         # Return session info for user to join
         return {
@@ -242,52 +278,56 @@ class EnhancedMamaBearOrchestrator:
     
     async def _execute_analysis_task(self, task: AgentTask) -> Dict[str, Any]:
         """Execute an analysis task"""
-        task.progress['steps'].append("Starting analysis...")
+        self._record_step(task, "Starting analysis...")
         
         # Create instance for analysis
-        instance = await enhanced_scrapybara.client.start_ubuntu()
+        instance = await get_enhanced_scrapybara().client.start_ubuntu()
         task.instance_id = instance.id
         
         # Take screenshot and analyze
-        result = await enhanced_scrapybara.intelligent_screenshot_analysis(
+        result = await get_enhanced_scrapybara().intelligent_screenshot_analysis(
             instance_id=instance.id,
             analysis_request=task.description
         )
         
-        task.progress['steps'].append("Analysis completed")
+        self._record_step(task, "Analysis completed")
         return result
     
     async def get_task_status(self, task_id: str) -> Optional[Dict[str, Any]]:
         """Get the status of a task"""
-        if task_id not in self.active_tasks:
-            return None
-            
-        task = self.active_tasks[task_id]
+        if task_id in self.active_tasks:
+            task = self._task_to_dict(self.active_tasks[task_id])
+        else:
+            # Task may be running on another worker
+            task = self.task_store.get(task_id)
+            if task is None:
+                return None
+        
         return {
-            'task_id': task.task_id,
-            'status': task.status,
-            'progress': task.progress,
-            'assigned_agent': task.assigned_agent,
-            'created_at': task.created_at.isoformat() if task.created_at else None,
-            'description': task.description,
-            'result': task.result
+            'task_id': task['task_id'],
+            'status': task['status'],
+            'progress': task['progress'],
+            'assigned_agent': task['assigned_agent'],
+            'created_at': task['created_at'],
+            'description': task['description'],
+            'result': task['result']
         }
     
     async def list_user_tasks(self, user_id: str) -> List[Dict[str, Any]]:
         """List all tasks for a user"""
         user_tasks = [
-            task for task in self.active_tasks.values() 
-            if task.user_id == user_id
+            task for task in self.task_store.values()
+            if task['user_id'] == user_id
         ]
         
         return [
             {
-                'task_id': task.task_id,
-                'status': task.status,
-                'description': task.description,
-                'task_type': task.task_type.value,
-                'created_at': task.created_at.isoformat() if task.created_at else None,
-                'assigned_agent': task.assigned_agent
+                'task_id': task['task_id'],
+                'status': task['status'],
+                'description': task['description'],
+                'task_type': task['task_type'],
+                'created_at': task['created_at'],
+                'assigned_agent': task['assigned_agent']
             }
             for task in user_tasks
         ]
@@ -295,7 +335,14 @@ class EnhancedMamaBearOrchestrator:
     async def cancel_task(self, task_id: str) -> bool:
         """Cancel a task"""
         if task_id not in self.active_tasks:
-            return False
+            # Owned by another worker: mark it cancelled in the shared store
+            task = self.task_store.get(task_id)
+            if task is None or task['status'] in ['completed', 'failed']:
+                return False
+            task['status'] = 'cancelled'
+            self.task_store[task_id] = task
+            logger.info(f"Task cancelled: {task_id}")
+            return True
             
         task = self.active_tasks[task_id]
         
@@ -303,6 +350,7 @@ class EnhancedMamaBearOrchestrator:
             return False
             
         task.status = 'cancelled'
+        self._persist_task(task)
         
         # Free up agent if assigned
         if task.assigned_agent:
@@ -316,9 +364,13 @@ class EnhancedMamaBearOrchestrator:
         return {
             'agents': dict(self.agent_pool),
             'active_tasks': len([t for t in self.active_tasks.values() if t.status in ['executing', 'assigned']]),
-            'total_tasks': len(self.active_tasks),
+            'total_tasks': len(self.task_store),
             'timestamp': datetime.now().isoformat()
         }
 
-# Global orchestrator instance
-mama_bear_orchestrator = EnhancedMamaBearOrchestrator()
\ No newline at end of file
+# Global orchestrator instance, created on first use
+_mama_bear_orchestrator = LazyComponent('enhanced_orchestrator', EnhancedMamaBearOrchestrator)
+
+def get_mama_bear_orchestrator() -> EnhancedMamaBearOrchestrator:
+    """Get the global EnhancedMamaBearOrchestrator instance"""
+    return _mama_bear_orchestrator.get()
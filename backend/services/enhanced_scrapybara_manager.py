@@ -4,6 +4,7 @@ Compatibility wrapper for ScrapybaraManager with extension hooks for advanced or
 """
 import logging
 from .scrapybara_manager import ScrapybaraManager
+from .startup import LazyComponent
 
 logger = logging.getLogger(__name__)
 
@@ -28,5 +29,9 @@ class EnhancedScrapybaraManager:
 
     # Add more proxy or extension methods as needed
 
-# Export a global instance for use elsewhere
-enhanced_scrapybara = EnhancedScrapybaraManager()
+# Global instance, created on first use
+_enhanced_scrapybara = LazyComponent('enhanced_scrapybara', EnhancedScrapybaraManager)
+
+def get_enhanced_scrapybara() -> EnhancedScrapybaraManager:
+    """Get the global EnhancedScrapybaraManager instance"""
+    return _enhanced_scrapybara.get()
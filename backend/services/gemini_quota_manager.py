@@ -10,12 +10,16 @@ from typing import Dict, List, Optional, Any, Union
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
-import google.generativeai as genai
-from google.oauth2 import service_account
 import logging
 from abc import ABC, abstractmethod
 import os
 
+from .startup import lazy_import
+
+# Heavy SDKs are only imported on first use
+genai = lazy_import('google.generativeai')
+service_account = lazy_import('google.oauth2.service_account')
+
 # Configure logging
 logger = logging.getLogger("GeminiQuotaManager")
 
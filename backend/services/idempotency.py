@@ -0,0 +1,235 @@
+# backend/services/idempotency.py
+"""
+🐻 Mama Bear Idempotency Keys
+Lets clients safely retry expensive requests: duplicates with the same key
+attach to the original execution instead of starting a new one
+"""
+
+import asyncio
+import functools
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .state_store import get_state_store
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_FIELD = 'idempotency_key'
+
+class IdempotencyConflict(Exception):
+    """The key was already used for a different request payload"""
+    pass
+
+class IdempotencyTimeout(Exception):
+    """The original execution did not finish while we were waiting for it"""
+    pass
+
+class IdempotencyRegistry:
+    """
+    Tracks in-flight and completed executions per (scope, key) in the shared state store.
+    The first request claims the key and runs; duplicates poll for its result,
+    so retries hitting any worker attach to the same execution.
+    """
+
+    def __init__(self, state_store=None, ttl: float = 24 * 3600, in_flight_ttl: float = 900,
+                 failure_ttl: float = 10, poll_interval: float = 0.2, wait_timeout: float = 600):
+        self.store = state_store or get_state_store()
+        self.ttl = ttl
+        self.in_flight_ttl = in_flight_ttl
+        self.failure_ttl = failure_ttl
+        self.poll_interval = poll_interval
+        self.wait_timeout = wait_timeout
+
+        # Wakes same-process waiters as soon as the owner finishes
+        self._local_events: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+        self.metrics = defaultdict(int)
+
+    async def execute(self, scope: str, key: str, operation: Callable[[], Awaitable[Any]],
+                      fingerprint: str = None,
+                      is_failure: Callable[[Any], bool] = None) -> Tuple[Any, bool]:
+        """
+        Run `operation` once per (scope, key).
+        Returns (result, replayed) where replayed is True for duplicates.
+        Failed results are only kept for `failure_ttl` so later retries run again.
+        """
+        record_key = f"{scope}:{key}"
+        deadline = time.monotonic() + self.wait_timeout
+
+        while True:
+            claim = {
+                'status': 'in_flight',
+                'fingerprint': fingerprint,
+                'owner_pid': os.getpid(),
+                'started_at': datetime.now().isoformat()
+            }
+
+            if self.store.put_if_absent('idempotency', record_key, claim, ttl=self.in_flight_ttl):
+                return await self._run_owner(record_key, operation, fingerprint, is_failure), False
+
+            record = self.store.get('idempotency', record_key)
+            if record is None:
+                continue  # Expired or released between the claim and the read
+
+            if fingerprint and record.get('fingerprint') and record['fingerprint'] != fingerprint:
+                self.metrics['conflicts'] += 1
+                raise IdempotencyConflict(f"Idempotency key {key} was already used with a different request")
+
+            if record['status'] == 'completed':
+                self.metrics['replayed'] += 1
+                return record['result'], True
+
+            # In flight elsewhere: wait for it to finish
+            self.metrics['attached'] += 1
+            record = await self._wait_for_completion(record_key, deadline)
+            if record is not None:
+                self.metrics['replayed'] += 1
+                return record['result'], True
+            # Owner released the claim without a result; try to claim it ourselves
+
+    async def _run_owner(self, record_key: str, operation, fingerprint: str, is_failure) -> Any:
+        event = threading.Event()
+        with self._lock:
+            self._local_events[record_key] = event
+
+        self.metrics['executed'] += 1
+        try:
+            try:
+                result = await operation()
+            except Exception:
+                # Nothing to replay; let the next retry run again
+                self.store.delete('idempotency', record_key)
+                raise
+
+            failed = is_failure(result) if is_failure else False
+            self.store.put('idempotency', record_key, {
+                'status': 'completed',
+                'fingerprint': fingerprint,
+                'result': result,
+                'failed': failed,
+                'completed_at': datetime.now().isoformat()
+            }, ttl=self.failure_ttl if failed else self.ttl)
+
+            return result
+        finally:
+            # Only after the record is final, so woken waiters read the result instead of going back to polling
+            with self._lock:
+                self._local_events.pop(record_key, None)
+            event.set()
+
+    async def _wait_for_completion(self, record_key: str, deadline: float) -> Optional[Dict[str, Any]]:
+        """Wait until the record completes (returned) or disappears (None)"""
+        while time.monotonic() < deadline:
+            with self._lock:
+                event = self._local_events.get(record_key)
+
+            if event is not None:
+                await asyncio.to_thread(event.wait, self.poll_interval)
+            else:
+                await asyncio.sleep(self.poll_interval)
+
+            record = self.store.get('idempotency', record_key)
+            if record is None:
+                return None
+            if record['status'] == 'completed':
+                return record
+
+        raise IdempotencyTimeout(f"Timed out waiting for in-flight request {record_key}")
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            'executed': self.metrics['executed'],
+            'replayed': self.metrics['replayed'],
+            'attached': self.metrics['attached'],
+            'conflicts': self.metrics['conflicts'],
+            'in_flight_local': len(self._local_events)
+        }
+
+def request_fingerprint(payload: bytes) -> str:
+    return hashlib.sha256(payload or b'').hexdigest()
+
+def scoped_key(caller: str, key: str) -> str:
+    """Keys are per caller: two users sending the same key never share an execution"""
+    return f"{caller or 'anonymous'}:{key}"
+
+async def run_idempotent_request(scope: str, caller: str, key: str, payload: bytes,
+                                 operation: Callable[[], Awaitable[Dict[str, Any]]],
+                                 registry: IdempotencyRegistry = None) -> Tuple[int, Any, bool]:
+    """
+    HTTP flavour of IdempotencyRegistry.execute. `operation` returns
+    {'status': int, 'body': json}; returns (status, body, replayed). 5xx
+    results are only kept for the failure TTL, a reused key with a different
+    payload is a 422 and giving up on an in-flight original is a 409.
+    """
+    registry = registry or get_idempotency_registry()
+    try:
+        outcome, replayed = await registry.execute(
+            scope, scoped_key(caller, key), operation,
+            fingerprint=request_fingerprint(payload),
+            is_failure=lambda result: result['status'] >= 500
+        )
+    except IdempotencyConflict as e:
+        return 422, {'success': False, 'error': str(e)}, False
+    except IdempotencyTimeout as e:
+        return 409, {'success': False, 'error': str(e)}, False
+    return outcome['status'], outcome['body'], replayed
+
+async def run_idempotent_event(scope: str, caller: str, key: Optional[str], payload: bytes,
+                               operation: Callable[[], Awaitable[Any]],
+                               registry: IdempotencyRegistry = None) -> Tuple[Any, bool]:
+    """Socket flavour: runs `operation` directly when the event carries no key; returns (result, replayed)"""
+    if not key:
+        return await operation(), False
+    return await (registry or get_idempotency_registry()).execute(
+        scope, scoped_key(caller, key), operation, fingerprint=request_fingerprint(payload)
+    )
+
+def idempotent(scope: str):
+    """
+    Flask view decorator: honours the Idempotency-Key header.
+    The first request's status and JSON body are replayed for duplicates
+    from the same caller (the body's user_id, else the client address).
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(*args, **kwargs):
+            from flask import current_app, jsonify, request
+
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not key:
+                return await view(*args, **kwargs)
+
+            async def operation():
+                response = current_app.make_response(await view(*args, **kwargs))
+                return {'status': response.status_code, 'body': response.get_json(silent=True)}
+
+            caller = (request.get_json(silent=True) or {}).get('user_id') or request.remote_addr
+            status, body, replayed = await run_idempotent_request(
+                scope, caller, key, request.get_data(), operation
+            )
+
+            response = jsonify(body)
+            response.status_code = status
+            response.headers['Idempotent-Replayed'] = 'true' if replayed else 'false'
+            return response
+        return wrapper
+    return decorator
+
+# Process-wide registry
+_registry: Optional[IdempotencyRegistry] = None
+
+def get_idempotency_registry() -> IdempotencyRegistry:
+    """Get the global idempotency registry (TTL from IDEMPOTENCY_TTL_SECONDS)"""
+    global _registry
+
+    if _registry is None:
+        _registry = IdempotencyRegistry(ttl=float(os.getenv('IDEMPOTENCY_TTL_SECONDS', str(24 * 3600))))
+    return _registry
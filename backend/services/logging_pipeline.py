@@ -0,0 +1,232 @@
+# backend/services/logging_pipeline.py
+"""
+🐻 Mama Bear Logging Pipeline
+Queue-based, structured JSON-lines logging with request IDs and debug sampling
+
+The root logger runs at LOG_LEVEL (INFO by default), so DEBUG records are
+discarded before they reach the sampling filter; LOG_DEBUG_SAMPLE_RATE only
+matters with LOG_LEVEL=DEBUG. Records logged with extra={'sampled': True}
+are sampled at any level.
+"""
+
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import uuid
+from datetime import datetime
+from typing import Optional
+
+# Request ID for the request/event currently being handled
+request_id_var: contextvars.ContextVar = contextvars.ContextVar('request_id', default=None)
+
+# Attributes every LogRecord has; anything else was passed via `extra=`
+_RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+# Formats tracebacks on the logging thread, before records are queued
+_EXC_FORMATTER = logging.Formatter()
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+def set_request_id(request_id: Optional[str] = None) -> str:
+    """Bind a request ID to the current context and return it"""
+    request_id = request_id or new_request_id()
+    request_id_var.set(request_id)
+    return request_id
+
+def get_request_id() -> Optional[str]:
+    return request_id_var.get()
+
+class RequestIdFilter(logging.Filter):
+    """Stamps records with the current request ID before they leave the calling thread"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, 'request_id'):
+            record.request_id = request_id_var.get()
+        return True
+
+class DebugSamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of noisy events.
+    Applies to DEBUG records and to any record logged with extra={'sampled': True}.
+    """
+
+    def __init__(self, sample_rate: float = 0.1):
+        super().__init__()
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG and not getattr(record, 'sampled', False):
+            return True
+        if self.sample_rate >= 1.0 or random.random() < self.sample_rate:
+            return True
+        self.dropped += 1
+        return False
+
+class JsonLineFormatter(logging.Formatter):
+    """Formats each record as a single JSON object"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+            'thread': record.threadName,
+        }
+
+        # Structured fields passed through `extra=`
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and key not in entry and key != 'sampled':
+                entry[key] = value
+
+        # Queued records carry the traceback pre-formatted in exc_text (see _DroppingQueueHandler.prepare)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        elif record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class LoggingPipeline:
+    """Owns the queue, the background listener thread and the real handlers"""
+
+    def __init__(self, log_file: str, level: int = logging.INFO, max_bytes: int = 10 * 1024 * 1024,
+                 backup_count: int = 5, debug_sample_rate: float = 0.1, queue_size: int = 10000,
+                 console: bool = True):
+        self.log_file = log_file
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.sampling_filter = DebugSamplingFilter(debug_sample_rate)
+
+        # The only handler on the root logger: a non-blocking enqueue
+        self.queue_handler = _DroppingQueueHandler(self.queue)
+        self.queue_handler.addFilter(RequestIdFilter())
+        self.queue_handler.addFilter(self.sampling_filter)
+
+        # Real handlers run on the listener thread
+        handlers = []
+        log_dir = os.path.dirname(log_file)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+        )
+        file_handler.setFormatter(JsonLineFormatter())
+        handlers.append(file_handler)
+
+        if console:
+            stream_handler = logging.StreamHandler()
+            stream_handler.setFormatter(logging.Formatter(
+                '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
+            ))
+            handlers.append(stream_handler)
+
+        self.handlers = handlers
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.level = level
+
+    def start(self):
+        root = logging.getLogger()
+        root.setLevel(self.level)
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self.queue_handler)
+        self.listener.start()
+
+    def stop(self):
+        """Drain the queue and close the real handlers"""
+        root = logging.getLogger()
+        root.removeHandler(self.queue_handler)
+        try:
+            self.listener.stop()
+        except AttributeError:
+            pass  # Already stopped
+        for handler in self.handlers:
+            handler.close()
+
+    def get_status(self):
+        return {
+            'log_file': self.log_file,
+            'queue_depth': self.queue.qsize(),
+            'queue_capacity': self.queue.maxsize,
+            'dropped_full_queue': self.queue_handler.dropped,
+            'dropped_sampled': self.sampling_filter.dropped,
+            'debug_sample_rate': self.sampling_filter.sample_rate
+        }
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks the caller; drops records when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        """
+        Like QueueHandler.prepare, but the traceback stays out of `msg`: it is
+        formatted into exc_text, which the JSON formatter emits as `exc` and
+        the console formatter still appends. exc_info itself (live frames)
+        is dropped before the record crosses threads.
+        """
+        record = copy.copy(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _EXC_FORMATTER.formatException(record.exc_info)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+# Process-wide pipeline
+_pipeline: Optional[LoggingPipeline] = None
+
+def configure_logging(log_file: str = None, level: int = None, debug_sample_rate: float = None) -> LoggingPipeline:
+    """
+    Route all logging through a background queue listener.
+    Safe to call more than once; only the first call installs the pipeline.
+    """
+    global _pipeline
+
+    if _pipeline is not None:
+        return _pipeline
+
+    if level is None:
+        level = getattr(logging, os.getenv('LOG_LEVEL', 'INFO').upper(), logging.INFO)
+    if debug_sample_rate is None:
+        debug_sample_rate = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', '0.1'))
+
+    _pipeline = LoggingPipeline(
+        log_file=log_file or os.getenv('LOG_FILE', 'podplay_sanctuary.log'),
+        level=level,
+        max_bytes=int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024))),
+        backup_count=int(os.getenv('LOG_BACKUP_COUNT', '5')),
+        debug_sample_rate=debug_sample_rate
+    )
+    _pipeline.start()
+    atexit.register(shutdown_logging)
+    return _pipeline
+
+def get_logging_pipeline() -> Optional[LoggingPipeline]:
+    return _pipeline
+
+def shutdown_logging():
+    """Flush pending records; called on shutdown and at interpreter exit"""
+    global _pipeline
+
+    if _pipeline is not None:
+        _pipeline.stop()
+        _pipeline = None
@@ -13,6 +13,7 @@ import os
 from .mama_bear_model_manager import MamaBearModelManager
 from .mama_bear_variants import *
 from .memory_manager import MemoryManager
+from .conversation_compaction import model_summarizer
 from .scrapybara_manager import ScrapybaraManager
 
 logger = logging.getLogger(__name__)
@@ -25,6 +26,9 @@ class MamaBearAgent:
         self.memory = memory_manager
         self.model_manager = MamaBearModelManager()
         
+        # Older turns are summarized by the cheapest model
+        self.memory.compactor.summarizer = model_summarizer(self.model_manager)
+        
         # Initialize specialized variants
         self.variants = {
             'main_chat': ResearchSpecialist(),
@@ -146,8 +150,10 @@ class MamaBearAgent:
         
         # Add context if available
         context_str = ""
+        if context and context.get('conversation_summary'):
+            context_str += f"\n\nSummary of earlier conversation:\n{context['conversation_summary']}"
         if context and context.get('recent_interactions'):
-            context_str = f"\n\nRecent conversation context:\n{context['recent_interactions']}"
+            context_str += f"\n\nRecent conversation context:\n{context['recent_interactions']}"
         
         # Add attachment context
         attachment_str = ""
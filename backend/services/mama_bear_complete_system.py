@@ -5,6 +5,7 @@ Brings together all components for a fully intelligent agent orchestration syste
 """
 
 import asyncio
+import importlib.util
 import os
 import logging
 from datetime import datetime
@@ -20,27 +21,27 @@ from .mama_bear_workflow_logic import initialize_workflow_intelligence
 from .mama_bear_memory_system import initialize_enhanced_memory
 from .mama_bear_specialized_variants import *
 from .mama_bear_monitoring import MamaBearMonitoring
+from .startup import lazy_import, get_startup_profiler
+from .state_store import get_state_store, encode_state
+from .idempotency import IDEMPOTENCY_FIELD, run_idempotent_event
 
-# Import external dependencies
-import scrapybara
-try:
-    from mem0 import MemoryClient
-    MEM0_AVAILABLE = True
-except ImportError:
-    MEM0_AVAILABLE = False
-    MemoryClient = None
+# External dependencies are imported on first use
+scrapybara = lazy_import('scrapybara')
+MEM0_AVAILABLE = importlib.util.find_spec('mem0') is not None
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('mama_bear_system.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
+# Specialized agents started by the complete system
+SPECIALIZED_AGENTS = {
+    'research_specialist': ResearchSpecialistAgent,
+    'devops_specialist': DevOpsSpecialistAgent,
+    'scout_commander': ScoutCommanderAgent,
+    'model_coordinator': ModelCoordinatorAgent,
+    'tool_curator': ToolCuratorAgent,
+    'integration_architect': IntegrationArchitectAgent,
+    'live_api_specialist': LiveAPISpecialistAgent
+}
+
 class CompleteMamaBearSystem:
     """
     🐻 Complete Mama Bear System
@@ -62,56 +63,61 @@ class CompleteMamaBearSystem:
         # Specialized agents
         self.agents = {}
         
-        # System state
-        self.active_sessions = {}
+        # System state, shared across workers
+        self.active_sessions = get_state_store().namespace('socket_sessions')
         self.real_time_updates = True
         
     async def initialize(self):
         """Initialize all Mama Bear components"""
         try:
             logger.info("🐻 Initializing Complete Mama Bear System...")
+            profiler = get_startup_profiler()
             
             # Initialize Model Manager with intelligent failover
-            self.model_manager = MamaBearModelManager()
-            await self.model_manager.initialize()
+            with profiler.component('model_manager'):
+                self.model_manager = MamaBearModelManager()
+                await self.model_manager.initialize()
             
             # Initialize Memory System
-            if MEM0_AVAILABLE:
-                self.memory_manager = await initialize_enhanced_memory()
-            else:
-                logger.warning("Mem0 not available, using fallback memory")
-                self.memory_manager = FallbackMemoryManager()
+            with profiler.component('memory_manager'):
+                if MEM0_AVAILABLE:
+                    self.memory_manager = await initialize_enhanced_memory()
+                else:
+                    logger.warning("Mem0 not available, using fallback memory")
+                    self.memory_manager = FallbackMemoryManager()
             
             # Initialize Scrapybara client
-            try:
-                self.scrapybara_client = scrapybara.Scrapybara(
-                    api_key=os.getenv('SCRAPYBARA_API_KEY')
-                )
-            except Exception as e:
-                logger.warning(f"Scrapybara initialization failed: {e}")
-                self.scrapybara_client = None
+            with profiler.component('scrapybara_client'):
+                try:
+                    self.scrapybara_client = scrapybara.Scrapybara(
+                        api_key=os.getenv('SCRAPYBARA_API_KEY')
+                    )
+                except Exception as e:
+                    logger.warning(f"Scrapybara initialization failed: {e}")
+                    self.scrapybara_client = None
             
             # Initialize Agent Orchestrator
-            self.orchestrator = AgentOrchestrator(
-                memory_manager=self.memory_manager,
-                model_manager=self.model_manager,
-                scrapybara_client=self.scrapybara_client
-            )
+            with profiler.component('orchestrator'):
+                self.orchestrator = AgentOrchestrator(
+                    memory_manager=self.memory_manager,
+                    model_manager=self.model_manager,
+                    scrapybara_client=self.scrapybara_client
+                )
             
             # Initialize specialized agents
-            await self._initialize_specialized_agents()
+            with profiler.component('specialized_agents'):
+                await self._initialize_specialized_agents()
             
             # Initialize monitoring
-            self.monitoring = MamaBearMonitoring(
-                model_manager=self.model_manager,
-                orchestrator=self.orchestrator
-            )
+            with profiler.component('monitoring'):
+                self.monitoring = MamaBearMonitoring(
+                    model_manager=self.model_manager,
+                    orchestrator=self.orchestrator
+                )
             
             # Initialize workflow intelligence
-            await initialize_workflow_intelligence(self.orchestrator)
-            
-            # Set up real-time updates
-            self._setup_real_time_updates()
+            with profiler.component('workflow_intelligence'):
+                await initialize_workflow_intelligence(self.orchestrator)
             
             self.is_initialized = True
             logger.info("✅ Complete Mama Bear System initialized successfully!")
@@ -122,100 +128,51 @@ class CompleteMamaBearSystem:
     
     async def _initialize_specialized_agents(self):
         """Initialize all specialized Mama Bear variants"""
-        agent_configs = {
-            'research_specialist': ResearchSpecialistAgent,
-            'devops_specialist': DevOpsSpecialistAgent,
-            'scout_commander': ScoutCommanderAgent,
-            'model_coordinator': ModelCoordinatorAgent,
-            'tool_curator': ToolCuratorAgent,
-            'integration_architect': IntegrationArchitectAgent,
-            'live_api_specialist': LiveAPISpecialistAgent
-        }
+        profiler = get_startup_profiler()
         
-        for agent_name, agent_class in agent_configs.items():
+        for agent_name, agent_class in SPECIALIZED_AGENTS.items():
             try:
-                agent = agent_class(
-                    model_manager=self.model_manager,
-                    memory_manager=self.memory_manager,
-                    orchestrator=self.orchestrator
-                )
-                await agent.initialize()
+                with profiler.component(f"agent.{agent_name}"):
+                    agent = agent_class(
+                        model_manager=self.model_manager,
+                        memory_manager=self.memory_manager,
+                        orchestrator=self.orchestrator
+                    )
+                    await agent.initialize()
                 self.agents[agent_name] = agent
                 logger.info(f"✅ Initialized {agent_name}")
             except Exception as e:
                 logger.error(f"❌ Failed to initialize {agent_name}: {e}")
     
-    def _setup_real_time_updates(self):
-        """Set up real-time updates via SocketIO"""
-        
-        @self.socketio.on('mama_bear_message')
-        async def handle_message(data):
-            """Handle incoming messages from clients"""
-            try:
-                user_id = data.get('user_id')
-                message = data.get('message')
-                page_context = data.get('page_context', 'main_chat')
-                attachments = data.get('attachments', [])
-                
-                # Route to appropriate agent
-                agent = self._get_agent_for_context(page_context)
-                
-                # Process message with full context
-                response = await agent.process_message(
-                    message=message,
-                    user_id=user_id,
-                    context={'page': page_context, 'attachments': attachments}
-                )
-                
-                # Send response back
-                emit('mama_bear_response', {
-                    'response': response,
-                    'agent': agent.name,
-                    'timestamp': datetime.now().isoformat(),
-                    'page_context': page_context
-                })
-                
-                # Update monitoring
-                await self.monitoring.log_interaction(
-                    user_id=user_id,
-                    agent=agent.name,
-                    message=message,
-                    response=response
-                )
-                
-            except Exception as e:
-                logger.error(f"Error handling message: {e}")
-                emit('mama_bear_error', {'error': str(e)})
-        
-        @self.socketio.on('get_system_status')
-        async def handle_status_request():
-            """Handle system status requests"""
-            status = await self.get_system_status()
-            emit('system_status', status)
-        
-        @self.socketio.on('create_agent_plan')
-        async def handle_plan_creation(data):
-            """Handle agent plan creation"""
-            try:
-                plan_data = data.get('plan_data')
-                user_id = data.get('user_id')
-                
-                # Create plan through orchestrator
-                plan = await self.orchestrator.create_plan(
+    async def handle_plan_creation(self, data: Dict[str, Any]):
+        """Handle the create_agent_plan socket event (registered once, in app.py)"""
+        try:
+            plan_data = data.get('plan_data')
+            user_id = data.get('user_id')
+            
+            async def create():
+                return await self.orchestrator.create_plan(
                     title=plan_data.get('title'),
                     description=plan_data.get('description'),
                     user_id=user_id,
                     context=plan_data.get('context', {})
                 )
-                
-                emit('agent_plan_created', {
-                    'plan': plan,
-                    'success': True
-                })
-                
-            except Exception as e:
-                logger.error(f"Error creating plan: {e}")
-                emit('agent_plan_error', {'error': str(e)})
+            
+            # Retries carrying the same idempotency key attach to the original plan
+            plan, replayed = await run_idempotent_event(
+                'socket_create_agent_plan', user_id or request.sid, data.get(IDEMPOTENCY_FIELD),
+                encode_state(plan_data).encode(), create
+            )
+            
+            emit('agent_plan_created', {
+                'plan': plan,
+                'success': True,
+                'replayed': replayed
+            })
+            
+        except Exception as e:
+            logger.error(f"Error creating plan: {e}")
+            emit('agent_plan_error', {'error': str(e)})
     
     def _get_agent_for_context(self, page_context: str):
         """Get appropriate agent for page context"""
@@ -310,6 +267,10 @@ class CompleteMamaBearSystem:
         if self.monitoring:
             await self.monitoring.shutdown()
         
+        # Flush memory storage
+        if hasattr(self.memory_manager, 'shutdown'):
+            await self.memory_manager.shutdown()
+        
         logger.info("✅ Complete Mama Bear System shutdown complete")
 
 
@@ -8,16 +8,44 @@ import asyncio
 import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from enum import Enum
 import logging
 from collections import defaultdict, deque
 import hashlib
-import pickle
 import os
+import threading
+import time
+
+from .memory_segment_store import SegmentLogStore
+from .memory_embeddings import MemoryEmbeddingService, NUMPY_AVAILABLE
+from .memory_cache import MemoryRecordCache
+from . import memory_codec
+from .memory_codec import RecordSchema, register_schema
+from .memory_search import BM25Index
+from .memory_timeline import MemoryTimeline
+from .memory_columns import MemoryColumns
+from .profile_store import ProfileStore
+from .memory_ingestion import InteractionIngestionQueue
+from .memory_patterns import PatternAggregator
+from .memory_retention import RetentionPolicy, RetentionScheduler
+from .mem0_outbox import Mem0ClientTransport, Mem0HttpTransport, Mem0Outbox, interaction_payload
 
 logger = logging.getLogger(__name__)
 
+# Time allowed to each get_relevant_context source before it is left out of the reply
+DEFAULT_CONTEXT_SOURCE_BUDGETS_MS = {'default': 100, 'recent': 50, 'agent': 50, 'keyword': 100, 'semantic': 250}
+
+def context_source_budgets(raw: Optional[str]) -> Dict[str, float]:
+    """Default budgets overridden by a JSON object of {source: milliseconds}"""
+    budgets = dict(DEFAULT_CONTEXT_SOURCE_BUDGETS_MS)
+    if raw:
+        try:
+            budgets.update({name: float(ms) for name, ms in json.loads(raw).items()})
+        except (ValueError, AttributeError, TypeError) as e:
+            logger.error(f"Invalid context source budgets, using defaults: {e}")
+    return budgets
+
 class MemoryType(Enum):
     CONVERSATION = "conversation"
     AGENT_CONTEXT = "agent_context"
@@ -92,53 +120,136 @@ class UserProfile:
         if self.last_updated is None:
             self.last_updated = datetime.now()
 
+# Binary record layouts (see memory_codec). Field ids are permanent: append new ones, never reuse.
+MEMORY_RECORD_SCHEMA = register_schema(RecordSchema(1, MemoryRecord, {
+    1: 'id', 2: 'type', 3: 'content', 4: 'user_id', 5: 'agent_id', 6: 'importance', 7: 'tags',
+    8: 'created_at', 9: 'accessed_at', 10: 'access_count', 11: 'related_memories', 12: 'embedding'
+}, enums={'type': MemoryType, 'importance': MemoryImportance}))
+
+USER_PROFILE_SCHEMA = register_schema(RecordSchema(2, UserProfile, {
+    1: 'user_id', 2: 'expertise_level', 3: 'preferred_agents', 4: 'communication_style', 5: 'project_history',
+    6: 'success_patterns', 7: 'learning_preferences', 8: 'context_retention_days', 9: 'last_updated'
+}))
+
 class EnhancedMemoryManager:
-    """Advanced memory management with learning and context awareness"""
+    """
+    Advanced memory management with learning and context awareness.
+    
+    The indices are shared by request threads and the ingestion worker's own
+    event loop. Every index structure locks internally, and _index_lock makes
+    adding or removing one memory across all of them a single step.
+    """
     
     def __init__(self, mem0_client=None, local_storage_path="./mama_bear_memory"):
         self.mem0_client = mem0_client
         self.local_storage_path = local_storage_path
         
-        # In-memory caches for performance
-        self.memory_cache = {}
-        self.user_profiles = {}
+        # In-memory caches for performance (memory records are bounded; the store has the rest)
+        self.memory_cache = MemoryRecordCache(
+            max_entries=int(os.getenv('MEMORY_CACHE_MAX_ENTRIES', '10000')),
+            max_bytes=int(os.getenv('MEMORY_CACHE_MAX_MB', '64')) * 1024 * 1024
+        )
         self.agent_contexts = {}
         self.conversation_summaries = {}
         
         # Memory organization
-        self.memory_index = defaultdict(list)  # Tags to memory IDs
-        self.user_memory_index = defaultdict(list)  # User ID to memory IDs
-        self.temporal_index = defaultdict(list)  # Date to memory IDs
+        self._index_lock = threading.RLock()
+        # Columnar memory metadata (user/agent/type/importance/timestamps) for vectorized filtering
+        self.timeline = MemoryColumns() if NUMPY_AVAILABLE else MemoryTimeline()
+        self.search_index = BM25Index()  # Per-user BM25 postings over memory text
+        
+        # Per-source time budgets for get_relevant_context (JSON overrides, e.g. {"semantic": 500})
+        self.context_source_budgets_ms = context_source_budgets(os.getenv('CONTEXT_SOURCE_BUDGETS_MS'))
         
-        # Learning patterns
-        self.pattern_frequency = defaultdict(int)
-        self.success_correlation = defaultdict(float)
+        # Expiry heap driven by per-type, importance-dependent TTLs
+        self.retention = RetentionScheduler(RetentionPolicy.from_json(os.getenv('MEMORY_RETENTION_POLICY')))
+        self.retention_interval = float(os.getenv('MEMORY_RETENTION_INTERVAL', '600'))
+        
+        # Learning patterns, aggregated as interactions are ingested
+        self.patterns = PatternAggregator(half_life_days=float(os.getenv('PATTERN_HALF_LIFE_DAYS', '14')))
+        # JSON; an aggregates.pkl from older versions is ignored and rebuilt from the stored memories
+        self.patterns_path = f"{self.local_storage_path}/patterns/aggregates.json"
+        self._patterns_loaded = False
+        self.pattern_compaction_interval = float(os.getenv('PATTERN_COMPACTION_INTERVAL', '1800'))
+        
+        # Periodic maintenance runs on daemon threads: the startup event loop does not outlive startup
+        self._maintenance_stop = threading.Event()
+        self._maintenance_threads: List[threading.Thread] = []
         
         # Initialize storage
         self._ensure_storage_directory()
+        
+        # Records are stored in the binary codec; pickles from older versions are read until converted
+        self.allow_legacy_pickle = os.getenv('MEMORY_ALLOW_LEGACY_PICKLE', 'true').lower() == 'true'
+        
+        # Memory records live in an append-only segment log
+        self.segment_store = SegmentLogStore(f"{self.local_storage_path}/segments")
+        
+        # User profiles are loaded on first access and written back in batches
+        self.profile_store = ProfileStore(
+            f"{self.local_storage_path}/profiles",
+            factory=lambda user_id: UserProfile(user_id=user_id),
+            flush_interval=float(os.getenv('PROFILE_FLUSH_INTERVAL', '5')),
+            dumps=USER_PROFILE_SCHEMA.encode,
+            loads=self._decode_record,
+            suffix='.rec',
+            legacy_suffix='.pkl',
+            max_profiles=int(os.getenv('PROFILE_CACHE_MAX_ENTRIES', '10000'))
+        )
+        
+        # Local semantic recall (disabled without NumPy)
+        self.embeddings = MemoryEmbeddingService() if NUMPY_AVAILABLE else None
+        
+        # Mem0 uploads go through a durable local outbox (enabled by a client or MEM0_API_KEY)
+        self.mem0_outbox = self._create_mem0_outbox()
+        
+        # Interactions are journaled on the request path and enriched/persisted in the background
+        self.ingestion = InteractionIngestionQueue(
+            self._ingest_interactions,
+            f"{self.local_storage_path}/ingestion.journal",
+            max_queue=int(os.getenv('MEMORY_INGEST_MAX_QUEUE', '1000')),
+            batch_size=int(os.getenv('MEMORY_INGEST_BATCH_SIZE', '32')),
+            # Off by default: the journal then survives a process crash but not a power loss
+            fsync=os.getenv('MEMORY_INGEST_FSYNC', 'false').lower() == 'true'
+        )
     
     async def async_init(self):
         await self._load_persistent_data()
         
+        # Rebuilt before startup returns: the startup event loop is closed once it does, and
+        # the ingestion worker (which replays the journal) must find the indices in place
+        await self._rebuild_indices()
+        
         # Background tasks
-        asyncio.create_task(self._memory_consolidation_loop())
-        asyncio.create_task(self._pattern_analysis_loop())
+        self.profile_store.start()
+        self.ingestion.start()
+        self._start_maintenance(self._memory_consolidation_loop, 'memory-retention')
+        self._start_maintenance(self._pattern_compaction_loop, 'memory-pattern-compaction')
     
     def _ensure_storage_directory(self):
         """Ensure local storage directory exists"""
         os.makedirs(self.local_storage_path, exist_ok=True)
-        os.makedirs(f"{self.local_storage_path}/memories", exist_ok=True)
         os.makedirs(f"{self.local_storage_path}/profiles", exist_ok=True)
         os.makedirs(f"{self.local_storage_path}/patterns", exist_ok=True)
     
     async def save_interaction(self, user_id: str, message: str, response: str, metadata: Dict[str, Any] = None):
-        """Save a complete interaction with rich context"""
+        """Journal an interaction for background enrichment and persistence"""
         
-        if metadata is None:
-            metadata = {}
-        
-        # Create memory record
         memory_id = self._generate_memory_id(user_id, 'interaction')
+        await self.ingestion.submit({
+            'memory_id': memory_id,
+            'user_id': user_id,
+            'message': message,
+            'response': response,
+            'metadata': metadata or {},
+            'created_at': datetime.now().isoformat()
+        })
+        return memory_id
+    
+    async def _build_interaction_record(self, item: Dict[str, Any]) -> MemoryRecord:
+        """Enrich a journaled interaction into a memory record"""
+        
+        message, response, metadata = item['message'], item['response'], item['metadata']
         
         interaction_data = {
             'user_message': message,
@@ -155,62 +266,183 @@ class EnhancedMemoryManager:
             'satisfaction_score': metadata.get('satisfaction_score'),
         }
         
-        memory_record = MemoryRecord(
-            id=memory_id,
+        return MemoryRecord(
+            id=item['memory_id'],
             type=MemoryType.CONVERSATION,
             content=interaction_data,
-            user_id=user_id,
+            user_id=item['user_id'],
             agent_id=metadata.get('agent_id'),
             importance=self._determine_importance(interaction_data),
-            tags=await self._generate_tags(interaction_data)
+            tags=await self._generate_tags(interaction_data),
+            created_at=datetime.fromisoformat(item['created_at'])
         )
+    
+    async def _ingest_interactions(self, items: List[Dict[str, Any]]):
+        """Ingestion worker: enrich and persist a batch of interactions"""
         
-        # Save to memory
-        await self._store_memory(memory_record)
-        
-        # Update user profile
-        await self._update_user_profile(user_id, interaction_data)
-        
-        # Save to Mem0 if available
-        if self.mem0_client:
+        records = []
+        for item in items:
             try:
-                await self._save_to_mem0(memory_record)
+                records.append(await self._build_interaction_record(item))
             except Exception as e:
-                logger.warning(f"Mem0 save failed: {e}")
+                logger.error(f"Failed to enrich interaction {item.get('memory_id')}: {e}")
         
-        # Update indices
-        self._update_indices(memory_record)
+        # Concurrent puts share the segment store's group commit
+        await asyncio.gather(*(self._store_memory(record) for record in records))
+        
+        for record in records:
+            # Update user profile and pattern aggregates
+            await self._update_user_profile(record.user_id, record.content)
+            self.patterns.record(record.user_id, record.content, record.created_at.timestamp())
+            
+            # Queue for Mem0 if available
+            if self.mem0_outbox:
+                try:
+                    await self._save_to_mem0(record)
+                except Exception as e:
+                    logger.warning(f"Mem0 save failed: {e}")
+            
+            # Update indices
+            self._update_indices(record)
         
-        logger.debug(f"Saved interaction memory {memory_id} for user {user_id}")
+        logger.debug(f"Ingested {len(records)} interaction memories")
     
     async def get_relevant_context(self, user_id: str, query: str, agent_id: str = None, limit: int = 5) -> List[Dict[str, Any]]:
         """Get relevant context for a query using semantic similarity and recency"""
+        results, _ = await self.get_relevant_context_with_debug(user_id, query, agent_id=agent_id, limit=limit)
+        return results
+    
+    async def get_relevant_context_with_debug(self, user_id: str, query: str, agent_id: str = None,
+                                              limit: int = 5) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Relevant context plus per-source debug metadata. Sources run concurrently,
+        each within its own time budget; a source that overruns or fails is left
+        out of this reply instead of delaying it.
+        
+        Budgets bound latency, not CPU: a blocking source that overruns keeps
+        running in its worker thread until it finishes, and its result is dropped.
+        """
+        
+        start = time.perf_counter()
+        conversation = MemoryType.CONVERSATION.value
+        
+        # Each source yields (memory_id, score) pairs; the first element names the ranking signal it feeds
+        sources = {
+            'recent': (None, lambda: [(memory_id, None) for memory_id in self.timeline.recent(
+                user_id, since=datetime.now() - timedelta(hours=24), limit=20, memory_type=conversation)]),
+            'keyword': ('bm25', lambda: self.search_index.search(user_id, query, k=10))
+        }
+        if self.embeddings:
+            sources['semantic'] = ('similarity', self._semantic_candidates(user_id, query))
+        if agent_id:
+            sources['agent'] = (None, lambda: [(memory_id, None) for memory_id in self.timeline.recent(
+                user_id, limit=10, agent_id=agent_id, memory_type=conversation)])
+        
+        outcomes = dict(zip(sources, await asyncio.gather(
+            *[self._run_context_source(name, source) for name, (_, source) in sources.items()]
+        )))
+        
+        # Merge by ID: one candidate per memory, carrying every source's score
+        candidates: Dict[str, Dict[str, float]] = {}
+        found_by: Dict[str, List[str]] = defaultdict(list)
+        for name, outcome in outcomes.items():
+            signal = sources[name][0]
+            for memory_id, score in outcome['matches']:
+                signals = candidates.setdefault(memory_id, {})
+                if signal:
+                    signals[signal] = score
+                found_by[memory_id].append(name)
+        
+        ranked_ids = self._rank_candidates(user_id, query, candidates)
+        
+        # Per-request record cache: each record is loaded (and its access counted) once
+        request_cache: Dict[str, Optional[MemoryRecord]] = {}
+        results = []
+        for memory_id in ranked_ids:
+            if memory_id not in request_cache:
+                request_cache[memory_id] = await self._load_memory(memory_id)
+            memory = request_cache[memory_id]
+            if memory:
+                memory_dict = self._memory_to_dict(memory)
+                memory_dict.update(candidates[memory_id])
+                results.append(memory_dict)
+                if len(results) >= limit:
+                    break
         
-        # Get query embedding (placeholder - would use actual embedding model)
-        query_embedding = await self._get_embedding(query)
-        
-        # Get candidate memories
-        candidates = []
-        
-        # Recent conversations
-        recent_memories = await self._get_recent_memories(user_id, hours=24, limit=20)
-        candidates.extend(recent_memories)
-        
-        # Similar interactions
-        if query_embedding:
-            similar_memories = await self._find_similar_memories(user_id, query_embedding, limit=10)
-            candidates.extend(similar_memories)
+        contributed = defaultdict(int)
+        for memory in results:
+            for name in found_by[memory['id']]:
+                contributed[name] += 1
+        
+        debug = {
+            'total_ms': round((time.perf_counter() - start) * 1000, 2),
+            'candidates': len(candidates),
+            'records_loaded': len(request_cache),
+            'sources': {
+                name: {
+                    'status': outcome['status'],
+                    'latency_ms': outcome['latency_ms'],
+                    'budget_ms': outcome['budget_ms'],
+                    'candidates': len(outcome['matches']),
+                    'contributed': contributed[name]
+                }
+                for name, outcome in outcomes.items()
+            }
+        }
+        return results, debug
+    
+    async def _semantic_candidates(self, user_id: str, query: str) -> List[Tuple[str, float]]:
+        vector = await self.embeddings.embed(query, update_stats=False)
+        return await asyncio.to_thread(self.embeddings.search, user_id, vector, 10)
+    
+    async def _run_context_source(self, name: str, source) -> Dict[str, Any]:
+        """
+        Run one retrieval source (a coroutine or a blocking callable) within its time budget.
+        On timeout only the wait is cancelled: threads cannot be interrupted, so a
+        blocking source still runs to completion and holds its worker thread (and
+        any index lock it took) until then.
+        """
+        
+        budget_ms = self.context_source_budgets_ms.get(name, self.context_source_budgets_ms['default'])
+        start = time.perf_counter()
+        status, matches = 'ok', []
+        try:
+            work = source if asyncio.iscoroutine(source) else asyncio.to_thread(source)
+            matches = await asyncio.wait_for(work, timeout=budget_ms / 1000)
+        except asyncio.TimeoutError:
+            status = 'timeout'
+            logger.warning(f"Context source '{name}' exceeded its {budget_ms}ms budget")
+        except Exception as e:
+            status = 'error'
+            logger.error(f"Context source '{name}' failed: {e}")
         
-        # Agent-specific context
-        if agent_id:
-            agent_memories = await self._get_agent_specific_memories(user_id, agent_id, limit=10)
-            candidates.extend(agent_memories)
+        return {
+            'status': status,
+            'matches': matches,
+            'latency_ms': round((time.perf_counter() - start) * 1000, 2),
+            'budget_ms': budget_ms
+        }
+    
+    async def query_memories(self, user_id: str, agent_id: str = None, days: int = None,
+                             min_importance: MemoryImportance = None, memory_type: MemoryType = None,
+                             limit: int = 20) -> List[Dict[str, Any]]:
+        """Newest memories matching metadata filters, e.g. agent X in the last 7 days with importance >= HIGH"""
         
-        # Remove duplicates and rank
-        unique_candidates = {m['id']: m for m in candidates}.values()
-        ranked_memories = await self._rank_memories_by_relevance(query, list(unique_candidates))
+        memory_ids = self.timeline.recent(
+            user_id,
+            since=datetime.now() - timedelta(days=days) if days else None,
+            limit=limit,
+            agent_id=agent_id,
+            memory_type=memory_type.value if memory_type else None,
+            min_importance=min_importance.value if min_importance else None
+        )
         
-        return ranked_memories[:limit]
+        results = []
+        for memory_id in memory_ids:
+            memory = await self._load_memory(memory_id)
+            if memory:
+                results.append(self._memory_to_dict(memory))
+        return results
     
     async def save_agent_context(self, agent_id: str, user_id: str, context_data: Dict[str, Any]):
         """Save agent-specific context"""
@@ -228,34 +460,30 @@ class EnhancedMemoryManager:
         )
         
         await self._store_memory(memory_record)
+        self._update_indices(memory_record)
         
         # Update agent context cache
-        if agent_id not in self.agent_contexts:
-            self.agent_contexts[agent_id] = {}
-        
-        self.agent_contexts[agent_id][user_id] = context_data
+        with self._index_lock:
+            self.agent_contexts.setdefault(agent_id, {})[user_id] = context_data
     
     async def get_user_patterns(self, user_id: str) -> Dict[str, Any]:
-        """Get learned patterns for a user"""
-        
-        if user_id in self.user_profiles:
-            profile = self.user_profiles[user_id]
-        else:
-            profile = await self._load_user_profile(user_id)
+        """Get learned patterns for a user from the streaming aggregates"""
         
-        # Analyze recent patterns
-        recent_interactions = await self._get_recent_memories(user_id, days=7)
-        patterns = await self._analyze_interaction_patterns(recent_interactions)
+        profile = await self._load_user_profile(user_id)
+        aggregates = self.patterns.get(user_id) or {}
         
         return {
             'expertise_level': profile.expertise_level,
             'preferred_agents': profile.preferred_agents,
             'communication_style': profile.communication_style,
-            'success_patterns': profile.success_patterns,
-            'recent_patterns': patterns,
-            'common_topics': await self._get_common_topics(user_id),
-            'collaboration_preferences': await self._get_collaboration_preferences(user_id),
-            'learning_progression': await self._track_learning_progression(user_id)
+            'success_patterns': self.patterns.agent_success_rates(user_id) or profile.success_patterns,
+            'recent_patterns': aggregates,
+            'common_topics': list(aggregates.get('topic_weights', {})),
+            'collaboration_preferences': {
+                'collaborations': aggregates.get('collaborations', 0),
+                'agent_preferences': aggregates.get('agent_preferences', {})
+            },
+            'learning_progression': aggregates.get('complexity', {})
         }
     
     async def get_status(self):
@@ -263,10 +491,20 @@ class EnhancedMemoryManager:
         return {
             'status': 'active',
             'type': 'enhanced',
-            'memory_count': len(self.memory_cache),
-            'user_count': len(self.user_profiles),
+            'memory_count': len(self.segment_store),
+            'user_count': len(self.profile_store),
+            'profiles': self.profile_store.get_status(),
             'storage_path': self.local_storage_path,
-            'mem0_enabled': self.mem0_client is not None
+            'storage': self.segment_store.get_status(),
+            'cache': self.memory_cache.get_status(),
+            'search_index': self.search_index.get_status(),
+            'timeline': self.timeline.get_status(),
+            'embeddings': self.embeddings.get_status() if self.embeddings else None,
+            'ingestion': self.ingestion.get_status(),
+            'patterns': self.patterns.get_status(),
+            'retention': self.retention.get_status(),
+            'mem0_enabled': self.mem0_outbox is not None,
+            'mem0_sync': self.mem0_outbox.get_status() if self.mem0_outbox else None
         }
     
     # Private helper methods
@@ -284,11 +522,19 @@ class EnhancedMemoryManager:
         # Store in cache
         self.memory_cache[memory.id] = memory
         
-        # Store persistently
-        file_path = f"{self.local_storage_path}/memories/{memory.id}.pkl"
+        # Embed at write time (in the embedding worker pool) and index for semantic recall
+        if self.embeddings:
+            try:
+                if memory.embedding is None:
+                    vector = await self.embeddings.embed(self._memory_text(memory))
+                    memory.embedding = vector.tolist()
+                self.embeddings.add(memory.user_id, memory.id, memory.embedding)
+            except Exception as e:
+                logger.warning(f"Failed to embed memory {memory.id}: {e}")
+        
+        # Store persistently (group-committed with concurrent writers)
         try:
-            with open(file_path, 'wb') as f:
-                pickle.dump(memory, f)
+            await self.segment_store.put_async(memory.id, MEMORY_RECORD_SCHEMA.encode(memory))
         except Exception as e:
             logger.error(f"Failed to save memory {memory.id}: {e}")
     
@@ -296,42 +542,83 @@ class EnhancedMemoryManager:
         """Load memory record from cache or storage"""
         
         # Check cache first
-        if memory_id in self.memory_cache:
-            memory = self.memory_cache[memory_id]
+        memory = self.memory_cache.get(memory_id)
+        if memory is not None:
             memory.accessed_at = datetime.now()
             memory.access_count += 1
+            self.retention.touch(memory_id)
+            self.timeline.touch(memory_id, memory.accessed_at.timestamp())
             return memory
         
-        # Load from storage
-        file_path = f"{self.local_storage_path}/memories/{memory_id}.pkl"
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, 'rb') as f:
-                    memory = pickle.load(f)
-                    memory.accessed_at = datetime.now()
-                    memory.access_count += 1
-                    
-                    # Add to cache
-                    self.memory_cache[memory_id] = memory
-                    return memory
-            except Exception as e:
-                logger.error(f"Failed to load memory {memory_id}: {e}")
+        # Load from storage, off the event loop
+        try:
+            memory = await asyncio.to_thread(self._read_stored_memory, memory_id)
+            if memory is not None:
+                memory.accessed_at = datetime.now()
+                memory.access_count += 1
+                self.retention.touch(memory_id)
+                self.timeline.touch(memory_id, memory.accessed_at.timestamp())
+                
+                # Add to cache
+                self.memory_cache[memory_id] = memory
+                return memory
+        except Exception as e:
+            logger.error(f"Failed to load memory {memory_id}: {e}")
         
         return None
     
+    def _read_stored_memory(self, memory_id: str) -> Optional[MemoryRecord]:
+        """Blocking read and decode from the segment store (or a legacy pickle file)"""
+        data = self.segment_store.get(memory_id)
+        if data is None:
+            data = self._read_legacy_memory(memory_id)
+        return self._decode_record(data) if data is not None else None
+    
+    def _decode_record(self, data: bytes):
+        return memory_codec.loads(data, allow_pickle=self.allow_legacy_pickle)
+    
+    def _read_legacy_memory(self, memory_id: str) -> Optional[bytes]:
+        """Read a memory written as memories/<id>.pkl before the segment store (see memory_segment_store migrate)"""
+        file_path = f"{self.local_storage_path}/memories/{memory_id}.pkl"
+        if not os.path.exists(file_path):
+            return None
+        with open(file_path, 'rb') as f:
+            return f.read()
+    
+    async def _delete_memory(self, memory_id: str, user_id: str = None):
+        """Remove a memory record from cache and storage"""
+        
+        with self._index_lock:
+            self.memory_cache.pop(memory_id, None)
+            self.retention.cancel(memory_id)
+            meta = self.timeline.remove(memory_id)
+            user_id = user_id or (meta.user_id if meta else None)
+            if user_id:
+                self.search_index.remove(user_id, memory_id)
+                if self.embeddings:
+                    self.embeddings.remove(user_id, memory_id)
+        await self.segment_store.delete_async(memory_id)
+        
+        file_path = f"{self.local_storage_path}/memories/{memory_id}.pkl"
+        if os.path.exists(file_path):
+            os.remove(file_path)
+    
     def _update_indices(self, memory: MemoryRecord):
         """Update memory indices for fast retrieval"""
         
-        # Tag index
-        for tag in memory.tags:
-            self.memory_index[tag].append(memory.id)
-        
-        # User index
-        self.user_memory_index[memory.user_id].append(memory.id)
-        
-        # Temporal index
-        date_key = memory.created_at.strftime("%Y-%m-%d")
-        self.temporal_index[date_key].append(memory.id)
+        text = self._memory_text(memory)
+        with self._index_lock:
+            if memory.id in self.timeline:
+                return  # Already indexed (e.g. by the startup rebuild)
+            
+            # Time-ordered user/agent/type index
+            self.timeline.add(memory)
+            
+            # Full-text index
+            self.search_index.add(memory.user_id, memory.id, text)
+            
+            # Retention schedule
+            self.retention.schedule(memory.id, memory.type.value, memory.importance.name, memory.created_at.timestamp())
     
     async def _analyze_sentiment(self, text: str) -> Dict[str, float]:
         """Analyze sentiment of text"""
@@ -400,7 +687,7 @@ class EnhancedMemoryManager:
             score += 2  # Collaborative interactions are important
         if interaction_data.get('complexity_score', 0) > 7:
             score += 2  # Complex interactions are important
-        if interaction_data.get('satisfaction_score', 3) >= 4:
+        if (interaction_data.get('satisfaction_score') or 3) >= 4:
             score += 1  # High satisfaction is important
         if 'error' in interaction_data.get('user_message', '').lower():
             score += 1  # Error situations are important for learning
@@ -454,242 +741,276 @@ class EnhancedMemoryManager:
         
         return list(set(tags))  # Remove duplicates
     
-    async def _get_recent_memories(self, user_id: str, hours: int = 24, days: int = None, limit: int = 20) -> List[Dict[str, Any]]:
-        """Get recent memories for a user"""
-        
-        if days:
-            cutoff = datetime.now() - timedelta(days=days)
-        else:
-            cutoff = datetime.now() - timedelta(hours=hours)
-        
-        recent_memories = []
-        user_memory_ids = self.user_memory_index.get(user_id, [])
-        
-        for memory_id in reversed(user_memory_ids):  # Most recent first
-            memory = await self._load_memory(memory_id)
-            if memory and memory.created_at >= cutoff:
-                recent_memories.append(self._memory_to_dict(memory))
-                if len(recent_memories) >= limit:
-                    break
-        
-        return recent_memories
-    
     def _memory_to_dict(self, memory: MemoryRecord) -> Dict[str, Any]:
         """Convert memory record to dictionary"""
         
-        result = asdict(memory)
-        result['created_at'] = memory.created_at.isoformat()
-        result['accessed_at'] = memory.accessed_at.isoformat()
-        return result
-    
-    async def _get_embedding(self, text: str) -> Optional[List[float]]:
-        """Get embedding for text (placeholder)"""
-        return None
-    
-    async def _find_similar_memories(self, user_id: str, query_embedding: List[float], limit: int = 10) -> List[Dict[str, Any]]:
-        """Find memories similar to query embedding"""
-        return []
+        # Shallow: callers get the record's own content/tags rather than deep copies
+        return {
+            'id': memory.id,
+            'type': memory.type,
+            'content': memory.content,
+            'user_id': memory.user_id,
+            'agent_id': memory.agent_id,
+            'importance': memory.importance,
+            'tags': memory.tags,
+            'created_at': memory.created_at.isoformat(),
+            'accessed_at': memory.accessed_at.isoformat(),
+            'access_count': memory.access_count,
+            'related_memories': memory.related_memories
+        }
     
-    async def _get_agent_specific_memories(self, user_id: str, agent_id: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get memories specific to an agent"""
-        
-        agent_memories = []
-        user_memory_ids = self.user_memory_index.get(user_id, [])
-        
-        for memory_id in reversed(user_memory_ids):
-            memory = await self._load_memory(memory_id)
-            if memory and memory.agent_id == agent_id:
-                agent_memories.append(self._memory_to_dict(memory))
-                if len(agent_memories) >= limit:
-                    break
-        
-        return agent_memories
+    def _memory_text(self, memory: MemoryRecord) -> str:
+        """Text used to embed a memory"""
+        content = memory.content or {}
+        if memory.type == MemoryType.CONVERSATION:
+            text = f"{content.get('user_message', '')} {content.get('agent_response', '')}"
+        else:
+            text = json.dumps(content, default=str)
+        return f"{text} {' '.join(memory.tags)}"
     
-    async def _rank_memories_by_relevance(self, query: str, memories: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Rank memories by relevance to query"""
+    def _rank_candidates(self, user_id: str, query: str, candidates: Dict[str, Dict[str, float]]) -> List[str]:
+        """Order candidate IDs by relevance using index metadata only"""
         
-        # Simple keyword-based ranking
-        query_words = set(query.lower().split())
+        # BM25 keyword relevance from the inverted index (no re-tokenizing of candidates)
+        bm25_scores = self.search_index.score(user_id, query, list(candidates))
+        now = datetime.now().timestamp()
         
-        def relevance_score(memory):
-            content_text = str(memory.get('content', {})).lower()
-            content_words = set(content_text.split())
+        scores = {}
+        for memory_id, signals in candidates.items():
+            meta = self.timeline.get_meta(memory_id)
+            if meta is None:
+                continue  # Deleted since it was matched
             
-            # Keyword overlap
-            overlap = len(query_words.intersection(content_words))
+            keyword_score = bm25_scores.get(memory_id, 0.0)
             
             # Recency boost
-            days_old = (datetime.now() - datetime.fromisoformat(memory['created_at'])).days
+            days_old = int((now - meta.created_ts) // 86400)
             recency_boost = max(0, 7 - days_old) / 7
             
             # Importance boost
-            importance_map = {'critical': 5, 'high': 4, 'medium': 3, 'low': 2, 'trivial': 1}
-            importance_boost = importance_map.get(memory.get('importance'), 3) / 5
+            importance_boost = meta.importance / 5
             
-            return overlap + recency_boost + importance_boost
+            # Semantic similarity boost
+            similarity_boost = 2 * max(0.0, signals.get('similarity', 0.0))
+            
+            scores[memory_id] = keyword_score + recency_boost + importance_boost + similarity_boost
         
-        return sorted(memories, key=relevance_score, reverse=True)
+        return sorted(scores, key=scores.get, reverse=True)
     
     async def _load_user_profile(self, user_id: str) -> UserProfile:
         """Load or create user profile"""
-        
-        if user_id in self.user_profiles:
-            return self.user_profiles[user_id]
-        
-        # Try to load from storage
-        profile_path = f"{self.local_storage_path}/profiles/{user_id}.pkl"
-        if os.path.exists(profile_path):
-            try:
-                with open(profile_path, 'rb') as f:
-                    profile = pickle.load(f)
-                    self.user_profiles[user_id] = profile
-                    return profile
-            except Exception as e:
-                logger.error(f"Failed to load user profile {user_id}: {e}")
-        
-        # Create new profile
-        profile = UserProfile(user_id=user_id)
-        self.user_profiles[user_id] = profile
-        await self._save_user_profile(profile)
-        
-        return profile
+        return await self.profile_store.get(user_id)
     
     async def _save_user_profile(self, profile: UserProfile):
-        """Save user profile to storage"""
-        
-        profile.last_updated = datetime.now()
+        """Snapshot a changed profile for the next write-behind flush"""
         
-        profile_path = f"{self.local_storage_path}/profiles/{profile.user_id}.pkl"
-        try:
-            with open(profile_path, 'wb') as f:
-                pickle.dump(profile, f)
-        except Exception as e:
-            logger.error(f"Failed to save user profile {profile.user_id}: {e}")
+        with self.profile_store.lock:
+            profile.last_updated = datetime.now()
+            self.profile_store.mark_dirty(profile.user_id, profile)
     
     async def _update_user_profile(self, user_id: str, interaction_data: Dict[str, Any]):
         """Update user profile based on interaction"""
         
         profile = await self._load_user_profile(user_id)
         
-        # Update expertise level based on interaction complexity
-        complexity = interaction_data.get('complexity_score', 0)
-        if complexity > 8:
-            if profile.expertise_level == 'beginner':
-                profile.expertise_level = 'intermediate'
-            elif profile.expertise_level == 'intermediate':
-                profile.expertise_level = 'advanced'
-        
-        # Update preferred agents
-        agent_id = interaction_data.get('agent_id')
-        success = interaction_data.get('success', True)
-        if agent_id and success:
-            if agent_id not in profile.preferred_agents:
-                profile.preferred_agents.append(agent_id)
-        
-        # Save updated profile
-        await self._save_user_profile(profile)
-    
-    async def _memory_consolidation_loop(self):
-        """Background task to consolidate and clean up memories"""
-        
-        while True:
+        # Mutated under the store lock so a concurrent snapshot never sees a half-applied update
+        with self.profile_store.lock:
+            changed = False
+            
+            # Update expertise level based on interaction complexity
+            complexity = interaction_data.get('complexity_score', 0)
+            if complexity > 8:
+                if profile.expertise_level == 'beginner':
+                    profile.expertise_level = 'intermediate'
+                    changed = True
+                elif profile.expertise_level == 'intermediate':
+                    profile.expertise_level = 'advanced'
+                    changed = True
+            
+            # Update preferred agents
+            agent_id = interaction_data.get('agent_id')
+            success = interaction_data.get('success', True)
+            if agent_id and success:
+                if agent_id not in profile.preferred_agents:
+                    profile.preferred_agents.append(agent_id)
+                    changed = True
+        
+        # Only changed profiles are written back
+        if changed:
+            await self._save_user_profile(profile)
+    
+    def _memory_consolidation_loop(self):
+        """Maintenance thread: expire memories and reclaim storage"""
+        
+        while not self._maintenance_stop.wait(self.retention_interval):
             try:
-                await asyncio.sleep(3600)  # Run every hour
-                
-                # Remove old trivial memories
-                cutoff = datetime.now() - timedelta(days=7)
+                expired = asyncio.run(self._expire_memories())
+                if expired:
+                    logger.info(f"Expired {expired} memories past their retention")
                 
-                memories_to_remove = []
-                for memory_id, memory in self.memory_cache.items():
-                    if (memory.importance == MemoryImportance.TRIVIAL and 
-                        memory.created_at < cutoff and 
-                        memory.access_count == 0):
-                        memories_to_remove.append(memory_id)
-                
-                for memory_id in memories_to_remove:
-                    del self.memory_cache[memory_id]
-                    # Also remove from storage
-                    file_path = f"{self.local_storage_path}/memories/{memory_id}.pkl"
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-                
-                if memories_to_remove:
-                    logger.info(f"Consolidated {len(memories_to_remove)} old memories")
+                # Reclaim space held by deleted records and checkpoint the index
+                self.segment_store.maybe_compact()
+                self.segment_store.checkpoint()
                 
             except Exception as e:
                 logger.error(f"Memory consolidation error: {e}")
     
-    async def _pattern_analysis_loop(self):
-        """Background task to analyze patterns and update learning"""
+    async def _expire_memories(self, batch_size: int = 500) -> int:
+        """Delete every memory whose retention has lapsed, one storage batch at a time"""
+        
+        legacy_dir = f"{self.local_storage_path}/memories"
+        has_legacy = os.path.isdir(legacy_dir)
+        total = 0
         
         while True:
+            memory_ids = self.retention.pop_expired(limit=batch_size)
+            if not memory_ids:
+                return total
+            
+            for memory_id in memory_ids:
+                with self._index_lock:
+                    self.memory_cache.pop(memory_id, None)
+                    meta = self.timeline.remove(memory_id)
+                    if meta:
+                        self.search_index.remove(meta.user_id, memory_id)
+                        if self.embeddings:
+                            self.embeddings.remove(meta.user_id, memory_id)
+            
+            # One write + fsync for the whole batch
+            reclaimed_bytes = await asyncio.to_thread(self.segment_store.delete_many, memory_ids)
+            if has_legacy:
+                await asyncio.to_thread(self._remove_legacy_memories, legacy_dir, memory_ids)
+            
+            self.retention.record_reclaimed(len(memory_ids), reclaimed_bytes)
+            total += len(memory_ids)
+    
+    def _remove_legacy_memories(self, legacy_dir: str, memory_ids: List[str]):
+        for memory_id in memory_ids:
             try:
-                await asyncio.sleep(1800)  # Run every 30 minutes
-                
-                # Analyze user patterns
-                for user_id in self.user_memory_index.keys():
-                    await self._analyze_user_patterns(user_id)
-                
-            except Exception as e:
-                logger.error(f"Pattern analysis error: {e}")
+                os.remove(f"{legacy_dir}/{memory_id}.pkl")
+            except FileNotFoundError:
+                pass
     
-    async def _analyze_user_patterns(self, user_id: str):
-        """Analyze patterns for a specific user"""
-        
-        recent_memories = await self._get_recent_memories(user_id, days=7)
-        
-        if len(recent_memories) < 3:
-            return  # Not enough data
+    def _start_maintenance(self, target, name: str):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._maintenance_threads.append(thread)
+    
+    def _pattern_compaction_loop(self):
+        """Maintenance thread: apply pattern decay and persist the aggregates"""
         
-        # Analyze success patterns
-        successful_interactions = [m for m in recent_memories if m['content'].get('success', True)]
+        while not self._maintenance_stop.wait(self.pattern_compaction_interval):
+            try:
+                asyncio.run(self._compact_patterns())
+            except Exception as e:
+                logger.error(f"Pattern compaction error: {e}")
+    
+    async def _compact_patterns(self):
+        """Fold decay into the aggregates and sync profiles of recently active users"""
         
-        # Update user profile with insights
-        profile = await self._load_user_profile(user_id)
+        stats = self.patterns.compact()
         
-        if successful_interactions:
-            # Find patterns in successful interactions
-            successful_agents = [m['agent_id'] for m in successful_interactions if m.get('agent_id')]
-            for agent in set(successful_agents):
-                if agent not in profile.success_patterns:
-                    profile.success_patterns[agent] = 0
-                profile.success_patterns[agent] += successful_agents.count(agent) / len(successful_interactions)
+        # Only users with new interactions since the last pass are touched
+        for user_id in self.patterns.take_touched():
+            rates = self.patterns.agent_success_rates(user_id)
+            profile = await self._load_user_profile(user_id)
+            if rates != profile.success_patterns:
+                with self.profile_store.lock:
+                    profile.success_patterns = rates
+                await self._save_user_profile(profile)
         
-        await self._save_user_profile(profile)
+        await asyncio.to_thread(self.patterns.save, self.patterns_path)
+        logger.debug(f"Compacted pattern aggregates for {stats['users']} users ({stats['pruned']} weights pruned)")
     
     async def _load_persistent_data(self):
         """Load persistent data on startup"""
         
         try:
-            # Load user profiles
-            profiles_dir = f"{self.local_storage_path}/profiles"
-            if os.path.exists(profiles_dir):
-                for filename in os.listdir(profiles_dir):
-                    if filename.endswith('.pkl'):
-                        user_id = filename[:-4]  # Remove .pkl extension
-                        profile = await self._load_user_profile(user_id)
-                        self.user_profiles[user_id] = profile
+            # User profiles load lazily on first access
+            stored_profiles = await asyncio.to_thread(self.profile_store.stored_user_ids)
+            logger.info(f"Found {len(stored_profiles)} stored user profiles")
             
-            logger.info(f"Loaded {len(self.user_profiles)} user profiles")
+            # Pattern aggregates from the last run; newer interactions are backfilled on rebuild
+            self._patterns_loaded = await asyncio.to_thread(self.patterns.load, self.patterns_path)
             
         except Exception as e:
             logger.error(f"Failed to load persistent data: {e}")
     
-    # Placeholder methods to be implemented
-    async def _analyze_interaction_patterns(self, interactions):
-        return {}
-    
-    async def _get_common_topics(self, user_id):
-        return []
-    
-    async def _get_collaboration_preferences(self, user_id):
-        return {}
-    
-    async def _track_learning_progression(self, user_id):
-        return {}
-    
-    async def _save_to_mem0(self, memory_record):
-        pass
+    def _read_records(self, memory_ids: List[str]) -> List[MemoryRecord]:
+        """Decode records straight from the store, bypassing the cache"""
+        records = []
+        for memory_id in memory_ids:
+            try:
+                data = self.segment_store.get(memory_id)
+                if data is not None:
+                    records.append(self._decode_record(data))
+            except Exception as e:
+                logger.error(f"Failed to read memory {memory_id} during index rebuild: {e}")
+        return records
+    
+    async def _rebuild_indices(self, batch_size: int = 1000):
+        """Rebuild the in-memory indices from the store after a restart"""
+        
+        memory_ids = [memory_id for memory_id in self.segment_store.keys() if memory_id not in self.timeline]
+        if not memory_ids:
+            return
+        
+        start = datetime.now()
+        watermark = self.patterns.watermark if self._patterns_loaded else float('-inf')
+        for offset in range(0, len(memory_ids), batch_size):
+            # Reads happen in a worker thread; index mutations stay on the loop
+            records = await asyncio.to_thread(self._read_records, memory_ids[offset:offset + batch_size])
+            records = [memory for memory in records if memory.id not in self.timeline]
+            if self.embeddings:
+                # IDF stats live in memory only; relearn them from the stored text
+                await self.embeddings.observe([self._memory_text(memory) for memory in records])
+            for memory in records:
+                if memory.id in self.timeline:
+                    continue
+                self._update_indices(memory)
+                if self.embeddings and memory.embedding is not None:
+                    self.embeddings.add(memory.user_id, memory.id, memory.embedding)
+                if memory.type == MemoryType.CONVERSATION and memory.created_at.timestamp() > watermark:
+                    self.patterns.record(memory.user_id, memory.content, memory.created_at.timestamp())
+        
+        elapsed = (datetime.now() - start).total_seconds()
+        logger.info(f"🧠 Rebuilt memory indices for {len(memory_ids)} memories in {elapsed:.1f}s")
+    
+    async def shutdown(self):
+        """Flush pending memory writes and checkpoint the store"""
+        self._maintenance_stop.set()
+        for thread in self._maintenance_threads:
+            await asyncio.to_thread(thread.join)
+        await self.ingestion.close()
+        await self._compact_patterns()
+        await self.profile_store.close()
+        await asyncio.to_thread(self.segment_store.close)
+        if self.embeddings:
+            self.embeddings.shutdown()
+        if self.mem0_outbox:
+            await asyncio.to_thread(self.mem0_outbox.close)
+    
+    def _create_mem0_outbox(self) -> Optional[Mem0Outbox]:
+        if self.mem0_client is not None:
+            transport = Mem0ClientTransport(self.mem0_client)
+        elif os.getenv('MEM0_API_KEY'):
+            transport = Mem0HttpTransport()
+        else:
+            return None
+        return Mem0Outbox(f"{self.local_storage_path}/mem0_outbox.db", transport)
+    
+    async def _save_to_mem0(self, memory_record: MemoryRecord):
+        """Queue an interaction for upload; the outbox sender does the network I/O"""
+        content = memory_record.content
+        payload = interaction_payload(
+            memory_record.id,
+            memory_record.user_id,
+            content.get('user_message', ''),
+            content.get('agent_response', ''),
+            {'agent_id': memory_record.agent_id, 'topics': content.get('topics', []),
+             'page_context': content.get('page_context')}
+        )
+        await asyncio.to_thread(self.mem0_outbox.enqueue, memory_record.id, payload)
 
 # Integration function
 async def initialize_enhanced_memory(mem0_client=None) -> EnhancedMemoryManager:
@@ -1,6 +1,5 @@
 # backend/services/mama_bear_model_manager.py
 import asyncio
-import google.generativeai as genai
 from typing import List, Dict, Optional, Any
 from datetime import datetime, timedelta
 from enum import Enum
@@ -9,7 +8,12 @@ import os
 from dataclasses import dataclass
 import logging
 from collections import defaultdict
-import aiofiles
+
+from .startup import lazy_import
+
+# Heavy SDKs are only imported on first use
+genai = lazy_import('google.generativeai')
+aiofiles = lazy_import('aiofiles')
 
 logger = logging.getLogger(__name__)
 
@@ -184,15 +188,16 @@ class MamaBearModelManager:
             try:
                 # Check rate limit
                 if not await self._check_rate_limit(model):
-                    logger.info(f"Rate limit hit for {model.name}, skipping...")
+                    logger.debug(f"Rate limit hit for {model.name}, skipping...")
                     continue
                 
                 # Check quota
                 if not self._check_quota(model):
-                    logger.info(f"Quota exceeded for {model.name}, skipping...")
+                    logger.debug(f"Quota exceeded for {model.name}, skipping...")
                     continue
                 
                 # Try to get response
+                logger.debug(f"Attempt {attempt + 1}: calling {model.name}")
                 response = await self._call_model(model, prompt)
                 
                 # Update health on success
@@ -12,6 +12,9 @@ from collections import defaultdict, deque
 import json
 import os
 
+from .logging_pipeline import get_logging_pipeline
+from .socket_router import get_socket_router
+
 logger = logging.getLogger(__name__)
 
 class MamaBearMonitoring:
@@ -103,8 +106,12 @@ class MamaBearMonitoring:
                 # Check thresholds
                 await self._check_thresholds(current_metrics)
                 
-                # Log metrics
-                logger.info(f"📊 Metrics: {json.dumps(current_metrics, indent=2)}")
+                # Log metrics as a single structured line
+                logger.info(
+                    f"📊 Metrics: {current_metrics['requests_per_minute']} req/min, "
+                    f"success {current_metrics['success_rate']:.2%}",
+                    extra={'metrics': current_metrics}
+                )
                 
             except Exception as e:
                 logger.error(f"Monitoring loop error: {e}")
@@ -355,6 +362,7 @@ class MamaBearMonitoring:
         """Get comprehensive monitoring dashboard data"""
         
         current_metrics = await self._calculate_current_metrics()
+        logging_pipeline = get_logging_pipeline()
         
         return {
             'timestamp': datetime.now().isoformat(),
@@ -363,7 +371,9 @@ class MamaBearMonitoring:
             'recent_alerts': list(self.alert_history)[-20:],
             'baselines': self.baselines,
             'uptime': self._calculate_uptime(),
-            'performance_trends': await self._calculate_trends()
+            'performance_trends': await self._calculate_trends(),
+            'logging': logging_pipeline.get_status() if logging_pipeline else None,
+            'socket_events': get_socket_router().get_metrics()
         }
     
     def _calculate_uptime(self) -> Dict[str, Any]:
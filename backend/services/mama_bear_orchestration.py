@@ -14,6 +14,8 @@ import logging
 from collections import defaultdict, deque
 import uuid
 
+from .state_store import get_state_store
+
 logger = logging.getLogger(__name__)
 
 class TaskPriority(Enum):
@@ -156,7 +158,7 @@ class AgentOrchestrator:
     Manages agent collaboration, context sharing, and intelligent task routing
     """
     
-    def __init__(self, memory_manager, model_manager, scrapybara_client):
+    def __init__(self, memory_manager, model_manager, scrapybara_client, state_store=None):
         self.memory_manager = memory_manager
         self.model_manager = model_manager
         self.scrapybara_client = scrapybara_client
@@ -169,8 +171,8 @@ class AgentOrchestrator:
         self.context_manager = ContextManager()
         self.workflow_engine = WorkflowEngine()
         
-        # Plan storage
-        self._plans: Dict[str, AgentPlan] = {}
+        # Plan storage, shared by all workers (plans are stored as dicts)
+        self._plans = (state_store or get_state_store()).namespace('plans')
         
         # Performance tracking
         self.metrics = {
@@ -209,7 +211,7 @@ class AgentOrchestrator:
                 estimated_total_duration=sum(task.get('estimated_duration', 300) for task in subtasks)
             )
             
-            self._plans[plan_id] = plan
+            self._plans[plan_id] = asdict(plan)
             
             # Notify subscribers
             await self._notify_plan_created(plan)
@@ -294,17 +296,18 @@ class AgentOrchestrator:
     
     def get_plan(self, plan_id: str) -> Dict[str, Any]:
         """Retrieve a plan by ID"""
-        if plan_id not in self._plans:
+        plan = self._plans.get(plan_id)
+        if plan is None:
             raise ValueError(f"Plan {plan_id} not found")
-        return asdict(self._plans[plan_id])
+        return plan
     
     def store_plan(self, plan: Dict[str, Any]):
         """Store or update a plan"""
         plan_id = plan['id']
-        # Convert dict back to AgentPlan object
+        # Round-trip through AgentPlan to validate the fields
         plan_obj = AgentPlan(**plan)
         plan_obj.updated_at = datetime.now()
-        self._plans[plan_id] = plan_obj
+        self._plans[plan_id] = asdict(plan_obj)
     
     async def run_subtask(self, plan_id: str, subtask_id: str, user_id: str) -> Dict[str, Any]:
         """Execute a specific subtask"""
@@ -338,7 +341,7 @@ class AgentOrchestrator:
     async def _execute_subtask(self, plan_id: str, subtask_id: str, subtask: Dict[str, Any]):
         """Internal method to execute a subtask"""
         try:
-            logger.info(f"🐻 Executing subtask {subtask_id} with agent {subtask['agent']}")
+            logger.debug(f"🐻 Executing subtask {subtask_id} with agent {subtask['agent']}")
             
             # Get the appropriate agent
             agent_type = AgentType(subtask['agent'])
@@ -0,0 +1,290 @@
+# backend/services/mem0_outbox.py
+"""
+🐻 Mama Bear Mem0 Outbox
+Durable local outbox for Mem0 uploads: records are queued in SQLite and a
+background sender uploads them in batches with retries, backoff and
+per-memory deduplication
+"""
+
+import http.client
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEM0_API_URL = 'https://api.mem0.ai'
+
+class Mem0HttpTransport:
+    """
+    Uploads records to the Mem0 REST API (POST /v1/memories/), reusing one
+    keep-alive connection for a whole batch
+    """
+
+    def __init__(self, base_url: str = None, api_key: str = None, timeout: float = 10.0):
+        self.base_url = (base_url or os.getenv('MEM0_API_URL', DEFAULT_MEM0_API_URL)).rstrip('/')
+        self.api_key = api_key or os.getenv('MEM0_API_KEY')
+        self.timeout = timeout
+
+        parsed = urlparse(self.base_url)
+        self._scheme = parsed.scheme
+        self._host = parsed.netloc
+        self._path_prefix = parsed.path
+
+    def _connect(self) -> http.client.HTTPConnection:
+        connection_class = http.client.HTTPSConnection if self._scheme == 'https' else http.client.HTTPConnection
+        return connection_class(self._host, timeout=self.timeout)
+
+    def send_batch(self, records: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, Optional[str]]:
+        """Returns {memory_id: None on success or an error message}"""
+        results: Dict[str, Optional[str]] = {}
+        headers = {'Content-Type': 'application/json'}
+        if self.api_key:
+            headers['Authorization'] = f"Token {self.api_key}"
+
+        connection = self._connect()
+        try:
+            for memory_id, payload in records:
+                try:
+                    connection.request('POST', f"{self._path_prefix}/v1/memories/", body=json.dumps(payload), headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                    results[memory_id] = None if response.status < 300 else f"HTTP {response.status}"
+                except (OSError, http.client.HTTPException) as e:
+                    results[memory_id] = str(e) or e.__class__.__name__
+                    connection.close()
+                    connection = self._connect()
+        finally:
+            connection.close()
+        return results
+
+class Mem0ClientTransport:
+    """Uploads through an SDK client object exposing add(messages, user_id=..., metadata=...)"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def send_batch(self, records: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, Optional[str]]:
+        results: Dict[str, Optional[str]] = {}
+        for memory_id, payload in records:
+            try:
+                self.client.add(payload['messages'], user_id=payload['user_id'], metadata=payload.get('metadata'))
+                results[memory_id] = None
+            except Exception as e:
+                results[memory_id] = str(e) or e.__class__.__name__
+        return results
+
+def interaction_payload(memory_id: str, user_id: str, message: str, response: str,
+                        metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Mem0 add-memory request body for one interaction"""
+    return {
+        'messages': [
+            {'role': 'user', 'content': message},
+            {'role': 'assistant', 'content': response}
+        ],
+        'user_id': user_id,
+        'metadata': {**(metadata or {}), 'memory_id': memory_id}
+    }
+
+class Mem0Outbox:
+    """
+    SQLite-backed outbox. enqueue() is a single local write; a daemon sender
+    thread drains due rows in batches. Re-enqueuing a memory ID replaces the
+    pending payload, so each memory is uploaded once with its latest content.
+    Rows that keep failing back off exponentially and are parked as 'dead'
+    after `max_attempts`.
+    """
+
+    def __init__(self, db_path: str, transport, batch_size: int = 50, max_attempts: int = 8,
+                 base_backoff: float = 1.0, max_backoff: float = 300.0, poll_interval: float = 1.0):
+        self.db_path = db_path
+        self.transport = transport
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._sender: Optional[threading.Thread] = None
+        self._local = threading.local()
+
+        self.metrics = defaultdict(float)
+        self.last_success_at: Optional[float] = None
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS mem0_outbox (
+                    memory_id TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    enqueued_at REAL NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    last_error TEXT,
+                    version INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_mem0_outbox_due ON mem0_outbox(status, next_attempt_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, memory_id: str, payload: Dict[str, Any]):
+        with self._connection() as conn:
+            self.stage(conn, memory_id, payload)
+        self.notify()
+
+    def stage(self, conn: sqlite3.Connection, memory_id: str, payload: Dict[str, Any]):
+        """
+        Write the outbox row on the caller's connection without committing, so
+        it commits or rolls back with the caller's own rows. The outbox must
+        live in that connection's database; call notify() once committed.
+        """
+        now = time.time()
+        inserted = conn.execute("""
+            INSERT OR IGNORE INTO mem0_outbox (memory_id, payload, enqueued_at, next_attempt_at)
+            VALUES (?, ?, ?, ?)
+        """, (memory_id, json.dumps(payload, default=str), now, now)).rowcount
+        if not inserted:
+            # Already queued: keep one row with the latest payload and a fresh retry budget
+            conn.execute("""
+                UPDATE mem0_outbox
+                SET payload = ?, attempts = 0, next_attempt_at = ?, status = 'pending', last_error = NULL,
+                    version = version + 1
+                WHERE memory_id = ?
+            """, (json.dumps(payload, default=str), now, memory_id))
+            self.metrics['deduplicated'] += 1
+        self.metrics['enqueued'] += 1
+
+    def notify(self):
+        """Wake the sender for newly committed rows"""
+        if self._sender is None:
+            self.start()
+        self._wake.set()
+
+    def adopt(self, path: str) -> int:
+        """Move the rows of an outbox kept in another database file into this one"""
+        conn = self._connection()
+        conn.execute("ATTACH DATABASE ? AS legacy", (path,))
+        try:
+            with conn:
+                adopted = conn.execute("""
+                    INSERT OR IGNORE INTO mem0_outbox
+                        (memory_id, payload, enqueued_at, attempts, next_attempt_at, status, last_error)
+                    SELECT memory_id, payload, enqueued_at, attempts, next_attempt_at, status, last_error
+                    FROM legacy.mem0_outbox
+                """).rowcount
+        finally:
+            conn.execute("DETACH DATABASE legacy")
+        os.replace(path, f"{path}.migrated")
+        logger.info(f"Moved {adopted} Mem0 outbox rows from {path}")
+        if adopted:
+            self.notify()
+        return adopted
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.max_backoff, self.base_backoff * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def send_due(self, now: float = None) -> int:
+        """Upload one batch of due records; returns how many were attempted"""
+        now = now if now is not None else time.time()
+        conn = self._connection()
+        rows = conn.execute("""
+            SELECT memory_id, payload, attempts, version FROM mem0_outbox
+            WHERE status = 'pending' AND next_attempt_at <= ?
+            ORDER BY next_attempt_at
+            LIMIT ?
+        """, (now, self.batch_size)).fetchall()
+        if not rows:
+            return 0
+
+        start = time.perf_counter()
+        try:
+            results = self.transport.send_batch([(memory_id, json.loads(payload)) for memory_id, payload, _, _ in rows])
+        except Exception as e:
+            results = {memory_id: str(e) or e.__class__.__name__ for memory_id, _, _, _ in rows}
+        self.metrics['batches'] += 1
+        self.metrics['send_ms_total'] += (time.perf_counter() - start) * 1000
+
+        # The version check keeps a payload replaced mid-upload queued for another send
+        sent = [(memory_id, version) for memory_id, _, _, version in rows if results.get(memory_id, 'no result') is None]
+        with conn:
+            conn.executemany("DELETE FROM mem0_outbox WHERE memory_id = ? AND version = ?", sent)
+            for memory_id, _, attempts, version in rows:
+                error = results.get(memory_id, 'no result')
+                if error is None:
+                    continue
+                attempts += 1
+                status = 'dead' if attempts >= self.max_attempts else 'pending'
+                conn.execute("""
+                    UPDATE mem0_outbox SET attempts = ?, next_attempt_at = ?, status = ?, last_error = ?
+                    WHERE memory_id = ? AND version = ?
+                """, (attempts, time.time() + self._backoff(attempts), status, error, memory_id, version))
+                self.metrics['failed_attempts'] += 1
+                if status == 'dead':
+                    self.metrics['dead'] += 1
+                    logger.error(f"Mem0 upload for {memory_id} gave up after {attempts} attempts: {error}")
+
+        self.metrics['sent'] += len(sent)
+        if sent:
+            self.last_success_at = time.time()
+        return len(rows)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.send_due():
+                    continue  # Keep draining while there is due work
+            except Exception as e:
+                logger.error(f"Mem0 outbox sender error: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def start(self):
+        if self._sender is None:
+            self._sender = threading.Thread(target=self._run, name='mem0-outbox', daemon=True)
+            self._sender.start()
+
+    def close(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._sender is not None:
+            self._sender.join(timeout)
+            self._sender = None
+
+    def get_status(self) -> Dict[str, Any]:
+        conn = self._connection()
+        backlog, oldest = conn.execute(
+            "SELECT COUNT(*), MIN(enqueued_at) FROM mem0_outbox WHERE status = 'pending'"
+        ).fetchone()
+        dead = conn.execute("SELECT COUNT(*) FROM mem0_outbox WHERE status = 'dead'").fetchone()[0]
+        batches = self.metrics['batches']
+        return {
+            'backlog': backlog,
+            'lag_seconds': round(time.time() - oldest, 3) if oldest else 0.0,
+            'dead_letters': dead,
+            'enqueued': int(self.metrics['enqueued']),
+            'deduplicated': int(self.metrics['deduplicated']),
+            'sent': int(self.metrics['sent']),
+            'failed_attempts': int(self.metrics['failed_attempts']),
+            'batches': int(batches),
+            'avg_batch_ms': round(self.metrics['send_ms_total'] / batches, 2) if batches else None,
+            'last_success_at': self.last_success_at
+        }
@@ -0,0 +1,152 @@
+# backend/services/memory_cache.py
+"""
+🐻 Mama Bear Memory Cache
+Bounded, size-aware LRU for memory records with importance-aware eviction
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Rough per-object overheads used for size estimates (CPython, 64-bit)
+_RECORD_OVERHEAD = 600
+_FLOAT_IN_LIST = 32
+_CONTAINER_ITEM = 64
+
+def estimate_size(value: Any) -> int:
+    """Cheap approximation of the memory held by a JSON-like value"""
+    if isinstance(value, str):
+        return 50 + len(value)
+    if isinstance(value, dict):
+        return 64 + sum(_CONTAINER_ITEM + estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return 56 + sum(8 + estimate_size(v) for v in value)
+    return 32
+
+def estimate_record_size(memory) -> int:
+    """Approximate bytes held by a MemoryRecord"""
+    size = _RECORD_OVERHEAD + estimate_size(memory.content) + estimate_size(memory.tags)
+    size += estimate_size(memory.related_memories)
+    if memory.embedding is not None:
+        size += 56 + len(memory.embedding) * _FLOAT_IN_LIST
+    return size
+
+def _importance_of(memory) -> int:
+    importance = getattr(memory, 'importance', None)
+    return getattr(importance, 'value', 3)
+
+class MemoryRecordCache:
+    """
+    Write-through cache in front of the memory store, bounded by entry count
+    and approximate bytes.
+
+    Eviction looks at the `eviction_window` least recently used entries and
+    drops the least important of them (oldest first on ties), so a burst of
+    trivial chatter can't push out critical records that were merely idle.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024, eviction_window: int = 16):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.eviction_window = eviction_window
+
+        self._entries: 'OrderedDict[str, Tuple[Any, int]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+
+    def get(self, memory_id: str, default=None):
+        with self._lock:
+            entry = self._entries.get(memory_id)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(memory_id)
+            self.hits += 1
+            return entry[0]
+
+    def __getitem__(self, memory_id: str):
+        memory = self.get(memory_id)
+        if memory is None:
+            raise KeyError(memory_id)
+        return memory
+
+    def __setitem__(self, memory_id: str, memory):
+        size = estimate_record_size(memory)
+        with self._lock:
+            previous = self._entries.pop(memory_id, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[memory_id] = (memory, size)
+            self._bytes += size
+            self._evict()
+
+    def __delitem__(self, memory_id: str):
+        if self.pop(memory_id, None) is None:
+            raise KeyError(memory_id)
+
+    def pop(self, memory_id: str, default=None):
+        with self._lock:
+            entry = self._entries.pop(memory_id, None)
+            if entry is None:
+                return default
+            self._bytes -= entry[1]
+            return entry[0]
+
+    def __contains__(self, memory_id) -> bool:
+        return memory_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._entries))
+
+    def items(self):
+        """Snapshot of cached (id, record) pairs; does not affect recency"""
+        with self._lock:
+            return [(memory_id, entry[0]) for memory_id, entry in self._entries.items()]
+
+    def values(self):
+        return [memory for _, memory in self.items()]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _evict(self):
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            victim = None
+            for position, (memory_id, (memory, _)) in enumerate(self._entries.items()):
+                if position >= self.eviction_window:
+                    break
+                if victim is None or _importance_of(memory) < victim[1]:
+                    victim = (memory_id, _importance_of(memory))
+
+            _, size = self._entries.pop(victim[0])
+            self._bytes -= size
+            self.evictions += 1
+            self.evicted_bytes += size
+
+    def get_status(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'approx_bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+            'evictions': self.evictions,
+            'evicted_bytes': self.evicted_bytes
+        }
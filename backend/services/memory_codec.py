@@ -0,0 +1,428 @@
+# backend/services/memory_codec.py
+"""
+🐻 Mama Bear Memory Codec
+Versioned, schema-driven binary encoding for memory records and user
+profiles. Replaces pickle: decoding never executes code, records survive
+dataclass changes, and stores written with pickle can be converted in place.
+
+Layout of one record:
+    header   struct '<2sBBH'  magic b'MB', format version, schema id, field count
+    fields   varint field id + tagged value, repeated field-count times
+
+Values are self-describing (a one-byte tag then the payload), so a reader
+can skip fields it does not know (forward compatibility) and fills fields
+missing from older records with the dataclass defaults (backward
+compatibility). Field ids are never reused; retired ids stay reserved.
+"""
+
+import argparse
+import json
+import logging
+import os
+import pickle
+import struct
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Any, BinaryIO, Callable, Dict, Iterator, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'MB'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<2sBBH')
+FRAME = struct.Struct('<I')
+FLOAT = struct.Struct('<d')
+AWARE_OFFSET = struct.Struct('<h')
+
+# Value tags
+T_NONE, T_FALSE, T_TRUE, T_INT, T_FLOAT, T_STR, T_BYTES, T_LIST, T_DICT, T_DATETIME, T_DATETIME_TZ, T_F64_ARRAY = range(12)
+
+NAIVE_EPOCH = datetime(1970, 1, 1)
+UTC_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+PICKLE_PREFIX = b'\x80'  # Every pickle since protocol 2 starts with PROTO
+
+class CodecError(ValueError):
+    """Raised for data that is not a valid encoded record"""
+
+# ---------------------------------------------------------------------------
+# Primitive values
+
+def _write_varint(out: bytearray, value: int):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _write_varint_signed(out: bytearray, value: int):
+    _write_varint(out, (value << 1) if value >= 0 else ((-value << 1) - 1))  # Zigzag
+
+def _write_int(out: bytearray, value: int):
+    out.append(T_INT)
+    _write_varint_signed(out, value)
+
+def _write_float(out: bytearray, value: float):
+    out.append(T_FLOAT)
+    out += FLOAT.pack(value)
+
+def _write_str(out: bytearray, value: str):
+    data = value.encode('utf-8')
+    out.append(T_STR)
+    _write_varint(out, len(data))
+    out += data
+
+def _write_list(out: bytearray, value):
+    if len(value) >= 4 and all(type(item) is float for item in value):
+        # Embeddings and score vectors: packed doubles instead of per-item tags
+        out.append(T_F64_ARRAY)
+        _write_varint(out, len(value))
+        out += struct.pack(f'<{len(value)}d', *value)
+        return
+    out.append(T_LIST)
+    _write_varint(out, len(value))
+    for item in value:
+        write_value(out, item)
+
+def _write_dict(out: bytearray, value: dict):
+    out.append(T_DICT)
+    _write_varint(out, len(value))
+    for key, item in value.items():
+        write_value(out, key)
+        write_value(out, item)
+
+def _write_datetime(out: bytearray, value: datetime):
+    if value.tzinfo is None:
+        out.append(T_DATETIME)
+        _write_varint_signed(out, (value - NAIVE_EPOCH) // timedelta(microseconds=1))
+    else:
+        out.append(T_DATETIME_TZ)
+        _write_varint_signed(out, (value - UTC_EPOCH) // timedelta(microseconds=1))
+        out += AWARE_OFFSET.pack(int(value.utcoffset().total_seconds() // 60))
+
+def _write_bytes(out: bytearray, value):
+    out.append(T_BYTES)
+    _write_varint(out, len(value))
+    out += value
+
+_WRITERS: Dict[type, Callable[[bytearray, Any], None]] = {
+    int: _write_int,
+    float: _write_float,
+    str: _write_str,
+    list: _write_list,
+    tuple: _write_list,
+    dict: _write_dict,
+    datetime: _write_datetime,
+    bytes: _write_bytes,
+    bytearray: _write_bytes
+}
+
+def write_value(out: bytearray, value: Any):
+    """Append one tagged value. Types outside the format are stored as str (like json default=str)."""
+    if value is None:
+        out.append(T_NONE)
+    elif value is True:
+        out.append(T_TRUE)
+    elif value is False:
+        out.append(T_FALSE)
+    else:
+        writer = _WRITERS.get(type(value))
+        if writer is not None:
+            writer(out, value)
+        elif isinstance(value, Enum):
+            write_value(out, value.value)
+        elif isinstance(value, (set, frozenset)):
+            _write_list(out, list(value))
+        elif hasattr(value, 'tolist'):
+            write_value(out, value.tolist())  # NumPy arrays and scalars
+        else:
+            for base, base_writer in _WRITERS.items():
+                if isinstance(value, base):
+                    base_writer(out, value)
+                    return
+            _write_str(out, str(value))
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    byte = data[pos]
+    if byte < 0x80:
+        return byte, pos + 1  # Fast path: lengths and small ints fit one byte
+    result, shift = byte & 0x7F, 7
+    while True:
+        pos += 1
+        byte = data[pos]
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos + 1
+        shift += 7
+
+def _unzigzag(value: int) -> int:
+    return (value >> 1) if not value & 1 else -((value + 1) >> 1)
+
+def _read_value(data: bytes, pos: int) -> Tuple[Any, int]:
+    """Decode the value starting at pos; returns (value, next position)"""
+    tag = data[pos]
+    pos += 1
+    if tag == T_STR:
+        size, pos = _read_varint(data, pos)
+        end = pos + size
+        return data[pos:end].decode('utf-8'), end
+    if tag == T_INT:
+        value, pos = _read_varint(data, pos)
+        return _unzigzag(value), pos
+    if tag == T_DICT:
+        count, pos = _read_varint(data, pos)
+        result = {}
+        for _ in range(count):
+            key, pos = _read_value(data, pos)
+            result[key], pos = _read_value(data, pos)
+        return result, pos
+    if tag == T_NONE:
+        return None, pos
+    if tag == T_TRUE:
+        return True, pos
+    if tag == T_FALSE:
+        return False, pos
+    if tag == T_FLOAT:
+        return FLOAT.unpack_from(data, pos)[0], pos + 8
+    if tag == T_LIST:
+        count, pos = _read_varint(data, pos)
+        result = []
+        for _ in range(count):
+            item, pos = _read_value(data, pos)
+            result.append(item)
+        return result, pos
+    if tag == T_F64_ARRAY:
+        count, pos = _read_varint(data, pos)
+        return list(struct.unpack_from(f'<{count}d', data, pos)), pos + 8 * count
+    if tag == T_DATETIME:
+        value, pos = _read_varint(data, pos)
+        return NAIVE_EPOCH + timedelta(microseconds=_unzigzag(value)), pos
+    if tag == T_DATETIME_TZ:
+        value, pos = _read_varint(data, pos)
+        offset = AWARE_OFFSET.unpack_from(data, pos)[0]
+        instant = UTC_EPOCH + timedelta(microseconds=_unzigzag(value))
+        return instant.astimezone(timezone(timedelta(minutes=offset))), pos + 2
+    if tag == T_BYTES:
+        size, pos = _read_varint(data, pos)
+        end = pos + size
+        return bytes(data[pos:end]), end
+    raise CodecError(f"Unknown value tag {tag}")
+
+def encode_value(value: Any) -> bytes:
+    out = bytearray()
+    write_value(out, value)
+    return bytes(out)
+
+def decode_value(data: bytes) -> Any:
+    return _read_value(data, 0)[0]
+
+# ---------------------------------------------------------------------------
+# Record schemas
+
+class RecordSchema:
+    """
+    Maps a dataclass onto numbered fields. `fields` is {field_id: attribute};
+    `enums` names attributes to rebuild as Enum members on decode.
+    """
+
+    def __init__(self, schema_id: int, cls: Type, fields: Dict[int, str], enums: Dict[str, Type[Enum]] = None):
+        if len(set(fields.values())) != len(fields):
+            raise ValueError(f"Duplicate attribute in schema {schema_id}")
+        self.schema_id = schema_id
+        self.cls = cls
+        self.fields = fields
+        self.enums = enums or {}
+        self._ordered = sorted(fields.items())
+
+    def encode(self, obj) -> bytes:
+        out = bytearray(HEADER.pack(MAGIC, FORMAT_VERSION, self.schema_id, len(self._ordered)))
+        for field_id, name in self._ordered:
+            _write_varint(out, field_id)
+            write_value(out, getattr(obj, name, None))
+        return bytes(out)
+
+    def decode_fields(self, data: bytes, pos: int, count: int) -> Dict[str, Any]:
+        values = {}
+        fields, enums = self.fields, self.enums
+        for _ in range(count):
+            field_id, pos = _read_varint(data, pos)
+            value, pos = _read_value(data, pos)
+            name = fields.get(field_id)
+            if name is None:
+                continue  # Written by a newer schema; skipped
+            enum = enums.get(name)
+            if enum is not None and value is not None:
+                try:
+                    value = enum(value)
+                except ValueError:
+                    logger.warning(f"Unknown {enum.__name__} value {value!r}; keeping raw value")
+            values[name] = value
+        return values
+
+    def decode(self, data: bytes) -> Any:
+        schema_id, count = _read_header(data)
+        if schema_id != self.schema_id:
+            raise CodecError(f"Expected schema {self.schema_id}, found {schema_id}")
+        return self.cls(**_decode_fields(self, data, count))
+
+_SCHEMAS: Dict[int, RecordSchema] = {}
+
+def register_schema(schema: RecordSchema) -> RecordSchema:
+    existing = _SCHEMAS.get(schema.schema_id)
+    if existing is not None and existing.cls is not schema.cls:
+        raise ValueError(f"Schema id {schema.schema_id} already used by {existing.cls.__name__}")
+    _SCHEMAS[schema.schema_id] = schema
+    return schema
+
+def _read_header(data: bytes) -> Tuple[int, int]:
+    if len(data) < HEADER.size:
+        raise CodecError("Truncated record header")
+    magic, version, schema_id, count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise CodecError("Not an encoded record")
+    if version > FORMAT_VERSION:
+        raise CodecError(f"Record format version {version} is newer than supported ({FORMAT_VERSION})")
+    return schema_id, count
+
+def _decode_fields(schema: RecordSchema, data: bytes, count: int) -> Dict[str, Any]:
+    try:
+        return schema.decode_fields(data, HEADER.size, count)
+    except (IndexError, struct.error, UnicodeDecodeError) as e:
+        raise CodecError(f"Corrupt {schema.cls.__name__} record: {e}") from e
+
+def schema_for(record) -> RecordSchema:
+    for schema in _SCHEMAS.values():
+        if type(record) is schema.cls:
+            return schema
+    raise CodecError(f"No record schema registered for {type(record).__name__}")
+
+def is_encoded(data: bytes) -> bool:
+    return data[:2] == MAGIC
+
+def decode(data) -> Any:
+    """Decode a record using the schema named in its header"""
+    schema_id, count = _read_header(data)
+    schema = _SCHEMAS.get(schema_id)
+    if schema is None:
+        raise CodecError(f"Unknown record schema {schema_id}")
+    return schema.cls(**_decode_fields(schema, data, count))
+
+def loads(data: bytes, allow_pickle: bool = True) -> Any:
+    """Decode a record, accepting pickles written before this format when allowed"""
+    if is_encoded(data):
+        return decode(data)
+    if data[:1] == PICKLE_PREFIX:
+        if not allow_pickle:
+            raise CodecError("Legacy pickle data refused (run the memory_codec converter)")
+        return pickle.loads(data)
+    raise CodecError("Unrecognised record data")
+
+# ---------------------------------------------------------------------------
+# Streams of records
+
+def write_frame(stream: BinaryIO, data: bytes):
+    stream.write(FRAME.pack(len(data)))
+    stream.write(data)
+
+def iter_frames(stream: BinaryIO) -> Iterator[bytes]:
+    """Yield length-prefixed frames one at a time; a torn final frame ends the stream"""
+    while True:
+        prefix = stream.read(FRAME.size)
+        if len(prefix) < FRAME.size:
+            return
+        (size,) = FRAME.unpack(prefix)
+        data = stream.read(size)
+        if len(data) < size:
+            logger.warning("Ignoring truncated record at end of stream")
+            return
+        yield data
+
+def iter_decode(stream: BinaryIO) -> Iterator[Any]:
+    """Streaming decode: one record in memory at a time"""
+    for data in iter_frames(stream):
+        yield decode(data)
+
+# ---------------------------------------------------------------------------
+# Converting stores written with pickle
+
+def convert_segment_store(store, batch_size: int = 500) -> Dict[str, int]:
+    """Re-encode every pickled value in a SegmentLogStore in place"""
+    from .memory_segment_store import OP_PUT
+
+    stats = {'scanned': 0, 'converted': 0, 'failed': 0}
+    batch = []
+    for key in store.keys():
+        data = store.get(key)
+        stats['scanned'] += 1
+        if data is None or is_encoded(data):
+            continue
+        try:
+            record = pickle.loads(data)
+            batch.append((OP_PUT, key, schema_for(record).encode(record)))
+        except Exception as e:
+            logger.error(f"Could not convert {key}: {e}")
+            stats['failed'] += 1
+            continue
+        if len(batch) >= batch_size:
+            store.write_batch(batch)
+            stats['converted'] += len(batch)
+            batch = []
+    if batch:
+        store.write_batch(batch)
+        stats['converted'] += len(batch)
+    store.checkpoint()
+    return stats
+
+def convert_pickle_directory(directory: str, suffix: str = '.rec', remove_source: bool = True) -> Dict[str, int]:
+    """Rewrite <name>.pkl files in a directory as <name><suffix> records"""
+    stats = {'found': 0, 'converted': 0, 'failed': 0}
+    if not os.path.isdir(directory):
+        return stats
+    for name in os.listdir(directory):
+        if not name.endswith('.pkl'):
+            continue
+        stats['found'] += 1
+        source = os.path.join(directory, name)
+        target = os.path.join(directory, name[:-len('.pkl')] + suffix)
+        try:
+            with open(source, 'rb') as f:
+                record = pickle.load(f)
+            data = schema_for(record).encode(record)
+            with open(f"{target}.tmp", 'wb') as f:
+                f.write(data)
+            os.replace(f"{target}.tmp", target)
+            if remove_source:
+                os.remove(source)
+            stats['converted'] += 1
+        except Exception as e:
+            logger.error(f"Could not convert {source}: {e}")
+            stats['failed'] += 1
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert pickled memories and profiles to the binary record format")
+    parser.add_argument('--storage-path', default='./mama_bear_memory',
+                        help="EnhancedMemoryManager storage path")
+    parser.add_argument('--keep-source', action='store_true',
+                        help="Keep profiles/*.pkl after writing their .rec replacement")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    # Registers the MemoryRecord/UserProfile schemas
+    from . import mama_bear_memory_system  # noqa: F401
+    from .memory_segment_store import SegmentLogStore, migrate_pickle_directory
+
+    store = SegmentLogStore(os.path.join(args.storage_path, 'segments'))
+    try:
+        stats = {}
+        legacy_dir = os.path.join(args.storage_path, 'memories')
+        if os.path.isdir(legacy_dir):
+            stats['legacy_files'] = migrate_pickle_directory(legacy_dir, store, remove_source=not args.keep_source)
+        stats['memories'] = convert_segment_store(store)
+    finally:
+        store.close()
+    stats['profiles'] = convert_pickle_directory(os.path.join(args.storage_path, 'profiles'),
+                                                 remove_source=not args.keep_source)
+    print(json.dumps(stats))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,254 @@
+# backend/services/memory_columns.py
+"""
+🐻 Mama Bear Memory Columns
+NumPy-backed columnar metadata for memories with dictionary-encoded
+strings, so filters like "user X, agent Y, last 7 days, importance >= HIGH"
+run vectorized and records are only loaded for the final top-K
+"""
+
+import array
+import bisect
+import logging
+import sys
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .memory_timeline import MemoryMeta
+from .startup import lazy_import
+
+logger = logging.getLogger(__name__)
+
+np = lazy_import('numpy')
+
+NO_AGENT = -1
+
+def _to_ms(timestamp: float) -> int:
+    return int(timestamp * 1000)
+
+class StringDictionary:
+    """Two-way mapping between strings and small integer codes"""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, value: str) -> int:
+        """Code for an existing value, or -1 (never adds)"""
+        return self.codes.get(value, -1)
+
+    def decode(self, code: int) -> Optional[str]:
+        return self.values[code] if code >= 0 else None
+
+class MemoryColumns:
+    """
+    Drop-in replacement for MemoryTimeline that stores one row per memory
+    across typed NumPy columns instead of one Python object per memory.
+    Each user keeps a compact array of its live row numbers ordered by
+    creation time, with a parallel array of those times, so a query binary
+    searches to its cutoff and only touches the user's newest rows.
+    """
+
+    COLUMNS = {
+        'user': 'int32',
+        'agent': 'int32',
+        'type': 'int8',
+        'importance': 'int8',
+        'created_ms': 'int64',
+        'accessed_ms': 'int64',
+        'access_count': 'int32',
+        'alive': 'bool'
+    }
+
+    def __init__(self, initial_capacity: int = 1024):
+        self.users = StringDictionary()
+        self.agents = StringDictionary()
+        self.types = StringDictionary()
+
+        self.capacity = initial_capacity
+        self.columns = {name: np.zeros(initial_capacity, dtype=dtype) for name, dtype in self.COLUMNS.items()}
+        self.size = 0  # Rows in use, including deleted ones
+        self.ids: List[Optional[str]] = []
+        self.rows: Dict[str, int] = {}
+        self.user_rows: Dict[int, array.array] = {}  # user -> live rows, oldest first
+        self.user_created: Dict[int, array.array] = {}  # user -> created_ms of those rows
+        self._lock = threading.Lock()
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self.rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def user_ids(self) -> List[str]:
+        with self._lock:
+            return [self.users.decode(code) for code in self.user_rows]
+
+    def _grow(self):
+        self.capacity *= 2
+        for name, column in self.columns.items():
+            grown = np.zeros(self.capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.columns[name] = grown
+
+    def add(self, memory):
+        with self._lock:
+            if memory.id in self.rows:
+                return
+            if self.size == self.capacity:
+                self._grow()
+
+            row = self.size
+            self.size += 1
+            user = self.users.encode(memory.user_id)
+            created_ms = _to_ms(memory.created_at.timestamp())
+            accessed_at = getattr(memory, 'accessed_at', None)
+
+            c = self.columns
+            c['user'][row] = user
+            c['agent'][row] = self.agents.encode(memory.agent_id) if memory.agent_id else NO_AGENT
+            c['type'][row] = self.types.encode(getattr(memory.type, 'value', memory.type))
+            c['importance'][row] = getattr(memory.importance, 'value', memory.importance)
+            c['created_ms'][row] = created_ms
+            c['accessed_ms'][row] = _to_ms(accessed_at.timestamp()) if accessed_at else created_ms
+            c['access_count'][row] = getattr(memory, 'access_count', 0)
+            c['alive'][row] = True
+
+            self.ids.append(memory.id)
+            self.rows[memory.id] = row
+            self._post(user, row, created_ms)
+
+    def _post(self, user: int, row: int, created_ms: int):
+        """Insert a row into the user's time-ordered postings (an append when it is the newest)"""
+        postings = self.user_rows.setdefault(user, array.array('i'))
+        created = self.user_created.setdefault(user, array.array('q'))
+        if not created or created[-1] <= created_ms:
+            postings.append(row)
+            created.append(created_ms)
+        else:
+            position = bisect.bisect_right(created, created_ms)
+            postings.insert(position, row)
+            created.insert(position, created_ms)
+
+    def _unpost(self, user: int, row: int, created_ms: int):
+        postings, created = self.user_rows[user], self.user_created[user]
+        position = bisect.bisect_left(created, created_ms)
+        while postings[position] != row:
+            position += 1  # Rows created in the same millisecond
+        del postings[position]
+        del created[position]
+
+    def _meta(self, row: int) -> MemoryMeta:
+        c = self.columns
+        return MemoryMeta(
+            id=self.ids[row],
+            user_id=self.users.decode(int(c['user'][row])),
+            agent_id=self.agents.decode(int(c['agent'][row])),
+            type=self.types.decode(int(c['type'][row])),
+            importance=int(c['importance'][row]),
+            created_ts=int(c['created_ms'][row]) / 1000
+        )
+
+    def remove(self, memory_id: str) -> Optional[MemoryMeta]:
+        with self._lock:
+            row = self.rows.pop(memory_id, None)
+            if row is None:
+                return None
+            meta = self._meta(row)
+            self._unpost(int(self.columns['user'][row]), row, int(self.columns['created_ms'][row]))
+            self.columns['alive'][row] = False
+            self.ids[row] = None
+            if self.size - len(self.rows) > max(1024, len(self.rows)):
+                self._compact()
+            return meta
+
+    def _compact(self):
+        """Renumber rows to squeeze out deleted ones"""
+        live = np.flatnonzero(self.columns['alive'][:self.size])
+        for name, column in self.columns.items():
+            column[:len(live)] = column[live]
+            column[len(live):self.size] = 0
+        self.ids = [self.ids[row] for row in live]
+        self.size = len(live)
+        self.rows = {memory_id: row for row, memory_id in enumerate(self.ids)}
+
+        self.user_rows, self.user_created = {}, {}
+        created = self.columns['created_ms'][:self.size]
+        users = self.columns['user'][:self.size]
+        for row in np.argsort(created, kind='stable').tolist():
+            self._post(int(users[row]), row, int(created[row]))
+
+    def get_meta(self, memory_id: str) -> Optional[MemoryMeta]:
+        with self._lock:
+            row = self.rows.get(memory_id)
+            return self._meta(row) if row is not None else None
+
+    def touch(self, memory_id: str, timestamp: float):
+        with self._lock:
+            row = self.rows.get(memory_id)
+            if row is not None:
+                self.columns['accessed_ms'][row] = _to_ms(timestamp)
+                self.columns['access_count'][row] += 1
+
+    def recent(self, user_id: str, since: datetime = None, limit: int = 20, agent_id: str = None,
+               memory_type: str = None, min_importance: int = None) -> List[str]:
+        """
+        Newest-first memory IDs matching every given filter. The user's rows are
+        already in time order, so the cutoff is a binary search and the filters
+        run over windows of rows walking back from the newest, stopping once
+        `limit` rows match.
+        """
+        with self._lock:
+            user = self.users.lookup(user_id)
+            postings = self.user_rows.get(user)
+            agent = self.agents.lookup(agent_id) if agent_id is not None else None
+            memory_type = self.types.lookup(memory_type) if memory_type is not None else None
+            if not postings or agent == -1 or memory_type == -1:
+                return []  # Unknown user, agent or type
+
+            start = bisect.bisect_left(self.user_created[user], _to_ms(since.timestamp())) if since is not None else 0
+            end = len(postings)
+            window = max(4 * limit, 256)
+            c = self.columns
+            results: List[str] = []
+            while end > start and len(results) < limit:
+                low = max(start, end - window)
+                rows = np.array(postings[low:end], dtype=np.int32)  # A copy: a live buffer view would block inserts
+                mask = np.ones(len(rows), dtype=bool)
+                if agent is not None:
+                    mask &= c['agent'][rows] == agent
+                if memory_type is not None:
+                    mask &= c['type'][rows] == memory_type
+                if min_importance is not None:
+                    mask &= c['importance'][rows] >= min_importance
+                results.extend(self.ids[row] for row in rows[mask][::-1][:limit - len(results)].tolist())
+                end, window = low, window * 2
+            return results
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            column_bytes = sum(column.nbytes for column in self.columns.values())
+            posting_bytes = sum(postings.itemsize * len(postings)
+                                for index in (self.user_rows, self.user_created) for postings in index.values())
+            id_bytes = sum(sys.getsizeof(memory_id) for memory_id in self.ids if memory_id)
+            total = column_bytes + posting_bytes + id_bytes + sys.getsizeof(self.rows)
+            return {
+                'memories': len(self.rows),
+                'users': len(self.user_rows),
+                'rows': self.size,
+                'capacity': self.capacity,
+                'agents': len(self.agents),
+                'types': len(self.types),
+                'approx_bytes': total,
+                'bytes_per_memory': round(total / len(self.rows), 1) if self.rows else None
+            }
@@ -0,0 +1,383 @@
+# backend/services/memory_embeddings.py
+"""
+🐻 Mama Bear Memory Embeddings
+Offline hashed TF-IDF embeddings and per-user vector indexes for semantic recall
+"""
+
+import asyncio
+import importlib.util
+import logging
+import math
+import re
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from .startup import lazy_import
+
+logger = logging.getLogger(__name__)
+
+# NumPy is optional; without it semantic recall is simply disabled
+np = lazy_import('numpy')
+NUMPY_AVAILABLE = importlib.util.find_spec('numpy') is not None
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]+")
+
+class HashedTfidfEncoder:
+    """
+    Feature-hashed TF-IDF over word unigrams and bigrams.
+    Document frequencies are learned online as memories are written, so no
+    vocabulary or model file is needed. Output vectors are L2-normalized.
+    """
+
+    def __init__(self, dim: int = 256, use_bigrams: bool = True):
+        self.dim = dim
+        self.use_bigrams = use_bigrams
+        self.doc_freq = np.zeros(dim, dtype=np.float32)
+        self.doc_count = 0
+        self._lock = threading.Lock()
+
+    def _features(self, text: str) -> Counter:
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        features = Counter(tokens)
+        if self.use_bigrams:
+            features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+        return features
+
+    def _hashed(self, features: Counter) -> Tuple[List[int], List[float]]:
+        # Signed hashing keeps collisions from biasing dot products upward
+        buckets = defaultdict(float)
+        for feature, count in features.items():
+            h = zlib.crc32(feature.encode('utf-8'))
+            sign = 1.0 if h & 0x80000000 else -1.0
+            buckets[h % self.dim] += sign * (1.0 + math.log(count))
+        return list(buckets.keys()), list(buckets.values())
+
+    def observe(self, texts: List[str]):
+        """Count documents toward the frequencies without encoding them (restart rebuilds)"""
+        rows = [self._hashed(self._features(text))[0] for text in texts]
+        with self._lock:
+            for indices in rows:
+                if indices:
+                    self.doc_freq[indices] += 1
+                    self.doc_count += 1
+
+    def encode(self, text: str, update_stats: bool = True):
+        """Encode one document; write-time calls also update document frequencies"""
+        indices, values = self._hashed(self._features(text))
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if not indices:
+            return vector
+
+        with self._lock:
+            if update_stats:
+                self.doc_freq[indices] += 1
+                self.doc_count += 1
+            idf = np.log((1 + self.doc_count) / (1 + self.doc_freq[indices])) + 1.0
+
+        vector[indices] = np.asarray(values, dtype=np.float32) * idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+class IVFIndex:
+    """
+    Inverted-file approximate index: spherical k-means centroids, one row list
+    per centroid, and `nprobe` lists scanned per query
+    """
+
+    def __init__(self, nlist: int, nprobe: int = 8, iterations: int = 8, max_training_rows: int = 50000):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.iterations = iterations
+        self.max_training_rows = max_training_rows
+        self.centroids = None
+        self.lists: List = []
+
+    def _assign(self, vectors, chunk: int = 65536):
+        labels = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), chunk):
+            labels[start:start + chunk] = np.argmax(vectors[start:start + chunk] @ self.centroids.T, axis=1)
+        return labels
+
+    def build(self, vectors, rows):
+        """Train centroids on a sample of `vectors` and bucket `rows` (their row numbers)"""
+        rng = np.random.default_rng(0)
+        sample = vectors
+        if len(vectors) > self.max_training_rows:
+            sample = vectors[rng.choice(len(vectors), self.max_training_rows, replace=False)]
+
+        self.centroids = sample[rng.choice(len(sample), self.nlist, replace=False)].copy()
+        for _ in range(self.iterations):
+            labels = self._assign(sample)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            norms[empty] = 1.0
+            self.centroids = (sums / norms).astype(np.float32)
+
+        labels = self._assign(vectors)
+        order = np.argsort(labels, kind='stable')
+        bounds = np.searchsorted(labels[order], np.arange(self.nlist + 1))
+        self.lists = [rows[order[bounds[i]:bounds[i + 1]]] for i in range(self.nlist)]
+
+    def candidates(self, query):
+        probes = np.argpartition(-(self.centroids @ query), min(self.nprobe, self.nlist) - 1)[:self.nprobe]
+        return np.concatenate([self.lists[p] for p in probes])
+
+class UserVectorIndex:
+    """
+    One user's embeddings in a contiguous float32 matrix.
+    Brute-force search below `ivf_threshold` live vectors, IVF above it;
+    vectors added after the IVF was built are scanned exactly until the next rebuild.
+
+    Thread-safe: add/remove/search hold the index lock. Queries never build the
+    IVF; `build_ivf` trains on a snapshot outside the lock and installs the
+    result only if no compaction renumbered the rows in the meantime.
+    """
+
+    def __init__(self, dim: int, ivf_threshold: int = 20000, nprobe: int = 8):
+        self.dim = dim
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+
+        self.matrix = np.zeros((64, dim), dtype=np.float32)
+        self.valid = np.zeros(64, dtype=bool)
+        self.size = 0
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+
+        self.ivf: Optional[IVFIndex] = None
+        self.ivf_rows = 0  # Rows covered by the current IVF build
+        self.layout = 0  # Bumped whenever compaction renumbers rows
+
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def add(self, memory_id: str, vector):
+        with self._lock:
+            self._add(memory_id, vector)
+
+    def add_many(self, memory_ids: List[str], vectors):
+        with self._lock:
+            for memory_id, vector in zip(memory_ids, vectors):
+                self._add(memory_id, vector)
+
+    def _add(self, memory_id: str, vector):
+        row = self.rows.get(memory_id)
+        if row is None:
+            if self.size == len(self.matrix):
+                self._grow()
+            row = self.size
+            self.size += 1
+            self.ids.append(memory_id)
+            self.rows[memory_id] = row
+        self.matrix[row] = vector
+        self.valid[row] = True
+
+    def remove(self, memory_id: str):
+        with self._lock:
+            row = self.rows.pop(memory_id, None)
+            if row is None:
+                return
+            self.valid[row] = False
+            if self.size > 1024 and len(self.rows) < self.size * 0.75:
+                self._compact()
+
+    def _grow(self):
+        capacity = len(self.matrix) * 2
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        matrix[:self.size] = self.matrix[:self.size]
+        valid = np.zeros(capacity, dtype=bool)
+        valid[:self.size] = self.valid[:self.size]
+        self.matrix, self.valid = matrix, valid
+
+    def _compact(self):
+        """Drop removed rows; row numbers change, so the IVF is dropped until the next background build"""
+        live = np.flatnonzero(self.valid[:self.size])
+        self.matrix = np.ascontiguousarray(self.matrix[live])
+        self.valid = np.ones(len(live), dtype=bool)
+        self.ids = [self.ids[row] for row in live]
+        self.rows = {memory_id: row for row, memory_id in enumerate(self.ids)}
+        self.size = len(live)
+        self.ivf = None
+        self.ivf_rows = 0
+        self.layout += 1
+
+    def needs_ivf(self) -> bool:
+        """Big enough for an IVF, and none built yet or the unindexed tail outgrew the indexed part"""
+        return len(self.rows) >= self.ivf_threshold and (self.ivf is None or self.size >= 2 * self.ivf_rows)
+
+    def build_ivf(self) -> bool:
+        """Train an IVF on a snapshot of the live rows (k-means runs without the lock); True if installed"""
+        with self._lock:
+            if not self.needs_ivf():
+                return False
+            rows = np.flatnonzero(self.valid[:self.size])
+            vectors = self.matrix[rows].copy()
+            covered, layout = self.size, self.layout
+
+        ivf = IVFIndex(nlist=max(16, int(math.sqrt(len(rows)))), nprobe=self.nprobe)
+        ivf.build(vectors, rows)
+
+        with self._lock:
+            if self.layout != layout:
+                return False  # Compacted meanwhile: the snapshot's row numbers are stale
+            self.ivf, self.ivf_rows = ivf, covered
+            return True
+
+    def search(self, query, k: int = 10, exact: bool = False) -> List[Tuple[str, float]]:
+        with self._lock:
+            return self._search(query, k, exact)
+
+    def _search(self, query, k: int, exact: bool) -> List[Tuple[str, float]]:
+        if not self.rows:
+            return []
+
+        # Shrunk below the threshold since the build: exact search is cheap again
+        if self.ivf is None or exact or len(self.rows) < self.ivf_threshold:
+            scores = self.matrix[:self.size] @ query
+            scores[~self.valid[:self.size]] = -np.inf
+            candidates = None
+        else:
+            tail = np.arange(self.ivf_rows, self.size)
+            candidates = np.concatenate([self.ivf.candidates(query), tail])
+            candidates = candidates[self.valid[candidates]]
+            scores = self.matrix[candidates] @ query
+
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for i in top:
+            if not np.isfinite(scores[i]):
+                continue
+            row = candidates[i] if candidates is not None else i
+            results.append((self.ids[row], float(scores[i])))
+        return results
+
+class MemoryEmbeddingService:
+    """
+    Computes embeddings in a worker pool and keeps the per-user vector indexes.
+    Safe to call from any thread: each index locks its own add/remove/search,
+    and IVF (re)builds run on the worker pool instead of inside a query.
+    """
+
+    def __init__(self, dim: int = 256, workers: int = 2, ivf_threshold: int = 20000, nprobe: int = 8):
+        self.dim = dim
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.encoder = HashedTfidfEncoder(dim=dim)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='memory-embed')
+        self.indexes: Dict[str, UserVectorIndex] = {}
+        self._lock = threading.Lock()
+        self._builds: Dict[str, Any] = {}  # user_id -> pending IVF build future
+
+        self.metrics = defaultdict(float)
+
+    def _encode_timed(self, text: str, update_stats: bool):
+        start = time.perf_counter()
+        vector = self.encoder.encode(text, update_stats=update_stats)
+        self.metrics['encode_ms'] += (time.perf_counter() - start) * 1000
+        self.metrics['encoded'] += 1
+        return vector
+
+    async def embed(self, text: str, update_stats: bool = True):
+        """Encode off the event loop; write-time calls update document frequencies"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._encode_timed, text, update_stats)
+
+    async def observe(self, texts: List[str]):
+        """Restore document frequencies for stored memories, whose vectors are reloaded as-is"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.encoder.observe, texts)
+
+    def _index_for(self, user_id: str) -> UserVectorIndex:
+        with self._lock:
+            if user_id not in self.indexes:
+                self.indexes[user_id] = UserVectorIndex(self.dim, ivf_threshold=self.ivf_threshold, nprobe=self.nprobe)
+            return self.indexes[user_id]
+
+    def add(self, user_id: str, memory_id: str, vector):
+        index = self._index_for(user_id)
+        index.add(memory_id, np.asarray(vector, dtype=np.float32))
+        self._schedule_ivf_build(user_id, index)
+
+    def remove(self, user_id: str, memory_id: str):
+        index = self.indexes.get(user_id)
+        if index is not None:
+            index.remove(memory_id)
+            self._schedule_ivf_build(user_id, index)
+
+    def _schedule_ivf_build(self, user_id: str, index: UserVectorIndex):
+        if not index.needs_ivf():
+            return
+        with self._lock:
+            if user_id in self._builds:
+                return
+            self._builds[user_id] = self.executor.submit(self._build_ivf, user_id, index)
+
+    def _build_ivf(self, user_id: str, index: UserVectorIndex):
+        start = time.perf_counter()
+        try:
+            if index.build_ivf():
+                self.metrics['ivf_builds'] += 1
+                self.metrics['ivf_build_ms'] += (time.perf_counter() - start) * 1000
+        except Exception as e:
+            logger.warning(f"IVF build for {user_id} failed: {e}")
+        finally:
+            with self._lock:
+                self._builds.pop(user_id, None)
+        # Writes that landed during the build may already call for the next one
+        self._schedule_ivf_build(user_id, index)
+
+    def wait_for_index_builds(self, timeout: float = None):
+        """Block until pending IVF builds finish (tests and benchmarks)"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            with self._lock:
+                pending = list(self._builds.values())
+            if not pending:
+                return
+            for future in pending:
+                future.result(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+    def search(self, user_id: str, query_vector, k: int = 10) -> List[Tuple[str, float]]:
+        index = self.indexes.get(user_id)
+        if index is None:
+            return []
+        start = time.perf_counter()
+        results = index.search(np.asarray(query_vector, dtype=np.float32), k)
+        self.metrics['search_ms'] += (time.perf_counter() - start) * 1000
+        self.metrics['searches'] += 1
+        return results
+
+    def get_status(self) -> Dict[str, Any]:
+        encoded, searches = self.metrics['encoded'], self.metrics['searches']
+        with self._lock:
+            indexes = list(self.indexes.values())
+            pending_builds = len(self._builds)
+        return {
+            'dim': self.dim,
+            'users_indexed': len(indexes),
+            'vectors': sum(len(index) for index in indexes),
+            'ivf_indexes': sum(1 for index in indexes if index.ivf is not None),
+            'ivf_builds': int(self.metrics['ivf_builds']),
+            'ivf_builds_pending': pending_builds,
+            'encoded': int(encoded),
+            'avg_encode_ms': round(self.metrics['encode_ms'] / encoded, 3) if encoded else None,
+            'searches': int(searches),
+            'avg_search_ms': round(self.metrics['search_ms'] / searches, 3) if searches else None
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,275 @@
+# backend/services/memory_ingestion.py
+"""
+🐻 Mama Bear Memory Ingestion
+Durable background queue that takes interaction persistence and enrichment
+off the chat response path: callers journal and enqueue, a worker enriches
+and persists in batches
+"""
+
+import asyncio
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class IngestionJournal:
+    """
+    Append-only JSON-lines journal of accepted items and completion markers.
+    Items without a completion marker are replayed after a restart; the file
+    is truncated whenever nothing is outstanding. Items that keep failing are
+    moved to a `.dead` file next to the journal instead of being replayed.
+
+    Appends are flushed to the OS but only fsynced with `fsync=True`: by
+    default the journal survives a process crash, not a power loss.
+    """
+
+    def __init__(self, path: str, fsync: bool = False, truncate_bytes: int = 1024 * 1024):
+        self.path = path
+        self.dead_letter_path = f"{path}.dead"
+        self.fsync = fsync
+        self.truncate_bytes = truncate_bytes
+        self._lock = threading.Lock()
+        self._next_seq = 0
+        self._outstanding = set()
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._file = open(path, 'a+', encoding='utf-8')
+
+    def _append(self, lines: List[Dict[str, Any]]):
+        self._file.write(''.join(json.dumps(line, default=str) + '\n' for line in lines))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def append(self, item: Dict[str, Any]) -> int:
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            self._append([{'seq': seq, 'item': item}])
+            self._outstanding.add(seq)
+            return seq
+
+    def mark_done(self, seqs: List[int]):
+        with self._lock:
+            self._append([{'done': seq} for seq in seqs])
+            self._settle(seqs)
+
+    def dead_letter(self, seq: int, item: Dict[str, Any], error: str):
+        """Move an item that cannot be processed out of the replay set, keeping it for inspection"""
+        with self._lock:
+            with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'item': item, 'error': error, 'failed_at': time.time()}, default=str) + '\n')
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            self._append([{'dead': seq}])
+            self._settle([seq])
+
+    def _settle(self, seqs: List[int]):
+        self._outstanding.difference_update(seqs)
+        if not self._outstanding and self._file.tell() >= self.truncate_bytes:
+            self._file.truncate(0)
+            self._file.seek(0)
+
+    def recover(self) -> List[Dict[str, Any]]:
+        """Items accepted before a restart that were never marked done"""
+        with self._lock:
+            self._file.seek(0)
+            pending: Dict[int, Dict[str, Any]] = {}
+            for line in self._file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # Torn tail from a crash mid-append
+                if 'done' in entry or 'dead' in entry:
+                    pending.pop(entry.get('done', entry.get('dead')), None)
+                else:
+                    pending[entry['seq']] = entry['item']
+
+            # Start a fresh journal; recovered items are re-journaled by the caller
+            self._file.truncate(0)
+            self._file.seek(0)
+            return [pending[seq] for seq in sorted(pending)]
+
+    def size(self) -> int:
+        with self._lock:
+            return self._file.tell()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+class InteractionIngestionQueue:
+    """
+    Bounded queue in front of an async batch processor.
+
+    `submit` journals the item and hands it to a worker thread that runs its
+    own event loop, so it keeps working whichever loop the request ran on.
+    When the queue is full, callers wait up to `enqueue_timeout` and then
+    process their own item inline - slowing producers down rather than
+    dropping interactions or growing without bound.
+    """
+
+    def __init__(self, process_batch: Callable[[List[Dict[str, Any]]], Awaitable[Any]], journal_path: str,
+                 max_queue: int = 1000, batch_size: int = 32, batch_window: float = 0.05,
+                 enqueue_timeout: float = 0.5, fsync: bool = False):
+        self.process_batch = process_batch
+        self.journal = IngestionJournal(journal_path, fsync=fsync)
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.enqueue_timeout = enqueue_timeout
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._worker: Optional[threading.Thread] = None
+        self._idle = threading.Condition()
+        self._in_progress = 0
+        self._start_lock = threading.Lock()
+        self._recovered: List[tuple] = []
+
+        self.metrics = defaultdict(float)
+
+    def start(self):
+        with self._start_lock:
+            if self._worker is not None:
+                return
+            # Anything journaled by a previous process goes first, under new sequence numbers
+            self._recovered = [(self.journal.append(item), item, time.monotonic()) for item in self.journal.recover()]
+            self.metrics['recovered'] += len(self._recovered)
+            with self._idle:
+                self._in_progress += len(self._recovered)
+            self._worker = threading.Thread(target=self._run, name='memory-ingestion', daemon=True)
+            self._worker.start()
+
+    async def submit(self, item: Dict[str, Any]):
+        start = time.perf_counter()
+        if self._worker is None:
+            self.start()
+        seq = self.journal.append(item)
+        entry = (seq, item, time.monotonic())
+        with self._idle:
+            self._in_progress += 1
+
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.metrics['backpressure_waits'] += 1
+            try:
+                await asyncio.to_thread(self._queue.put, entry, True, self.enqueue_timeout)
+            except queue.Full:
+                # Still saturated: do the work on the caller's path
+                self.metrics['inline_fallbacks'] += 1
+                try:
+                    await self._process([entry])
+                finally:
+                    with self._idle:
+                        self._in_progress -= 1
+                        self._idle.notify_all()
+                return
+
+        self.metrics['enqueued'] += 1
+        self.metrics['enqueue_ms_total'] += (time.perf_counter() - start) * 1000
+        self.metrics['max_depth'] = max(self.metrics['max_depth'], self._queue.qsize())
+
+    def _next_batch(self) -> List[tuple]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+        recovered, self._recovered = self._recovered, []
+        batches = [recovered[position:position + self.batch_size] for position in range(0, len(recovered), self.batch_size)]
+
+        while True:
+            batch = batches.pop(0) if batches else self._next_batch()
+            try:
+                loop.run_until_complete(self._process(batch))
+            finally:
+                with self._idle:
+                    self._in_progress -= len(batch)
+                    self._idle.notify_all()
+
+    async def _process(self, batch: List[tuple]):
+        start = time.perf_counter()
+        done = [seq for seq, _, _ in batch]
+        try:
+            await self.process_batch([item for _, item, _ in batch])
+        except Exception as e:
+            # Retry one by one so a single bad item does not take the rest of the batch with it
+            logger.warning(f"Memory ingestion batch of {len(batch)} failed, retrying items singly: {e}")
+            self.metrics['batch_retries'] += 1
+            done = []
+            for seq, item, _ in batch:
+                try:
+                    await self.process_batch([item])
+                    done.append(seq)
+                except Exception as item_error:
+                    # A bad item must not be replayed forever; it is dead-lettered instead
+                    self.metrics['failed'] += 1
+                    logger.error(f"Memory ingestion item {seq} failed, dead-lettering it: {item_error}")
+                    try:
+                        self.journal.dead_letter(seq, item, str(item_error))
+                    except OSError as dead_letter_error:
+                        logger.error(f"Could not dead-letter item {seq}; it stays journaled: {dead_letter_error}")
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        now = time.monotonic()
+        self.metrics['batches'] += 1
+        self.metrics['processed'] += len(done)
+        self.metrics['process_ms_total'] += elapsed_ms
+        self.metrics['queue_wait_ms_total'] += sum(now - queued_at for _, _, queued_at in batch) * 1000
+        if done:
+            self.journal.mark_done(done)
+
+    def drain(self, timeout: float = None) -> bool:
+        """Block until everything submitted so far has been processed"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._in_progress == 0, timeout)
+
+    async def close(self, timeout: float = 30.0):
+        if not await asyncio.to_thread(self.drain, timeout):
+            logger.warning("Memory ingestion queue not drained; remaining items stay journaled")
+        self.journal.close()
+
+    def get_status(self) -> Dict[str, Any]:
+        enqueued = self.metrics['enqueued']
+        processed = self.metrics['processed']
+        avg_enqueue_ms = self.metrics['enqueue_ms_total'] / enqueued if enqueued else 0.0
+        avg_process_ms = self.metrics['process_ms_total'] / processed if processed else 0.0
+        return {
+            'queue_depth': self._queue.qsize(),
+            'max_queue': self.max_queue,
+            'max_depth': int(self.metrics['max_depth']),
+            'enqueued': int(enqueued),
+            'processed': int(processed),
+            'batches': int(self.metrics['batches']),
+            'failed': int(self.metrics['failed']),
+            'batch_retries': int(self.metrics['batch_retries']),
+            'recovered': int(self.metrics['recovered']),
+            'backpressure_waits': int(self.metrics['backpressure_waits']),
+            'inline_fallbacks': int(self.metrics['inline_fallbacks']),
+            'avg_enqueue_ms': round(avg_enqueue_ms, 3),
+            'avg_process_ms': round(avg_process_ms, 3),
+            'avg_queue_wait_ms': round(self.metrics['queue_wait_ms_total'] / processed, 3) if processed else None,
+            # Work the caller no longer waits for, per interaction and in total
+            'latency_removed_ms_per_item': round(max(0.0, avg_process_ms - avg_enqueue_ms), 3),
+            'latency_removed_ms_total': round(max(0.0, avg_process_ms - avg_enqueue_ms) * enqueued, 1),
+            'journal_bytes': self.journal.size()
+        }
@@ -4,27 +4,107 @@ Handles persistent conversation memory using Mem0.ai and local storage
 """
 
 import asyncio
+import base64
 import logging
-from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from datetime import datetime
 import json
 import os
+import re
 import sqlite3
+import threading
+import time
 from pathlib import Path
 
+from .context_cache import ContextCache
+from .conversation_compaction import ConversationCompactor, Summarizer, fit_to_budget, format_turn
+from .mem0_outbox import Mem0HttpTransport, Mem0Outbox, interaction_payload
+from .sqlite_pool import SQLitePool
+
 logger = logging.getLogger(__name__)
 
+SEARCH_TERM = re.compile(r'\w+', re.UNICODE)
+
+def fts_query(query: str) -> Optional[str]:
+    """Free text to an FTS5 MATCH expression: every word quoted (no operator injection), any may match"""
+    terms = SEARCH_TERM.findall(query or '')
+    if not terms:
+        return None
+    return ' OR '.join(f'"{term}"' for term in terms)
+
+def encode_cursor(timestamp: str, conversation_id: int) -> str:
+    """Opaque history cursor for the last row of a page"""
+    return base64.urlsafe_b64encode(json.dumps([timestamp, conversation_id]).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Inverse of encode_cursor; ValueError for anything it did not produce"""
+    try:
+        timestamp, conversation_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except Exception as e:
+        raise ValueError(f"Invalid history cursor: {cursor!r}") from e
+    if not isinstance(timestamp, str) or not isinstance(conversation_id, int):
+        raise ValueError(f"Invalid history cursor: {cursor!r}")
+    return timestamp, conversation_id
+
 class MemoryManager:
     """Manages persistent memory for Mama Bear conversations"""
     
-    def __init__(self):
+    # Ground truth for memory_stats: full scans, only run on creation and by the periodic reconcile
+    STATS_QUERY = """
+        SELECT 'conversations', (SELECT COUNT(*) FROM conversations)
+        UNION ALL SELECT 'unique_users', (SELECT COUNT(DISTINCT user_id) FROM conversation_counts)
+        UNION ALL SELECT 'session_rows', (SELECT COUNT(*) FROM session_memory)
+    """
+    
+    def __init__(self, summarizer: Summarizer = None, db_path: str = None):
         self.mem0_enabled = os.getenv('MEM0_MEMORY_ENABLED', 'True').lower() == 'true'
         self.mem0_api_key = os.getenv('MEM0_API_KEY', 'm0-tBwWs1ygkxcbEiVvX6iXdwiJ42epw8a3wyoEUlpg')
-        self.db_path = Path("backend/sanctuary_memory.db")
+        self.db_path = Path(db_path or "backend/sanctuary_memory.db")
+        
+        # Prompt context: rolling summary of older turns + newest turns within a token budget
+        self.context_token_budget = int(os.getenv('CONTEXT_TOKEN_BUDGET', '1500'))
+        self.summary_keep_recent = int(os.getenv('SUMMARY_KEEP_RECENT', '6'))
+        self.summary_batch_turns = int(os.getenv('SUMMARY_BATCH_TURNS', '8'))
+        self.compactor = ConversationCompactor(self._compact_conversation, summarizer)
+        
+        # Built contexts per (user, page); the writes below invalidate or patch them
+        self.context_cache = ContextCache(
+            max_entries=int(os.getenv('CONTEXT_CACHE_MAX_ENTRIES', '2000')),
+            ttl=float(os.getenv('CONTEXT_CACHE_TTL', '60'))
+        )
+        
+        # Retention: keep the newest N turns per (user, page); trim once the count passes N + slack
+        self.conversation_retention = int(os.getenv('CONVERSATION_RETENTION', '1000'))
+        self.conversation_retention_slack = int(os.getenv('CONVERSATION_RETENTION_SLACK', '100'))
+        self.retention_sweep_interval = float(os.getenv('CONVERSATION_SWEEP_INTERVAL', '300'))
+        self.retention_metrics = {'trims': 0, 'rows_trimmed': 0, 'sweeps': 0, 'rows_swept': 0}
+        
+        # Status counters are kept by triggers; the sweeper re-derives them from scratch now and then
+        self.stats_reconcile_interval = float(os.getenv('MEMORY_STATS_RECONCILE_INTERVAL', '3600'))
+        self.stats_metrics = {'reconciles': 0, 'drift_corrected': 0, 'expired_sessions_purged': 0,
+                              'last_reconciled': None}
+        self._sweep_stop = threading.Event()
+        
+        # Long-lived WAL connections: one writer, a pool of readers, all off the event loop
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = SQLitePool(str(self.db_path), readers=int(os.getenv('MEMORY_DB_READERS', '4')))
         
         # Initialize local database
         self._init_database()
         
+        # Bulk retention cleanup runs in the background
+        self._sweeper = threading.Thread(target=self._sweep_loop, name='conversation-retention', daemon=True)
+        self._sweeper.start()
+        
+        # Real uploads need an explicitly configured key; they are queued in an outbox table in the
+        # conversations database, so a turn and its upload commit together
+        self.mem0_outbox = None
+        if self.mem0_enabled and os.getenv('MEM0_API_KEY'):
+            self.mem0_outbox = Mem0Outbox(str(self.db_path), Mem0HttpTransport(api_key=self.mem0_api_key))
+            legacy_outbox = self.db_path.parent / 'mem0_outbox.db'
+            if legacy_outbox.exists():
+                self.mem0_outbox.adopt(str(legacy_outbox))
+        
         # Initialize Mem0 if enabled
         if self.mem0_enabled:
             try:
@@ -38,47 +118,183 @@ class MemoryManager:
     
     def _init_database(self):
         """Initialize local SQLite database for memory storage"""
+        self.db.write_sync(self._create_schema)
+        self.search_available = self.db.write_sync(self._create_search_index)
+    
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection):
+        existing = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('conversation_counts', 'memory_stats')"
+        )}
         
-        # Create directory if it doesn't exist
-        self.db_path.parent.mkdir(exist_ok=True)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS conversations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                page_context TEXT NOT NULL,
+                message TEXT NOT NULL,
+                response TEXT NOT NULL,
+                metadata TEXT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
         
-        with sqlite3.connect(self.db_path) as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS user_preferences (
+                user_id TEXT PRIMARY KEY,
+                preferences TEXT,
+                last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS session_memory (
+                user_id TEXT,
+                page_context TEXT,
+                memory_key TEXT,
+                memory_value TEXT,
+                expires_at DATETIME,
+                PRIMARY KEY (user_id, page_context, memory_key)
+            )
+        """)
+        
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS conversation_summaries (
+                user_id TEXT NOT NULL,
+                page_context TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                summarized_through_id INTEGER NOT NULL,
+                turns_summarized INTEGER NOT NULL DEFAULT 0,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (user_id, page_context)
+            )
+        """)
+        
+        # Live row count per (user, page); a row exists only while the page has turns
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS conversation_counts (
+                user_id TEXT NOT NULL,
+                page_context TEXT NOT NULL,
+                row_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, page_context)
+            )
+        """)
+        if 'conversation_counts' not in existing:
             conn.execute("""
-                CREATE TABLE IF NOT EXISTS conversations (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id TEXT NOT NULL,
-                    page_context TEXT NOT NULL,
-                    message TEXT NOT NULL,
-                    response TEXT NOT NULL,
-                    metadata TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
+                INSERT INTO conversation_counts (user_id, page_context, row_count)
+                SELECT user_id, page_context, COUNT(*) FROM conversations GROUP BY user_id, page_context
             """)
-            
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS user_preferences (
-                    user_id TEXT PRIMARY KEY,
-                    preferences TEXT,
-                    last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
+        
+        # Whole-database counters behind get_status: conversations, unique_users, session_rows
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS memory_stats (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        if 'memory_stats' not in existing:
+            conn.execute("DELETE FROM conversation_counts WHERE row_count <= 0")
+            conn.execute(f"INSERT INTO memory_stats (name, value) {MemoryManager.STATS_QUERY}")
+        
+        # Every insert and delete on conversations (saves, trims, sweeps, manual cleanup) moves the counts
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS conversations_count_insert AFTER INSERT ON conversations BEGIN
+                INSERT INTO conversation_counts (user_id, page_context, row_count) VALUES (new.user_id, new.page_context, 1)
+                ON CONFLICT(user_id, page_context) DO UPDATE SET row_count = row_count + 1;
+                UPDATE memory_stats SET value = value + 1 WHERE name = 'conversations';
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS conversations_count_delete AFTER DELETE ON conversations BEGIN
+                UPDATE conversation_counts SET row_count = row_count - 1
+                WHERE user_id = old.user_id AND page_context = old.page_context;
+                UPDATE memory_stats SET value = value - 1 WHERE name = 'conversations';
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS conversation_counts_emptied AFTER UPDATE OF row_count ON conversation_counts
+            WHEN new.row_count <= 0 BEGIN
+                DELETE FROM conversation_counts WHERE user_id = new.user_id AND page_context = new.page_context;
+            END
+        """)
+        # A user counts once however many pages they have; both checks are prefix seeks on the primary key
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS conversation_counts_user_added AFTER INSERT ON conversation_counts BEGIN
+                UPDATE memory_stats SET value = value + 1 WHERE name = 'unique_users' AND NOT EXISTS (
+                    SELECT 1 FROM conversation_counts WHERE user_id = new.user_id AND page_context != new.page_context
+                );
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS conversation_counts_user_removed AFTER DELETE ON conversation_counts BEGIN
+                UPDATE memory_stats SET value = value - 1 WHERE name = 'unique_users' AND NOT EXISTS (
+                    SELECT 1 FROM conversation_counts WHERE user_id = old.user_id
+                );
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS session_memory_count_insert AFTER INSERT ON session_memory BEGIN
+                UPDATE memory_stats SET value = value + 1 WHERE name = 'session_rows';
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS session_memory_count_delete AFTER DELETE ON session_memory BEGIN
+                UPDATE memory_stats SET value = value - 1 WHERE name = 'session_rows';
+            END
+        """)
+        
+        # Create indexes. id is the rowid, so this index is ordered by (user_id, page_context, id)
+        # and serves the keyset trims as well as per-page lookups.
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_conversations_user_page ON conversations(user_id, page_context)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_conversations_timestamp ON conversations(timestamp)")
+        # History pages walk these newest first; the implicit trailing rowid makes them (…, timestamp, id)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_conversations_user_time ON conversations(user_id, timestamp)")
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_conversations_user_page_time
+            ON conversations(user_id, page_context, timestamp)
+        """)
+    
+    @staticmethod
+    def _create_search_index(conn: sqlite3.Connection) -> bool:
+        """Full-text index over message/response, kept in sync by triggers; False if FTS5 is missing"""
+        has_index = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'conversations_fts'"
+        ).fetchone()
+        
+        try:
+            # External content: the index stores only terms, text is read back from conversations
             conn.execute("""
-                CREATE TABLE IF NOT EXISTS session_memory (
-                    user_id TEXT,
-                    page_context TEXT,
-                    memory_key TEXT,
-                    memory_value TEXT,
-                    expires_at DATETIME,
-                    PRIMARY KEY (user_id, page_context, memory_key)
+                CREATE VIRTUAL TABLE IF NOT EXISTS conversations_fts USING fts5(
+                    message, response,
+                    content='conversations', content_rowid='id',
+                    tokenize='porter unicode61'
                 )
             """)
-            
-            # Create indexes
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_conversations_user_page ON conversations(user_id, page_context)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_conversations_timestamp ON conversations(timestamp)")
-            
-            conn.commit()
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 unavailable, conversation search falls back to LIKE scans: {e}")
+            return False
+        
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS conversations_fts_insert AFTER INSERT ON conversations BEGIN
+                INSERT INTO conversations_fts (rowid, message, response) VALUES (new.id, new.message, new.response);
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS conversations_fts_delete AFTER DELETE ON conversations BEGIN
+                INSERT INTO conversations_fts (conversations_fts, rowid, message, response)
+                VALUES ('delete', old.id, old.message, old.response);
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS conversations_fts_update AFTER UPDATE OF message, response ON conversations BEGIN
+                INSERT INTO conversations_fts (conversations_fts, rowid, message, response)
+                VALUES ('delete', old.id, old.message, old.response);
+                INSERT INTO conversations_fts (rowid, message, response) VALUES (new.id, new.message, new.response);
+            END
+        """)
+        if not has_index:
+            conn.execute("INSERT INTO conversations_fts (conversations_fts) VALUES ('rebuild')")
+        return True
     
     def _init_mem0(self):
         """Initialize Mem0 client"""
@@ -89,40 +305,34 @@ class MemoryManager:
         except ImportError:
             raise Exception("Mem0 client not available")
     
-    async def get_context(self, user_id: str, page_context: str, limit: int = 10) -> Dict[str, Any]:
-        """Get conversation context for a user and page"""
+    async def get_context(self, user_id: str, page_context: str, limit: int = 10,
+                          token_budget: int = None) -> Dict[str, Any]:
+        """Get conversation context for a user and page: summary of older turns plus the newest turns"""
+        
+        key, params = (user_id, page_context), (limit, token_budget)
+        cached = self.context_cache.get(key, params)
+        if cached is not None:
+            return cached
         
         try:
-            # Get recent conversations from local database
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.execute("""
-                    SELECT message, response, metadata, timestamp
-                    FROM conversations
-                    WHERE user_id = ? AND page_context = ?
-                    ORDER BY timestamp DESC
-                    LIMIT ?
-                """, (user_id, page_context, limit))
-                
-                conversations = [dict(row) for row in cursor.fetchall()]
-            
-            # Get user preferences
-            preferences = await self.get_user_preferences(user_id)
-            
-            # Get session memory
-            session_memory = await self.get_session_memory(user_id, page_context)
+            # Summary, unsummarized turns, preferences and session memory in one read transaction
+            version = self.context_cache.version(key)
+            summary_row, conversations, preferences, session_memory = await self.db.read(
+                self._read_context, user_id, page_context, limit
+            )
             
-            # Format recent interactions
-            recent_interactions = ""
-            if conversations:
-                for conv in reversed(conversations[-5:]):  # Last 5 interactions
-                    recent_interactions += f"User: {conv['message']}\nMama Bear: {conv['response']}\n\n"
+            summary = summary_row['summary'] if summary_row else ''
+            turns, context_tokens = fit_to_budget(summary, conversations, token_budget or self.context_token_budget)
+            recent_interactions = "\n\n".join(format_turn(turn['message'], turn['response']) for turn in turns)
             
             context = {
                 'user_id': user_id,
                 'page_context': page_context,
-                'recent_interactions': recent_interactions.strip(),
-                'conversation_count': len(conversations),
+                'conversation_summary': summary,
+                'recent_interactions': recent_interactions,
+                'turns_included': len(turns),
+                'context_tokens': context_tokens,
+                'conversation_count': len(conversations) + (summary_row['turns_summarized'] if summary_row else 0),
                 'preferences': preferences,
                 'session_memory': session_memory,
                 'last_interaction': conversations[0]['timestamp'] if conversations else None
@@ -141,6 +351,7 @@ class MemoryManager:
                 except Exception as e:
                     logger.warning(f"Mem0 context retrieval failed: {e}")
             
+            self.context_cache.put(key, params, context, version)
             return context
             
         except Exception as e:
@@ -151,6 +362,32 @@ class MemoryManager:
                 'error': str(e)
             }
     
+    def _read_context(self, conn: sqlite3.Connection, user_id: str, page_context: str, limit: int):
+        # One transaction, so every part comes from the same snapshot
+        conn.execute("BEGIN")
+        try:
+            summary_row = self._get_summary(conn, user_id, page_context)
+            summarized_through = summary_row['summarized_through_id'] if summary_row else 0
+            
+            # Turns not yet folded into the summary, newest first
+            cursor = conn.execute("""
+                SELECT id, message, response, metadata, timestamp
+                FROM conversations
+                WHERE user_id = ? AND page_context = ? AND id > ?
+                ORDER BY id DESC
+                LIMIT ?
+            """, (user_id, page_context, summarized_through, limit))
+            conversations = [dict(row) for row in cursor.fetchall()]
+            
+            return (
+                dict(summary_row) if summary_row else None,
+                conversations,
+                self._read_preferences(conn, user_id),
+                self._read_session_memory(conn, user_id, page_context)
+            )
+        finally:
+            conn.execute("COMMIT")
+    
     async def save_interaction(self, 
                              user_id: str, 
                              page_context: str,
@@ -160,25 +397,17 @@ class MemoryManager:
         """Save a conversation interaction"""
         
         try:
-            # Save to local database
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("""
-                    INSERT INTO conversations (user_id, page_context, message, response, metadata)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (user_id, page_context, message, response, json.dumps(metadata or {})))
-                
-                conn.commit()
+            # Save to local database (trimming old turns only when the page crosses its high-water mark),
+            # queueing the Mem0 upload in the same transaction
+            await self.db.write(
+                self._insert_interaction, user_id, page_context, message, response, json.dumps(metadata or {})
+            )
+            self.context_cache.invalidate((user_id, page_context))
+            if self.mem0_outbox:
+                self.mem0_outbox.notify()
             
-            # Save to Mem0 if enabled
-            if self.mem0_enabled:
-                try:
-                    # Simulate Mem0 save
-                    logger.debug(f"Saved to Mem0: {user_id} - {page_context}")
-                except Exception as e:
-                    logger.warning(f"Mem0 save failed: {e}")
-            
-            # Clean up old conversations (keep last 1000 per user/page)
-            await self._cleanup_old_conversations(user_id, page_context)
+            # Fold older turns into the running summary in the background
+            self.compactor.notify(user_id, page_context)
             
             return True
             
@@ -186,43 +415,164 @@ class MemoryManager:
             logger.error(f"Interaction save error: {e}")
             return False
     
+    def _insert_interaction(self, conn: sqlite3.Connection, user_id: str, page_context: str,
+                            message: str, response: str, metadata: str) -> int:
+        conversation_id = self._insert_conversation(conn, user_id, page_context, message, response, metadata)
+        if self.mem0_outbox:
+            memory_id = f"conversation_{conversation_id}"
+            try:
+                self.mem0_outbox.stage(conn, memory_id, interaction_payload(
+                    memory_id, user_id, message, response, {'page_context': page_context}
+                ))
+            except sqlite3.Error as e:
+                # Only the failed statement is undone; the conversation row still commits
+                logger.warning(f"Mem0 queue failed: {e}")
+        return conversation_id
+    
+    def _insert_conversation(self, conn: sqlite3.Connection, user_id: str, page_context: str,
+                             message: str, response: str, metadata: str) -> int:
+        cursor = conn.execute("""
+            INSERT INTO conversations (user_id, page_context, message, response, metadata)
+            VALUES (?, ?, ?, ?, ?)
+        """, (user_id, page_context, message, response, metadata))
+        conversation_id = cursor.lastrowid
+        
+        # conversation_counts was bumped by the insert trigger
+        row_count = conn.execute(
+            "SELECT row_count FROM conversation_counts WHERE user_id = ? AND page_context = ?",
+            (user_id, page_context)
+        ).fetchone()[0]
+        
+        # Amortized O(1): one trim of `slack` rows per `slack` inserts
+        if row_count > self.conversation_retention + self.conversation_retention_slack:
+            trimmed = self._trim_conversations(conn, user_id, page_context)
+            self.retention_metrics['trims'] += 1
+            self.retention_metrics['rows_trimmed'] += trimmed
+        
+        return conversation_id
+    
+    def _trim_conversations(self, conn: sqlite3.Connection, user_id: str, page_context: str,
+                            max_rows: int = None) -> int:
+        """Keyset-delete turns older than the newest `conversation_retention`; returns rows deleted"""
+        
+        # First id to keep: walks the (user_id, page_context, id) index from the newest end
+        cutoff = conn.execute("""
+            SELECT id FROM conversations
+            WHERE user_id = ? AND page_context = ?
+            ORDER BY id DESC
+            LIMIT 1 OFFSET ?
+        """, (user_id, page_context, self.conversation_retention - 1)).fetchone()
+        if cutoff is None:
+            return 0
+        
+        if max_rows is None:
+            deleted = conn.execute("""
+                DELETE FROM conversations
+                WHERE user_id = ? AND page_context = ? AND id < ?
+            """, (user_id, page_context, cutoff[0])).rowcount
+        else:
+            # Oldest first, bounded, so a bulk sweep never holds the write lock for long
+            deleted = conn.execute("""
+                DELETE FROM conversations
+                WHERE id IN (
+                    SELECT id FROM conversations
+                    WHERE user_id = ? AND page_context = ? AND id < ?
+                    ORDER BY id
+                    LIMIT ?
+                )
+            """, (user_id, page_context, cutoff[0], max_rows)).rowcount
+        
+        return deleted
+    
+    def _get_summary(self, conn: sqlite3.Connection, user_id: str, page_context: str) -> Optional[sqlite3.Row]:
+        return conn.execute("""
+            SELECT summary, summarized_through_id, turns_summarized
+            FROM conversation_summaries
+            WHERE user_id = ? AND page_context = ?
+        """, (user_id, page_context)).fetchone()
+    
+    def _read_unsummarized(self, conn: sqlite3.Connection, user_id: str, page_context: str):
+        summary_row = self._get_summary(conn, user_id, page_context)
+        summarized_through = summary_row['summarized_through_id'] if summary_row else 0
+        rows = conn.execute("""
+            SELECT id, message, response FROM conversations
+            WHERE user_id = ? AND page_context = ? AND id > ?
+            ORDER BY id
+        """, (user_id, page_context, summarized_through)).fetchall()
+        return summary_row, rows
+    
+    async def _compact_conversation(self, user_id: str, page_context: str, summarizer: Summarizer,
+                                    max_turns: int = 50) -> Optional[int]:
+        """Fold turns older than the newest `summary_keep_recent` into the summary; returns turns folded"""
+        
+        summary_row, rows = await self.db.read(self._read_unsummarized, user_id, page_context)
+        summarized_through = summary_row['summarized_through_id'] if summary_row else 0
+        
+        older = rows[:max(0, len(rows) - self.summary_keep_recent)][:max_turns]
+        if len(older) < self.summary_batch_turns:
+            return None
+        
+        previous = summary_row['summary'] if summary_row else ''
+        summary = await summarizer(previous, [(row['message'], row['response']) for row in older])
+        
+        def save_summary(conn: sqlite3.Connection):
+            # The summarized_through guard keeps a concurrent pass from rolling back progress
+            conn.execute("""
+                INSERT INTO conversation_summaries
+                    (user_id, page_context, summary, summarized_through_id, turns_summarized, updated_at)
+                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(user_id, page_context) DO UPDATE SET
+                    summary = excluded.summary,
+                    summarized_through_id = excluded.summarized_through_id,
+                    turns_summarized = conversation_summaries.turns_summarized + ?,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE conversation_summaries.summarized_through_id = ?
+            """, (user_id, page_context, summary, older[-1]['id'], len(older), len(older), summarized_through))
+        
+        await self.db.write(save_summary)
+        self.context_cache.invalidate((user_id, page_context))
+        
+        # Still more to fold (long backlog): go round again
+        if len(rows) - len(older) > self.summary_keep_recent + self.summary_batch_turns:
+            self.compactor.notify(user_id, page_context)
+        return len(older)
+    
     async def get_user_preferences(self, user_id: str) -> Dict[str, Any]:
         """Get user preferences"""
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.execute("""
-                    SELECT preferences FROM user_preferences WHERE user_id = ?
-                """, (user_id,))
-                
-                row = cursor.fetchone()
-                if row:
-                    return json.loads(row['preferences'])
-                else:
-                    # Return default preferences
-                    return {
-                        'theme': 'light',
-                        'mama_bear_personality': 'caring',
-                        'response_style': 'detailed',
-                        'preferred_models': []
-                    }
-                    
+            return await self.db.read(self._read_preferences, user_id)
         except Exception as e:
             logger.error(f"Preferences retrieval error: {e}")
             return {}
     
+    @staticmethod
+    def _read_preferences(conn: sqlite3.Connection, user_id: str) -> Dict[str, Any]:
+        row = conn.execute("""
+            SELECT preferences FROM user_preferences WHERE user_id = ?
+        """, (user_id,)).fetchone()
+        if row:
+            return json.loads(row['preferences'])
+        
+        # Return default preferences
+        return {
+            'theme': 'light',
+            'mama_bear_personality': 'caring',
+            'response_style': 'detailed',
+            'preferred_models': []
+        }
+    
     async def save_user_preferences(self, user_id: str, preferences: Dict[str, Any]) -> bool:
         """Save user preferences"""
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("""
-                    INSERT OR REPLACE INTO user_preferences (user_id, preferences)
-                    VALUES (?, ?)
-                """, (user_id, json.dumps(preferences)))
-                
-                conn.commit()
+            await self.db.write(lambda conn: conn.execute("""
+                INSERT OR REPLACE INTO user_preferences (user_id, preferences)
+                VALUES (?, ?)
+            """, (user_id, json.dumps(preferences))))
+            
+            # Every cached page of this user carries the same preferences
+            self.context_cache.update(user_id, lambda context: context.__setitem__('preferences', json.loads(json.dumps(preferences))))
             
             return True
             
@@ -234,27 +584,28 @@ class MemoryManager:
         """Get session-specific memory"""
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.execute("""
-                    SELECT memory_key, memory_value
-                    FROM session_memory
-                    WHERE user_id = ? AND page_context = ? AND expires_at > datetime('now')
-                """, (user_id, page_context))
-                
-                session_data = {}
-                for row in cursor.fetchall():
-                    try:
-                        session_data[row['memory_key']] = json.loads(row['memory_value'])
-                    except json.JSONDecodeError:
-                        session_data[row['memory_key']] = row['memory_value']
-                
-                return session_data
-                
+            return await self.db.read(self._read_session_memory, user_id, page_context)
         except Exception as e:
             logger.error(f"Session memory retrieval error: {e}")
             return {}
     
+    @staticmethod
+    def _read_session_memory(conn: sqlite3.Connection, user_id: str, page_context: str) -> Dict[str, Any]:
+        cursor = conn.execute("""
+            SELECT memory_key, memory_value
+            FROM session_memory
+            WHERE user_id = ? AND page_context = ? AND expires_at > datetime('now')
+        """, (user_id, page_context))
+        
+        session_data = {}
+        for row in cursor.fetchall():
+            try:
+                session_data[row['memory_key']] = json.loads(row['memory_value'])
+            except json.JSONDecodeError:
+                session_data[row['memory_key']] = row['memory_value']
+        
+        return session_data
+    
     async def save_session_memory(self, 
                                 user_id: str, 
                                 page_context: str, 
@@ -264,16 +615,20 @@ class MemoryManager:
         """Save session-specific memory"""
         
         try:
-            expires_at = datetime.now() + timedelta(hours=expires_in_hours)
+            # SQLite's clock (UTC), the same one the read filter and the reconcile purge compare against
+            expires_in = f"{expires_in_hours * 3600:+.0f} seconds"
+            
+            # Upsert rather than INSERT OR REPLACE: REPLACE's implicit delete skips the counting triggers
+            await self.db.write(lambda conn: conn.execute("""
+                INSERT INTO session_memory 
+                (user_id, page_context, memory_key, memory_value, expires_at)
+                VALUES (?, ?, ?, ?, datetime('now', ?))
+                ON CONFLICT(user_id, page_context, memory_key) DO UPDATE SET
+                    memory_value = excluded.memory_value, expires_at = excluded.expires_at
+            """, (user_id, page_context, key, json.dumps(value), expires_in)))
             
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("""
-                    INSERT OR REPLACE INTO session_memory 
-                    (user_id, page_context, memory_key, memory_value, expires_at)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (user_id, page_context, key, json.dumps(value), expires_at))
-                
-                conn.commit()
+            stored = json.loads(json.dumps(value))
+            self.context_cache.update(user_id, lambda context: context['session_memory'].__setitem__(key, stored), page_context)
             
             return True
             
@@ -288,76 +643,206 @@ class MemoryManager:
         """Get conversation history"""
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                
-                if page_context:
-                    cursor = conn.execute("""
-                        SELECT * FROM conversations
-                        WHERE user_id = ? AND page_context = ?
-                        ORDER BY timestamp DESC
-                        LIMIT ?
-                    """, (user_id, page_context, limit))
-                else:
-                    cursor = conn.execute("""
-                        SELECT * FROM conversations
-                        WHERE user_id = ?
-                        ORDER BY timestamp DESC
-                        LIMIT ?
-                    """, (user_id, limit))
-                
-                conversations = []
-                for row in cursor.fetchall():
-                    conv = dict(row)
-                    try:
-                        conv['metadata'] = json.loads(conv['metadata'] or '{}')
-                    except json.JSONDecodeError:
-                        conv['metadata'] = {}
-                    conversations.append(conv)
-                
-                return conversations
-                
+            return (await self.get_conversation_history_page(user_id, page_context, limit))['conversations']
         except Exception as e:
             logger.error(f"History retrieval error: {e}")
             return []
     
-    async def _cleanup_old_conversations(self, user_id: str, page_context: str):
-        """Clean up old conversations to prevent database bloat"""
+    async def get_conversation_history_page(self,
+                                            user_id: str,
+                                            page_context: str = None,
+                                            limit: int = 50,
+                                            cursor: str = None) -> Dict[str, Any]:
+        """
+        One page of history, newest first. Pass the returned next_cursor back to continue;
+        it is None on the last page. Raises ValueError for a malformed cursor.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        rows = await self.db.read(self._read_history_page, user_id, page_context, limit + 1, after)
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]['timestamp'], rows[-1]['id'])
+        return {'conversations': rows, 'next_cursor': next_cursor}
+    
+    def iter_conversation_history(self,
+                                  user_id: str,
+                                  page_context: str = None,
+                                  batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """
+        Every stored turn for a user, newest first, read in keyset batches. Each batch
+        is its own short read, so a long export never pins one snapshot (or the WAL).
+        """
+        after = None
+        while True:
+            rows = self.db.read_sync(self._read_history_page, user_id, page_context, batch_size, after)
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            after = (rows[-1]['timestamp'], rows[-1]['id'])
+    
+    def export_conversation_history(self, user_id: str, page_context: str = None,
+                                    batch_size: int = 500) -> Iterator[str]:
+        """NDJSON lines (one turn per line) for streaming a user's full history"""
+        for conversation in self.iter_conversation_history(user_id, page_context, batch_size):
+            yield json.dumps(conversation, ensure_ascii=False, default=str) + '\n'
+    
+    @staticmethod
+    def _read_history_page(conn: sqlite3.Connection, user_id: str, page_context: Optional[str], limit: int,
+                           after: Optional[Tuple[str, int]]) -> List[Dict[str, Any]]:
+        # Seek straight past the previous page on the (user[, page], timestamp, id) index: no OFFSET,
+        # so page N costs the same as page 1
+        clauses, params = ["user_id = ?"], [user_id]
+        if page_context:
+            clauses.append("page_context = ?")
+            params.append(page_context)
+        if after:
+            clauses.append("(timestamp, id) < (?, ?)")
+            params.extend(after)
+        params.append(limit)
+        
+        cursor = conn.execute(f"""
+            SELECT * FROM conversations
+            WHERE {' AND '.join(clauses)}
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ?
+        """, params)
+        
+        conversations = []
+        for row in cursor.fetchall():
+            conv = dict(row)
+            try:
+                conv['metadata'] = json.loads(conv['metadata'] or '{}')
+            except json.JSONDecodeError:
+                conv['metadata'] = {}
+            conversations.append(conv)
+        
+        return conversations
+    
+    async def search_conversations(self,
+                                   user_id: str,
+                                   query: str,
+                                   page_context: str = None,
+                                   limit: int = 10) -> List[Dict[str, Any]]:
+        """Full-text search over a user's stored turns, best BM25 match first, with highlighted snippets"""
+        
+        match = fts_query(query)
+        if not match:
+            return []
+        
+        page_filter = "AND c.page_context = ?" if page_context else ""
+        params = (match, user_id) + ((page_context,) if page_context else ()) + (limit,)
+        
+        def search(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+            # bm25() is lower-is-better; a hit in the message counts double one in the response
+            cursor = conn.execute(f"""
+                SELECT c.id, c.page_context, c.message, c.response, c.metadata, c.timestamp,
+                       bm25(conversations_fts, 2.0, 1.0) AS score,
+                       snippet(conversations_fts, -1, '[', ']', '…', 16) AS snippet
+                FROM conversations_fts
+                JOIN conversations c ON c.id = conversations_fts.rowid
+                WHERE conversations_fts MATCH ? AND c.user_id = ? {page_filter}
+                ORDER BY score
+                LIMIT ?
+            """, params)
+            return [dict(row) for row in cursor.fetchall()]
+        
+        def scan(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+            # No FTS5 in this SQLite build: unranked substring match, newest first
+            terms = SEARCH_TERM.findall(query)
+            clauses = ' OR '.join("c.message LIKE ? OR c.response LIKE ?" for _ in terms)
+            cursor = conn.execute(f"""
+                SELECT c.id, c.page_context, c.message, c.response, c.metadata, c.timestamp,
+                       NULL AS score, NULL AS snippet
+                FROM conversations c
+                WHERE c.user_id = ? {page_filter} AND ({clauses})
+                ORDER BY c.id DESC
+                LIMIT ?
+            """, (user_id,) + ((page_context,) if page_context else ())
+                + tuple(f"%{term}%" for term in terms for _ in range(2)) + (limit,))
+            return [dict(row) for row in cursor.fetchall()]
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                # Keep only the last 1000 conversations per user/page
-                conn.execute("""
-                    DELETE FROM conversations
-                    WHERE user_id = ? AND page_context = ? AND id NOT IN (
-                        SELECT id FROM conversations
-                        WHERE user_id = ? AND page_context = ?
-                        ORDER BY timestamp DESC
-                        LIMIT 1000
-                    )
-                """, (user_id, page_context, user_id, page_context))
-                
-                conn.commit()
-                
+            results = await self.db.read(search if self.search_available else scan)
         except Exception as e:
-            logger.warning(f"Cleanup error: {e}")
+            logger.error(f"Conversation search error: {e}")
+            return []
+        
+        for result in results:
+            try:
+                result['metadata'] = json.loads(result['metadata'] or '{}')
+            except json.JSONDecodeError:
+                result['metadata'] = {}
+        return results
+    
+    def sweep_retention(self, batch_rows: int = 500) -> int:
+        """Trim every (user, page) above its retention in bounded batches; returns rows deleted"""
+        
+        over = self.db.read_sync(lambda conn: conn.execute(
+            "SELECT user_id, page_context FROM conversation_counts WHERE row_count > ?",
+            (self.conversation_retention,)
+        ).fetchall())
+        
+        total = 0
+        for user_id, page_context in over:
+            while True:
+                deleted = self.db.write_sync(self._trim_conversations, user_id, page_context, batch_rows)
+                total += deleted
+                if deleted < batch_rows:
+                    break
+        
+        self.retention_metrics['sweeps'] += 1
+        self.retention_metrics['rows_swept'] += total
+        return total
+    
+    def reconcile_stats(self) -> Dict[str, int]:
+        """Purge expired session rows, then re-derive memory_stats by full count; returns corrections made"""
+        
+        def reconcile(conn: sqlite3.Connection):
+            purged = conn.execute("DELETE FROM session_memory WHERE expires_at <= datetime('now')").rowcount
+            kept = dict(conn.execute("SELECT name, value FROM memory_stats").fetchall())
+            actual = dict(conn.execute(self.STATS_QUERY).fetchall())
+            drift = {name: value - kept.get(name, 0) for name, value in actual.items() if value != kept.get(name, 0)}
+            conn.executemany(
+                "INSERT INTO memory_stats (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+                [(name, actual[name]) for name in drift]
+            )
+            return purged, drift
+        
+        # One write transaction, so no save can land between the count and the correction
+        purged, drift = self.db.write_sync(reconcile)
+        if drift:
+            logger.warning(f"Memory stats drifted, corrected by {drift}")
+        
+        self.stats_metrics['reconciles'] += 1
+        self.stats_metrics['drift_corrected'] += sum(abs(delta) for delta in drift.values())
+        self.stats_metrics['expired_sessions_purged'] += purged
+        self.stats_metrics['last_reconciled'] = datetime.now().isoformat()
+        return drift
+    
+    def _sweep_loop(self):
+        next_reconcile = time.monotonic() + self.stats_reconcile_interval
+        while not self._sweep_stop.wait(self.retention_sweep_interval):
+            try:
+                swept = self.sweep_retention()
+                if swept:
+                    logger.info(f"Retention sweep removed {swept} old conversation turns")
+                if time.monotonic() >= next_reconcile:
+                    self.reconcile_stats()
+                    next_reconcile = time.monotonic() + self.stats_reconcile_interval
+            except Exception as e:
+                logger.warning(f"Cleanup error: {e}")
     
     async def get_status(self) -> Dict[str, Any]:
         """Get memory system status"""
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.execute("SELECT COUNT(*) as count FROM conversations")
-                total_conversations = cursor.fetchone()[0]
-                
-                cursor = conn.execute("SELECT COUNT(DISTINCT user_id) as count FROM conversations")
-                unique_users = cursor.fetchone()[0]
-                
-                cursor = conn.execute("""
-                    SELECT COUNT(*) as count FROM session_memory 
-                    WHERE expires_at > datetime('now')
-                """)
-                active_sessions = cursor.fetchone()[0]
+            # Three trigger-maintained rows, whatever the size of the database
+            stats = dict(await self.db.read(lambda conn: conn.execute("SELECT name, value FROM memory_stats").fetchall()))
+            total_conversations, unique_users = stats.get('conversations', 0), stats.get('unique_users', 0)
+            # Includes rows expired since the last reconcile purged them
+            active_sessions = stats.get('session_rows', 0)
             
             return {
                 'connected': True,
@@ -366,6 +851,17 @@ class MemoryManager:
                 'unique_users': unique_users,
                 'active_sessions': active_sessions,
                 'database_path': str(self.db_path),
+                'database': self.db.get_status(),
+                'context_cache': self.context_cache.get_status(),
+                'full_text_search': self.search_available,
+                'stats': {'reconcile_interval_s': self.stats_reconcile_interval, **self.stats_metrics},
+                'conversation_compaction': self.compactor.get_status(),
+                'retention': {
+                    'keep_per_page': self.conversation_retention,
+                    'high_water_mark': self.conversation_retention + self.conversation_retention_slack,
+                    **self.retention_metrics
+                },
+                'mem0_sync': await asyncio.to_thread(self.mem0_outbox.get_status) if self.mem0_outbox else None,
                 'timestamp': datetime.now().isoformat()
             }
             
@@ -375,4 +871,13 @@ class MemoryManager:
                 'connected': False,
                 'error': str(e),
                 'timestamp': datetime.now().isoformat()
-            }
\ No newline at end of file
+            }
+    
+    def close(self):
+        """Close the database connections and stop the background workers"""
+        self._sweep_stop.set()
+        self._sweeper.join()
+        self.compactor.stop()  # A pass in flight still writes through self.db
+        if self.mem0_outbox:
+            self.mem0_outbox.close()
+        self.db.close()
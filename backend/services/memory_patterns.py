@@ -0,0 +1,227 @@
+# backend/services/memory_patterns.py
+"""
+🐻 Mama Bear Memory Patterns
+Streaming per-user interaction aggregates: agent success counts, topic
+frequencies, time-decayed preferences and complexity trends, updated in O(1)
+per interaction and read without scanning memories
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+class UserPatternAggregates:
+    """
+    Running aggregates for one user.
+
+    Decayed weights use forward decay: an event at time t adds
+    2 ** ((t - landmark) / half_life), and reads divide by the same factor for
+    "now". Updates never touch other keys; compaction moves the landmark
+    forward so the stored numbers stay small.
+    """
+
+    __slots__ = ('interactions', 'successes', 'agent_counts', 'topic_counts', 'topic_weights',
+                 'agent_weights', 'collaborations', 'complexity_fast', 'complexity_slow',
+                 'landmark', 'first_seen', 'last_seen')
+
+    def __init__(self, landmark: float):
+        self.interactions = 0
+        self.successes = 0
+        self.agent_counts: Dict[str, List[int]] = {}  # agent -> [successes, total]
+        self.topic_counts: Dict[str, int] = {}
+        self.topic_weights: Dict[str, float] = {}
+        self.agent_weights: Dict[str, float] = {}
+        self.collaborations = 0
+        self.complexity_fast: Optional[float] = None
+        self.complexity_slow: Optional[float] = None
+        self.landmark = landmark
+        self.first_seen: Optional[float] = None
+        self.last_seen: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'UserPatternAggregates':
+        aggregates = cls(landmark=data['landmark'])
+        for name in cls.__slots__:
+            if name in data:
+                setattr(aggregates, name, data[name])
+        return aggregates
+
+class PatternAggregator:
+    """Per-user streaming aggregates with periodic decay compaction"""
+
+    def __init__(self, half_life_days: float = 14.0, fast_alpha: float = 0.3, slow_alpha: float = 0.05,
+                 min_weight: float = 0.01, max_keys: int = 100):
+        self.half_life = half_life_days * 86400
+        self.fast_alpha = fast_alpha
+        self.slow_alpha = slow_alpha
+        self.min_weight = min_weight
+        self.max_keys = max_keys
+
+        self.users: Dict[str, UserPatternAggregates] = {}
+        self.touched: Set[str] = set()  # Users updated since the last compaction
+        self.watermark = 0.0  # Newest interaction folded in, for backfill after a restart
+        self._lock = threading.Lock()
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self.users
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+    def _boost(self, aggregates: UserPatternAggregates, timestamp: float) -> float:
+        return 2 ** ((timestamp - aggregates.landmark) / self.half_life)
+
+    def record(self, user_id: str, interaction: Dict[str, Any], timestamp: float = None):
+        """Fold one interaction into the user's aggregates"""
+        timestamp = timestamp if timestamp is not None else time.time()
+        agent_id = interaction.get('agent_id')
+        success = bool(interaction.get('success', True))
+        complexity = interaction.get('complexity_score')
+
+        with self._lock:
+            aggregates = self.users.get(user_id)
+            if aggregates is None:
+                aggregates = self.users[user_id] = UserPatternAggregates(landmark=timestamp)
+            boost = self._boost(aggregates, timestamp)
+
+            aggregates.interactions += 1
+            aggregates.successes += success
+            if aggregates.first_seen is None or timestamp < aggregates.first_seen:
+                aggregates.first_seen = timestamp
+            aggregates.last_seen = max(aggregates.last_seen or timestamp, timestamp)
+            if interaction.get('collaboration_id'):
+                aggregates.collaborations += 1
+
+            if agent_id:
+                counts = aggregates.agent_counts.setdefault(agent_id, [0, 0])
+                counts[0] += success
+                counts[1] += 1
+                if success:
+                    aggregates.agent_weights[agent_id] = aggregates.agent_weights.get(agent_id, 0.0) + boost
+
+            for topic in interaction.get('topics') or ():
+                aggregates.topic_counts[topic] = aggregates.topic_counts.get(topic, 0) + 1
+                aggregates.topic_weights[topic] = aggregates.topic_weights.get(topic, 0.0) + boost
+
+            if complexity is not None:
+                if aggregates.complexity_fast is None:
+                    aggregates.complexity_fast = aggregates.complexity_slow = float(complexity)
+                else:
+                    aggregates.complexity_fast += self.fast_alpha * (complexity - aggregates.complexity_fast)
+                    aggregates.complexity_slow += self.slow_alpha * (complexity - aggregates.complexity_slow)
+
+            self.touched.add(user_id)
+            self.watermark = max(self.watermark, timestamp)
+
+    def _decayed(self, weights: Dict[str, float], scale: float, limit: int) -> Dict[str, float]:
+        ranked = sorted(weights.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return {key: round(weight / scale, 4) for key, weight in ranked}
+
+    def get(self, user_id: str, now: float = None, limit: int = 10) -> Optional[Dict[str, Any]]:
+        """Current aggregates for a user (None if never seen)"""
+        now = now if now is not None else time.time()
+        with self._lock:
+            aggregates = self.users.get(user_id)
+            if aggregates is None:
+                return None
+            scale = self._boost(aggregates, now)
+
+            trend = None
+            if aggregates.complexity_fast is not None:
+                trend = aggregates.complexity_fast - aggregates.complexity_slow
+
+            return {
+                'interactions': aggregates.interactions,
+                'success_rate': round(aggregates.successes / aggregates.interactions, 3) if aggregates.interactions else None,
+                'agent_success': {
+                    agent: {'successes': counts[0], 'total': counts[1], 'rate': round(counts[0] / counts[1], 3)}
+                    for agent, counts in aggregates.agent_counts.items()
+                },
+                'agent_preferences': self._decayed(aggregates.agent_weights, scale, limit),
+                'topic_counts': dict(sorted(aggregates.topic_counts.items(), key=lambda item: item[1], reverse=True)[:limit]),
+                'topic_weights': self._decayed(aggregates.topic_weights, scale, limit),
+                'collaborations': aggregates.collaborations,
+                'complexity': {
+                    'recent': round(aggregates.complexity_fast, 3) if aggregates.complexity_fast is not None else None,
+                    'long_term': round(aggregates.complexity_slow, 3) if aggregates.complexity_slow is not None else None,
+                    'trend': round(trend, 3) if trend is not None else None
+                },
+                'first_seen': aggregates.first_seen,
+                'last_seen': aggregates.last_seen
+            }
+
+    def agent_success_rates(self, user_id: str) -> Dict[str, float]:
+        with self._lock:
+            aggregates = self.users.get(user_id)
+            if aggregates is None:
+                return {}
+            return {agent: counts[0] / counts[1] for agent, counts in aggregates.agent_counts.items()}
+
+    def compact(self, now: float = None) -> Dict[str, int]:
+        """
+        Move every user's landmark to `now`, folding the decay into the stored
+        weights, and drop weights that have decayed below `min_weight`
+        """
+        now = now if now is not None else time.time()
+        pruned = 0
+        with self._lock:
+            for aggregates in self.users.values():
+                scale = self._boost(aggregates, now)
+                for weights in (aggregates.topic_weights, aggregates.agent_weights):
+                    for key in list(weights):
+                        weights[key] /= scale
+                        if weights[key] < self.min_weight:
+                            del weights[key]
+                            pruned += 1
+                    if len(weights) > self.max_keys:
+                        for key, _ in sorted(weights.items(), key=lambda item: item[1])[:len(weights) - self.max_keys]:
+                            del weights[key]
+                            pruned += 1
+                aggregates.landmark = now
+            return {'users': len(self.users), 'pruned': pruned}
+
+    def take_touched(self) -> Set[str]:
+        with self._lock:
+            touched, self.touched = self.touched, set()
+            return touched
+
+    def save(self, path: str):
+        """Write the aggregates as JSON (atomically replaced)"""
+        with self._lock:
+            data = json.dumps({
+                'users': {user_id: aggregates.to_dict() for user_id, aggregates in self.users.items()},
+                'watermark': self.watermark
+            }).encode()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> bool:
+        if not os.path.exists(path):
+            return False
+        with open(path, 'rb') as f:
+            data = json.loads(f.read())
+        users = {user_id: UserPatternAggregates.from_dict(aggregates) for user_id, aggregates in data['users'].items()}
+        with self._lock:
+            self.users = users
+            self.watermark = data['watermark']
+        return True
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'users': len(self.users),
+                'pending_compaction': len(self.touched),
+                'half_life_days': round(self.half_life / 86400, 2)
+            }
@@ -0,0 +1,149 @@
+# backend/services/memory_retention.py
+"""
+🐻 Mama Bear Memory Retention
+Per-type, importance-dependent TTL policy with an expiry min-heap, so
+expired memories are found without scanning and removed in batches
+"""
+
+import heapq
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+
+# Memory type -> importance name -> TTL in days (None keeps forever).
+# '*' applies to types without their own entry.
+DEFAULT_RETENTION_POLICY: Dict[str, Dict[str, Optional[float]]] = {
+    '*': {'trivial': 7, 'low': None, 'medium': None, 'high': None, 'critical': None}
+}
+
+class RetentionPolicy:
+    """Resolves the TTL for a (memory type, importance) pair"""
+
+    def __init__(self, policy: Dict[str, Dict[str, Optional[float]]] = None):
+        self.policy = {memory_type: dict(ttls) for memory_type, ttls in DEFAULT_RETENTION_POLICY.items()}
+        for memory_type, ttls in (policy or {}).items():
+            self.policy.setdefault(memory_type, {}).update({name.lower(): days for name, days in ttls.items()})
+
+    @classmethod
+    def from_json(cls, raw: Optional[str]) -> 'RetentionPolicy':
+        if not raw:
+            return cls()
+        try:
+            return cls(json.loads(raw))
+        except (ValueError, AttributeError) as e:
+            logger.error(f"Invalid memory retention policy, using defaults: {e}")
+            return cls()
+
+    def ttl(self, memory_type: str, importance: str) -> Optional[float]:
+        """TTL in seconds, or None when the memory is kept indefinitely"""
+        importance = importance.lower()
+        for key in (memory_type, '*'):
+            ttls = self.policy.get(key)
+            if ttls is not None and importance in ttls:
+                days = ttls[importance]
+                return days * DAY if days is not None else None
+        return None
+
+class RetentionScheduler:
+    """
+    Min-heap of (expires_at, memory_id). Cancelled and rescheduled entries
+    are left in the heap and skipped when popped; reading a memory slides
+    its expiry forward by its TTL.
+    """
+
+    def __init__(self, policy: RetentionPolicy = None):
+        self.policy = policy or RetentionPolicy()
+        self._heap: List[Tuple[float, str]] = []
+        self._expires: Dict[str, float] = {}
+        self._ttls: Dict[str, float] = {}
+        self._last_access: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        self.metrics = {
+            'scheduled': 0,
+            'extended': 0,
+            'expired': 0,
+            'batches': 0,
+            'reclaimed_records': 0,
+            'reclaimed_bytes': 0
+        }
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+    def schedule(self, memory_id: str, memory_type: str, importance: str, created_ts: float) -> Optional[float]:
+        ttl = self.policy.ttl(memory_type, importance)
+        if ttl is None:
+            return None
+        expires_at = created_ts + ttl
+        with self._lock:
+            self._expires[memory_id] = expires_at
+            self._ttls[memory_id] = ttl
+            heapq.heappush(self._heap, (expires_at, memory_id))
+            self.metrics['scheduled'] += 1
+        return expires_at
+
+    def touch(self, memory_id: str, timestamp: float = None):
+        """Record a read; O(1), the heap is only adjusted when the entry comes due"""
+        with self._lock:
+            if memory_id in self._expires:
+                self._last_access[memory_id] = timestamp if timestamp is not None else time.time()
+
+    def cancel(self, memory_id: str):
+        with self._lock:
+            self._expires.pop(memory_id, None)
+            self._ttls.pop(memory_id, None)
+            self._last_access.pop(memory_id, None)
+
+            # Drop stale heap entries once they outnumber the live ones
+            if len(self._heap) > 2 * len(self._expires) + 1024:
+                self._heap = [(expires_at, memory_id) for memory_id, expires_at in self._expires.items()]
+                heapq.heapify(self._heap)
+
+    def pop_expired(self, now: float = None, limit: int = 500) -> List[str]:
+        """Up to `limit` memory IDs whose expiry has passed"""
+        now = now if now is not None else time.time()
+        expired = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now and len(expired) < limit:
+                expires_at, memory_id = heapq.heappop(self._heap)
+                if self._expires.get(memory_id) != expires_at:
+                    continue  # Cancelled or superseded
+
+                last_access = self._last_access.pop(memory_id, None)
+                if last_access is not None and last_access + self._ttls[memory_id] > now:
+                    extended = last_access + self._ttls[memory_id]
+                    self._expires[memory_id] = extended
+                    heapq.heappush(self._heap, (extended, memory_id))
+                    self.metrics['extended'] += 1
+                    continue
+
+                del self._expires[memory_id]
+                del self._ttls[memory_id]
+                expired.append(memory_id)
+
+            self.metrics['expired'] += len(expired)
+        return expired
+
+    def record_reclaimed(self, records: int, reclaimed_bytes: int):
+        with self._lock:
+            self.metrics['batches'] += 1
+            self.metrics['reclaimed_records'] += records
+            self.metrics['reclaimed_bytes'] += reclaimed_bytes
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            next_expiry = self._heap[0][0] if self._heap else None
+            return {
+                'tracked': len(self._expires),
+                'heap_entries': len(self._heap),
+                'next_expiry': next_expiry,
+                'policy': self.policy.policy,
+                **self.metrics
+            }
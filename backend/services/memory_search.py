@@ -0,0 +1,148 @@
+# backend/services/memory_search.py
+"""
+🐻 Mama Bear Memory Search
+Incremental per-user inverted index with BM25 scoring
+"""
+
+import heapq
+import logging
+import math
+import re
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by can do for from has have how i if in is it its me my of on or
+so that the this to was we what when where which who why will with you your
+""".split())
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+class UserTermIndex:
+    """Postings and length statistics for one user's memories"""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)  # term -> {memory_id: tf}
+        self.doc_terms: Dict[str, Dict[str, int]] = {}  # memory_id -> {term: tf}
+        self.doc_lengths: Dict[str, int] = {}
+        self.total_length = 0
+
+    @property
+    def doc_count(self) -> int:
+        return len(self.doc_lengths)
+
+    @property
+    def avg_length(self) -> float:
+        return self.total_length / self.doc_count if self.doc_count else 0.0
+
+    def add(self, memory_id: str, tokens: List[str]):
+        if memory_id in self.doc_lengths:
+            self.remove(memory_id)
+
+        counts: Dict[str, int] = defaultdict(int)
+        for token in tokens:
+            counts[token] += 1
+        for term, tf in counts.items():
+            self.postings[term][memory_id] = tf
+
+        self.doc_terms[memory_id] = dict(counts)
+        self.doc_lengths[memory_id] = len(tokens)
+        self.total_length += len(tokens)
+
+    def remove(self, memory_id: str):
+        terms = self.doc_terms.pop(memory_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(memory_id, None)
+                if not postings:
+                    del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(memory_id)
+
+class BM25Index:
+    """
+    Inverted index over every user's memory history.
+    Updated on write, so queries never re-tokenize stored memories.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.users: Dict[str, UserTermIndex] = defaultdict(UserTermIndex)
+        self._lock = threading.Lock()
+
+    def add(self, user_id: str, memory_id: str, text: str):
+        tokens = tokenize(text)
+        with self._lock:
+            self.users[user_id].add(memory_id, tokens)
+
+    def remove(self, user_id: str, memory_id: str):
+        with self._lock:
+            index = self.users.get(user_id)
+            if index is not None:
+                index.remove(memory_id)
+
+    def _idf(self, index: UserTermIndex, term: str) -> float:
+        df = len(index.postings.get(term, ()))
+        return math.log(1 + (index.doc_count - df + 0.5) / (df + 0.5))
+
+    def _term_score(self, index: UserTermIndex, idf: float, tf: int, memory_id: str) -> float:
+        norm = self.k1 * (1 - self.b + self.b * index.doc_lengths[memory_id] / (index.avg_length or 1))
+        return idf * tf * (self.k1 + 1) / (tf + norm)
+
+    def search(self, user_id: str, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Top-k memories over the user's whole history"""
+        terms = set(tokenize(query))
+        with self._lock:
+            index = self.users.get(user_id)
+            if index is None or not terms:
+                return []
+
+            # Hot loop: hoist constants out of the per-posting arithmetic
+            k1, lengths = self.k1, index.doc_lengths
+            base = k1 * (1 - self.b)
+            slope = k1 * self.b / (index.avg_length or 1)
+
+            scores: Dict[str, float] = defaultdict(float)
+            for term in terms:
+                postings = index.postings.get(term)
+                if not postings:
+                    continue
+                weight = self._idf(index, term) * (k1 + 1)
+                for memory_id, tf in postings.items():
+                    scores[memory_id] += weight * tf / (tf + base + slope * lengths[memory_id])
+
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def score(self, user_id: str, query: str, memory_ids: Iterable[str]) -> Dict[str, float]:
+        """BM25 score for specific memories (0 for unknown ones)"""
+        terms = set(tokenize(query))
+        with self._lock:
+            index = self.users.get(user_id)
+            scores = {}
+            for memory_id in memory_ids:
+                doc_terms = index.doc_terms.get(memory_id) if index else None
+                total = 0.0
+                if doc_terms:
+                    for term in terms:
+                        tf = doc_terms.get(term)
+                        if tf:
+                            total += self._term_score(index, self._idf(index, term), tf, memory_id)
+                scores[memory_id] = total
+        return scores
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'users': len(self.users),
+                'documents': sum(index.doc_count for index in self.users.values()),
+                'terms': sum(len(index.postings) for index in self.users.values())
+            }
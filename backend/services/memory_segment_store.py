@@ -0,0 +1,590 @@
+# backend/services/memory_segment_store.py
+"""
+🐻 Mama Bear Memory Segment Store
+Append-only segment log for memory records: group-committed writes,
+an in-memory offset index, compaction and crash recovery by log replay
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import logging
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+OP_PUT = 1
+OP_DELETE = 2
+
+# crc32, op, key length, value length; the CRC covers everything after itself
+RECORD_HEADER = struct.Struct('<IBHI')
+
+SEGMENT_SUFFIX = '.log'
+COMPACTED_SUFFIX = '.compacted'
+CHECKPOINT_FILE = 'index.checkpoint'
+
+# (segment id, value offset, value length)
+IndexEntry = Tuple[int, int, int]
+
+def encode_record(op: int, key: bytes, value: bytes = b'') -> bytes:
+    body = struct.pack('<BHI', op, len(key), len(value)) + key + value
+    return struct.pack('<I', zlib.crc32(body)) + body
+
+def _segment_name(segment_id: int) -> str:
+    return f"segment_{segment_id:08d}{SEGMENT_SUFFIX}"
+
+def _segment_id(filename: str) -> int:
+    return int(filename.split('_')[1].split('.')[0])
+
+class SegmentLogStore:
+    """
+    Key/value store over append-only segment files.
+
+    Writes are queued to a single writer thread which batches everything
+    that arrives within `group_commit_window` seconds into one write + fsync.
+    Sealed segments are merged by compact(); a periodic checkpoint of the
+    index keeps recovery to a replay of the log tail.
+    """
+
+    def __init__(self, directory: str, max_segment_bytes: int = 64 * 1024 * 1024,
+                 group_commit_window: float = 0.002, max_batch: int = 512,
+                 fsync: bool = True, checkpoint_every: int = 10000):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.group_commit_window = group_commit_window
+        self.max_batch = max_batch
+        self.fsync = fsync
+        self.checkpoint_every = checkpoint_every
+
+        self._index: Dict[str, IndexEntry] = {}
+        self._segment_bytes: Dict[int, int] = {}
+        self._read_fds: Dict[int, int] = {}
+        self._lock = threading.RLock()
+        # Readers only take this short lock (never held across a write or fsync).
+        # Descriptors swapped out by compaction are closed once no read is using them.
+        self._fd_lock = threading.Lock()
+        self._readers = 0
+        self._retired_fds: List[int] = []
+        self._compaction_lock = threading.Lock()
+
+        self._active_id = 0
+        self._active_fd = None
+        self._active_offset = 0
+        self._writes_since_checkpoint = 0
+
+        self._queue: queue.Queue = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._closed = False
+
+        self.metrics = defaultdict(int)
+        self.recovery: Dict[str, Any] = {}
+
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+
+    # Recovery
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _segment_ids(self) -> List[int]:
+        return sorted(
+            _segment_id(name) for name in os.listdir(self.directory)
+            if name.startswith('segment_') and name.endswith(SEGMENT_SUFFIX)
+        )
+
+    def _finish_interrupted_compaction(self):
+        for name in os.listdir(self.directory):
+            if name.endswith('.tmp'):
+                os.remove(self._path(name))
+            elif name.endswith(COMPACTED_SUFFIX):
+                # The merged file was complete; drop what it replaces and move it into place
+                target_id = _segment_id(name)
+                for segment_id in self._segment_ids():
+                    if segment_id <= target_id:
+                        os.remove(self._path(_segment_name(segment_id)))
+                os.replace(self._path(name), self._path(_segment_name(target_id)))
+                logger.warning(f"Finished interrupted compaction into segment {target_id}")
+
+    def _load_checkpoint(self, segment_ids: List[int]) -> Optional[Tuple[int, int]]:
+        path = self._path(CHECKPOINT_FILE)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            segment_id, offset = checkpoint['segment_id'], checkpoint['offset']
+            index = {key: tuple(entry) for key, entry in checkpoint['index'].items()}
+            known = set(segment_ids)
+            if segment_id not in known or offset > os.path.getsize(self._path(_segment_name(segment_id))):
+                raise ValueError("checkpoint is ahead of the log")
+            if any(entry[0] not in known for entry in index.values()):
+                raise ValueError("checkpoint references missing segments")
+        except Exception as e:
+            logger.warning(f"Ignoring memory store checkpoint: {e}")
+            return None
+
+        self._index = index
+        return segment_id, offset
+
+    def _recover(self):
+        start = time.perf_counter()
+        self._finish_interrupted_compaction()
+
+        segment_ids = self._segment_ids()
+        resume = self._load_checkpoint(segment_ids)
+        replayed = truncated = 0
+
+        for segment_id in segment_ids:
+            if resume and segment_id < resume[0]:
+                continue
+            offset = resume[1] if resume and segment_id == resume[0] else 0
+            path = self._path(_segment_name(segment_id))
+
+            end = offset
+            for op, key, value_offset, value_len, end in self._scan(path, offset):
+                if op == OP_PUT:
+                    self._index[key] = (segment_id, value_offset, value_len)
+                else:
+                    self._index.pop(key, None)
+                replayed += 1
+
+            size = os.path.getsize(path)
+            if end < size:
+                if segment_id == segment_ids[-1]:
+                    # Torn write from a crash: drop the partial tail
+                    with open(path, 'r+b') as f:
+                        f.truncate(end)
+                    truncated += size - end
+                    logger.warning(f"Truncated {size - end} bytes of torn writes from segment {segment_id}")
+                else:
+                    logger.error(f"Corrupt record in sealed segment {segment_id} at offset {end}")
+
+        for segment_id in segment_ids:
+            self._segment_bytes[segment_id] = os.path.getsize(self._path(_segment_name(segment_id)))
+
+        self._open_active(segment_ids[-1] if segment_ids else 1)
+
+        self.recovery = {
+            'from_checkpoint': resume is not None,
+            'replayed_records': replayed,
+            'truncated_bytes': truncated,
+            'keys': len(self._index),
+            'duration_ms': round((time.perf_counter() - start) * 1000, 2)
+        }
+        logger.info(f"🧠 Memory segment store recovered {len(self._index)} keys "
+                    f"({replayed} records replayed) in {self.recovery['duration_ms']}ms")
+
+    def _scan(self, path: str, offset: int) -> Iterator[Tuple[int, str, int, int, int]]:
+        """Yield (op, key, value offset, value length, record end) for every intact record"""
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    return
+                crc, op, key_len, value_len = RECORD_HEADER.unpack(header)
+                payload = f.read(key_len + value_len)
+                if len(payload) < key_len + value_len or zlib.crc32(header[4:] + payload) != crc:
+                    return
+                value_offset = offset + RECORD_HEADER.size + key_len
+                offset = value_offset + value_len
+                yield op, payload[:key_len].decode('utf-8'), value_offset, value_len, offset
+
+    def _open_active(self, segment_id: int):
+        if self._active_fd is not None:
+            os.close(self._active_fd)
+        self._active_id = segment_id
+        path = self._path(_segment_name(segment_id))
+        self._active_fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._active_offset = os.path.getsize(path)
+        self._segment_bytes.setdefault(segment_id, self._active_offset)
+
+    def _roll(self):
+        """Seal the active segment and start a new one"""
+        self._open_active(self._active_id + 1)
+        self.metrics['segments_rolled'] += 1
+
+    # Reads
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._fd_lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            fd = self._open_reader(entry[0])
+        self.metrics['reads'] += 1
+        return self._pread(fd, entry)
+
+    def _open_reader(self, segment_id: int) -> int:
+        """Descriptor for a segment, pinned until _pread releases it (caller holds _fd_lock)"""
+        fd = self._read_fds.get(segment_id)
+        if fd is None:
+            fd = os.open(self._path(_segment_name(segment_id)), os.O_RDONLY)
+            self._read_fds[segment_id] = fd
+        self._readers += 1
+        return fd
+
+    def _pread(self, fd: int, entry: IndexEntry) -> bytes:
+        try:
+            return os.pread(fd, entry[2], entry[1])
+        finally:
+            with self._fd_lock:
+                self._readers -= 1
+                if not self._readers:
+                    self._close_retired()
+
+    def _close_retired(self):
+        while self._retired_fds:
+            os.close(self._retired_fds.pop())
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._index)
+
+    def value_size(self, key: str) -> Optional[int]:
+        entry = self._index.get(key)
+        return entry[2] if entry is not None else None
+
+    # Writes
+
+    def write_batch(self, operations: List[Tuple[int, str, Optional[bytes]]]):
+        """Append a batch of (op, key, value) records with a single write and fsync"""
+        if not operations:
+            return
+
+        with self._lock:
+            buffer = bytearray()
+            updates = []
+            offset = self._active_offset
+            for op, key, value in operations:
+                key_bytes = key.encode('utf-8')
+                value = value or b''
+                value_offset = offset + len(buffer) + RECORD_HEADER.size + len(key_bytes)
+                buffer += encode_record(op, key_bytes, value)
+                updates.append((op, key, value_offset, len(value)))
+
+            os.write(self._active_fd, bytes(buffer))
+            if self.fsync:
+                os.fsync(self._active_fd)
+
+            for op, key, value_offset, value_len in updates:
+                if op == OP_PUT:
+                    self._index[key] = (self._active_id, value_offset, value_len)
+                else:
+                    self._index.pop(key, None)
+
+            self._active_offset += len(buffer)
+            self._segment_bytes[self._active_id] = self._active_offset
+            self._writes_since_checkpoint += len(operations)
+
+            self.metrics['batches'] += 1
+            self.metrics['records_written'] += len(operations)
+            self.metrics['bytes_written'] += len(buffer)
+
+            if self._active_offset >= self.max_segment_bytes:
+                self._roll()
+
+        if self.checkpoint_every and self._writes_since_checkpoint >= self.checkpoint_every:
+            self.checkpoint()
+
+    def delete_many(self, keys: List[str]) -> int:
+        """Delete existing keys in one batch; returns the value bytes released"""
+        with self._lock:
+            present = [(key, self._index[key][2]) for key in keys if key in self._index]
+        self.write_batch([(OP_DELETE, key, None) for key, _ in present])
+        return sum(size for _, size in present)
+
+    def put(self, key: str, value: bytes):
+        self._submit(OP_PUT, key, value).result()
+
+    def delete(self, key: str):
+        self._submit(OP_DELETE, key, None).result()
+
+    async def put_async(self, key: str, value: bytes):
+        """Durable once awaited; concurrent writers share one fsync"""
+        await asyncio.wrap_future(self._submit(OP_PUT, key, value))
+
+    async def delete_async(self, key: str):
+        await asyncio.wrap_future(self._submit(OP_DELETE, key, None))
+
+    def _submit(self, op: int, key: str, value: Optional[bytes]) -> concurrent.futures.Future:
+        if self._closed:
+            raise RuntimeError("Memory segment store is closed")
+
+        future = concurrent.futures.Future()
+        self._queue.put((op, key, value, future))
+
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._writer_loop, name='memory-segment-writer', daemon=True)
+                    self._writer.start()
+        return future
+
+    def _writer_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            # Group commit: gather whatever else arrives within the window
+            batch = [item]
+            deadline = time.monotonic() + self.group_commit_window
+            stop = False
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            try:
+                self.write_batch([(op, key, value) for op, key, value, _ in batch])
+            except Exception as e:
+                logger.error(f"Memory segment write failed: {e}")
+                for *_, future in batch:
+                    future.set_exception(e)
+            else:
+                for *_, future in batch:
+                    future.set_result(None)
+
+            if stop:
+                return
+
+    # Checkpoint and compaction
+
+    def checkpoint(self):
+        """Persist the index so recovery only replays records written after this point"""
+        with self._lock:
+            snapshot = {
+                'version': 1,
+                'segment_id': self._active_id,
+                'offset': self._active_offset,
+                'index': self._index.copy()
+            }
+            self._writes_since_checkpoint = 0
+
+        tmp_path = self._path(CHECKPOINT_FILE + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._path(CHECKPOINT_FILE))
+        self.metrics['checkpoints'] += 1
+
+    def _live_bytes(self) -> Dict[int, int]:
+        live = defaultdict(int)
+        for key, (segment_id, _, value_len) in self._index.items():
+            live[segment_id] += RECORD_HEADER.size + len(key.encode('utf-8')) + value_len
+        return live
+
+    def garbage_ratio(self) -> float:
+        """Fraction of log bytes that belong to overwritten or deleted records"""
+        with self._lock:
+            total = sum(self._segment_bytes.values())
+            if not total:
+                return 0.0
+            return 1 - sum(self._live_bytes().values()) / total
+
+    def maybe_compact(self, threshold: float = 0.5, min_garbage_bytes: int = 1024 * 1024) -> bool:
+        """Compact once enough of the log is garbage to be worth rewriting"""
+        ratio = self.garbage_ratio()
+        garbage_bytes = ratio * sum(self._segment_bytes.values())
+        if ratio >= threshold and garbage_bytes >= min_garbage_bytes:
+            self.compact()
+            return True
+        return False
+
+    def compact(self):
+        """
+        Merge every sealed segment into one, keeping only live records.
+        Tombstones can be dropped because every older value is merged away too.
+        """
+        with self._compaction_lock:
+            with self._lock:
+                if self._active_offset > 0:
+                    self._roll()
+                sealed = sorted(s for s in self._segment_bytes if s != self._active_id)
+                if not sealed:
+                    return
+                target_id = sealed[-1]
+                live = [(key, entry) for key, entry in self._index.items() if entry[0] in sealed]
+
+                # Offsets in the old checkpoint are about to change
+                if os.path.exists(self._path(CHECKPOINT_FILE)):
+                    os.remove(self._path(CHECKPOINT_FILE))
+
+            tmp_path = self._path(_segment_name(target_id) + '.tmp')
+            moved: Dict[str, Tuple[IndexEntry, IndexEntry]] = {}
+            offset = 0
+            with open(tmp_path, 'wb') as out:
+                for key, entry in live:
+                    value = self._read_entry(entry)
+                    if value is None:
+                        continue
+                    key_bytes = key.encode('utf-8')
+                    record = encode_record(OP_PUT, key_bytes, value)
+                    out.write(record)
+                    moved[key] = (entry, (target_id, offset + RECORD_HEADER.size + len(key_bytes), len(value)))
+                    offset += len(record)
+                out.flush()
+                os.fsync(out.fileno())
+
+            compacted_path = self._path(_segment_name(target_id).replace(SEGMENT_SUFFIX, COMPACTED_SUFFIX))
+            os.replace(tmp_path, compacted_path)
+
+            with self._lock:
+                reclaimed = sum(self._segment_bytes.pop(s) for s in sealed) - offset
+                with self._fd_lock:
+                    # Index and files swap together, so a reader never pairs an entry with the wrong file
+                    for key, (old_entry, new_entry) in moved.items():
+                        if self._index.get(key) == old_entry:  # Not overwritten meanwhile
+                            self._index[key] = new_entry
+                    for segment_id in sealed:
+                        fd = self._read_fds.pop(segment_id, None)
+                        if fd is not None:
+                            self._retired_fds.append(fd)
+                        os.remove(self._path(_segment_name(segment_id)))
+                    os.replace(compacted_path, self._path(_segment_name(target_id)))
+                    if not self._readers:
+                        self._close_retired()
+                self._segment_bytes[target_id] = offset
+
+                self.metrics['compactions'] += 1
+                self.metrics['bytes_reclaimed'] += reclaimed
+
+        self.checkpoint()
+        logger.info(f"🧹 Compacted {len(sealed)} memory segments, reclaimed {reclaimed} bytes")
+
+    def _read_entry(self, entry: IndexEntry) -> Optional[bytes]:
+        with self._fd_lock:
+            try:
+                fd = self._open_reader(entry[0])
+            except FileNotFoundError:
+                return None
+        return self._pread(fd, entry)
+
+    # Lifecycle
+
+    def close(self):
+        """Drain pending writes, checkpoint and release file handles"""
+        if self._closed:
+            return
+        self._closed = True
+
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+
+        self.checkpoint()
+        with self._lock, self._fd_lock:
+            for fd in self._read_fds.values():
+                os.close(fd)
+            self._read_fds.clear()
+            self._close_retired()
+            if self._active_fd is not None:
+                os.close(self._active_fd)
+                self._active_fd = None
+
+    def get_status(self) -> Dict[str, Any]:
+        batches = self.metrics['batches']
+        return {
+            'directory': self.directory,
+            'keys': len(self._index),
+            'segments': len(self._segment_bytes),
+            'total_bytes': sum(self._segment_bytes.values()),
+            'garbage_ratio': round(self.garbage_ratio(), 3),
+            'batches': batches,
+            'records_written': self.metrics['records_written'],
+            'avg_batch_size': round(self.metrics['records_written'] / batches, 2) if batches else None,
+            'compactions': self.metrics['compactions'],
+            'bytes_reclaimed': self.metrics['bytes_reclaimed'],
+            'checkpoints': self.metrics['checkpoints'],
+            'recovery': self.recovery
+        }
+
+def _read_pickle_file(path: str) -> Tuple[str, Optional[bytes]]:
+    key = os.path.basename(path)[:-len('.pkl')]
+    try:
+        with open(path, 'rb') as f:
+            return key, f.read()
+    except OSError as e:
+        logger.error(f"Failed to read {path}: {e}")
+        return key, None
+
+def migrate_pickle_directory(source_dir: str, store: SegmentLogStore, workers: int = 8,
+                             batch_size: int = 500, remove_source: bool = False) -> Dict[str, int]:
+    """
+    Copy a legacy memories/<id>.pkl directory into a segment store.
+    Files are read in parallel and written in batches; keys already present are skipped,
+    so an interrupted migration can simply be re-run.
+    """
+    paths = [
+        os.path.join(source_dir, name) for name in os.listdir(source_dir)
+        if name.endswith('.pkl') and name[:-len('.pkl')] not in store
+    ]
+    stats = {'found': len(paths), 'migrated': 0, 'failed': 0}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        for start in range(0, len(paths), batch_size):
+            chunk = paths[start:start + batch_size]
+            loaded = list(executor.map(_read_pickle_file, chunk))
+
+            operations = [(OP_PUT, key, payload) for key, payload in loaded if payload is not None]
+            store.write_batch(operations)
+            stats['migrated'] += len(operations)
+            stats['failed'] += len(loaded) - len(operations)
+
+            if remove_source:
+                for path, (_, payload) in zip(chunk, loaded):
+                    if payload is not None:
+                        os.remove(path)
+
+            logger.info(f"Migrated {stats['migrated']}/{stats['found']} memories")
+
+    store.checkpoint()
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert mama_bear_memory/memories/*.pkl into a segment store")
+    parser.add_argument('--storage-path', default='./mama_bear_memory',
+                        help="EnhancedMemoryManager storage path")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--remove-source', action='store_true',
+                        help="Delete each .pkl file once it is committed to the store")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    store = SegmentLogStore(os.path.join(args.storage_path, 'segments'))
+    try:
+        stats = migrate_pickle_directory(
+            os.path.join(args.storage_path, 'memories'), store,
+            workers=args.workers, batch_size=args.batch_size, remove_source=args.remove_source
+        )
+    finally:
+        store.close()
+    print(json.dumps(stats))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+# backend/services/memory_timeline.py
+"""
+🐻 Mama Bear Memory Timeline
+Time-ordered per-user memory index with per-agent and per-type postings,
+so recent and filtered lookups never touch stored records
+"""
+
+import bisect
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class MemoryMeta:
+    """The few fields needed to filter memories without loading them"""
+
+    __slots__ = ('id', 'user_id', 'agent_id', 'type', 'importance', 'created_ts')
+
+    def __init__(self, id: str, user_id: str, agent_id: Optional[str], type: str, importance: int, created_ts: float):
+        self.id = id
+        self.user_id = user_id
+        self.agent_id = agent_id
+        self.type = type
+        self.importance = importance
+        self.created_ts = created_ts
+
+    @classmethod
+    def from_record(cls, memory) -> 'MemoryMeta':
+        return cls(
+            id=memory.id,
+            user_id=memory.user_id,
+            agent_id=memory.agent_id,
+            type=getattr(memory.type, 'value', memory.type),
+            importance=getattr(memory.importance, 'value', memory.importance),
+            created_ts=memory.created_at.timestamp()
+        )
+
+class TimeOrderedPostings:
+    """Memory IDs kept sorted by creation time (parallel lists for bisect)"""
+
+    __slots__ = ('timestamps', 'ids')
+
+    def __init__(self):
+        self.timestamps: List[float] = []
+        self.ids: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, timestamp: float, memory_id: str):
+        if not self.timestamps or timestamp >= self.timestamps[-1]:
+            # Fast path: new memories arrive in time order
+            self.timestamps.append(timestamp)
+            self.ids.append(memory_id)
+        else:
+            position = bisect.bisect_right(self.timestamps, timestamp)
+            self.timestamps.insert(position, timestamp)
+            self.ids.insert(position, memory_id)
+
+    def remove(self, timestamp: float, memory_id: str) -> bool:
+        position = bisect.bisect_left(self.timestamps, timestamp)
+        while position < len(self.ids) and self.timestamps[position] == timestamp:
+            if self.ids[position] == memory_id:
+                del self.timestamps[position]
+                del self.ids[position]
+                return True
+            position += 1
+        return False
+
+    def newest_since(self, since_ts: Optional[float]) -> Tuple[int, int]:
+        """Index range [start, end) of entries created at or after since_ts"""
+        start = bisect.bisect_left(self.timestamps, since_ts) if since_ts is not None else 0
+        return start, len(self.ids)
+
+class MemoryTimeline:
+    """
+    Per-user, per-(user, agent) and per-(user, type) time-ordered postings
+    plus a metadata table, all kept in memory.
+    """
+
+    def __init__(self):
+        self.meta: Dict[str, MemoryMeta] = {}
+        self.by_user: Dict[str, TimeOrderedPostings] = {}
+        self.by_agent: Dict[Tuple[str, str], TimeOrderedPostings] = {}
+        self.by_type: Dict[Tuple[str, str], TimeOrderedPostings] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self.meta
+
+    def __len__(self) -> int:
+        return len(self.meta)
+
+    def user_ids(self) -> List[str]:
+        with self._lock:
+            return list(self.by_user)
+
+    def _postings_for(self, meta: MemoryMeta):
+        yield self.by_user.setdefault(meta.user_id, TimeOrderedPostings())
+        if meta.agent_id:
+            yield self.by_agent.setdefault((meta.user_id, meta.agent_id), TimeOrderedPostings())
+        yield self.by_type.setdefault((meta.user_id, meta.type), TimeOrderedPostings())
+
+    def add(self, memory):
+        meta = MemoryMeta.from_record(memory)
+        with self._lock:
+            if meta.id in self.meta:
+                return
+            self.meta[meta.id] = meta
+            for postings in self._postings_for(meta):
+                postings.add(meta.created_ts, meta.id)
+
+    def remove(self, memory_id: str) -> Optional[MemoryMeta]:
+        with self._lock:
+            meta = self.meta.pop(memory_id, None)
+            if meta is not None:
+                for postings in self._postings_for(meta):
+                    postings.remove(meta.created_ts, memory_id)
+            return meta
+
+    def get_meta(self, memory_id: str) -> Optional[MemoryMeta]:
+        with self._lock:
+            return self.meta.get(memory_id)
+
+    def touch(self, memory_id: str, timestamp: float):
+        """Access times are not indexed here; they live on the records"""
+
+    def recent(self, user_id: str, since: datetime = None, limit: int = 20, agent_id: str = None,
+               memory_type: str = None, min_importance: int = None) -> List[str]:
+        """
+        Newest-first memory IDs for a user, optionally created since `since`
+        and filtered by agent, type and minimum importance using metadata only
+        """
+        since_ts = since.timestamp() if since else None
+        with self._lock:
+            if agent_id:
+                postings = self.by_agent.get((user_id, agent_id))
+                residual_type = memory_type
+            elif memory_type:
+                postings = self.by_type.get((user_id, memory_type))
+                residual_type = None
+            else:
+                postings = self.by_user.get(user_id)
+                residual_type = None
+
+            if not postings:
+                return []
+
+            start, end = postings.newest_since(since_ts)
+            results = []
+            for position in range(end - 1, start - 1, -1):
+                memory_id = postings.ids[position]
+                meta = self.meta[memory_id]
+                if residual_type and meta.type != residual_type:
+                    continue
+                if min_importance is not None and meta.importance < min_importance:
+                    continue
+                results.append(memory_id)
+                if len(results) >= limit:
+                    break
+            return results
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'memories': len(self.meta),
+                'users': len(self.by_user),
+                'agent_postings': len(self.by_agent),
+                'type_postings': len(self.by_type)
+            }
@@ -0,0 +1,266 @@
+# backend/services/profile_store.py
+"""
+🐻 Mama Bear Profile Store
+Write-behind user profile persistence: lazy loads, dirty tracking,
+coalesced periodic flushes, atomic file replacement and a bounded cache
+"""
+
+import asyncio
+import atexit
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class ProfileStore:
+    """
+    Keeps user profiles in memory and writes changed ones back in batches.
+    Many updates to the same profile between flushes cost a single write.
+    The flusher is a daemon thread, so it keeps running whichever event loop
+    the callers happen to use, and pending profiles are flushed at exit.
+
+    A profile is encoded when it is marked dirty, so the flusher writes that
+    snapshot and never reads an object another thread is changing. Callers
+    that mutate a shared profile hold `lock` until they have marked it.
+    Beyond max_profiles, the least recently used clean profiles are dropped
+    from memory; they are reloaded from disk on the next access.
+    """
+
+    def __init__(self, directory: str, factory: Callable[[str], Any], flush_interval: float = 5.0,
+                 fsync: bool = True, dumps: Callable[[Any], bytes] = pickle.dumps,
+                 loads: Callable[[bytes], Any] = pickle.loads, suffix: str = '.pkl',
+                 legacy_suffix: Optional[str] = None, max_profiles: int = 10000):
+        self.directory = directory
+        self.factory = factory
+        self.flush_interval = flush_interval
+        self.max_profiles = max_profiles
+        self.fsync = fsync
+        self.dumps = dumps
+        self.loads = loads
+        self.suffix = suffix
+        self.legacy_suffix = legacy_suffix  # Still read; replaced on the next write
+
+        self.profiles: OrderedDict = OrderedDict()  # LRU order, most recent last
+        self.dirty: Dict[str, bytes] = {}  # user_id -> snapshot awaiting the next flush
+        self._flushing: Dict[str, bytes] = {}  # Taken out of dirty but not yet on disk
+        self._stored_ids: Optional[set] = None  # Listed once, then kept up to date by _write
+        self.lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+        self.metrics = defaultdict(float)
+
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, user_id: str, suffix: str = None) -> str:
+        return os.path.join(self.directory, f"{user_id}{suffix or self.suffix}")
+
+    def _existing_path(self, user_id: str) -> Optional[str]:
+        for suffix in (self.suffix, self.legacy_suffix):
+            if suffix and os.path.exists(self._path(user_id, suffix)):
+                return self._path(user_id, suffix)
+        return None
+
+    def _known_ids(self) -> set:
+        if self._stored_ids is None:
+            user_ids = set()
+            for name in os.listdir(self.directory):
+                for suffix in (self.suffix, self.legacy_suffix):
+                    if suffix and name.endswith(suffix):
+                        user_ids.add(name[:-len(suffix)])
+            with self.lock:
+                if self._stored_ids is None:
+                    self._stored_ids = user_ids
+        return self._stored_ids
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self.profiles or user_id in self._known_ids()
+
+    def __len__(self) -> int:
+        stored = self._known_ids()
+        with self.lock:
+            return len(stored) + sum(1 for user_id in self.profiles if user_id not in stored)
+
+    def stored_user_ids(self) -> List[str]:
+        with self.lock:
+            return list(self._known_ids())
+
+    def _read(self, user_id: str) -> Optional[Any]:
+        path = self._existing_path(user_id)
+        if path is None:
+            return None
+        with open(path, 'rb') as f:
+            return self.loads(f.read())
+
+    def _cached(self, user_id: str):
+        with self.lock:
+            profile = self.profiles.get(user_id)
+            if profile is not None:
+                self.profiles.move_to_end(user_id)
+            return profile
+
+    async def get(self, user_id: str):
+        """Return the profile, loading it on first access or creating a new one"""
+        profile = self._cached(user_id)
+        if profile is not None:
+            return profile
+
+        try:
+            loaded = await asyncio.to_thread(self._read, user_id)
+        except Exception as e:
+            logger.error(f"Failed to load user profile {user_id}: {e}")
+            loaded = None
+
+        with self.lock:
+            # Another caller may have loaded it while we were reading
+            profile = self._cached(user_id)
+            if profile is not None:
+                return profile
+
+            if loaded is not None:
+                self.metrics['loads'] += 1
+                profile = loaded
+            else:
+                profile = self.factory(user_id)
+                self.metrics['created'] += 1
+
+            self.profiles[user_id] = profile
+            if loaded is None:
+                self.mark_dirty(user_id)
+            else:
+                self._evict_clean()
+        return profile
+
+    def mark_dirty(self, user_id: str, profile: Any = None):
+        """Snapshot the profile for the next flush (pass the object if it may have been evicted)"""
+        with self.lock:
+            if profile is None:
+                profile = self.profiles.get(user_id)
+                if profile is None:
+                    return
+            else:
+                self.profiles[user_id] = profile
+            self.profiles.move_to_end(user_id)
+
+            try:
+                data = self.dumps(profile)
+            except Exception as e:
+                logger.error(f"Failed to encode user profile {user_id}: {e}")
+                return
+            if user_id in self.dirty:
+                self.metrics['coalesced_updates'] += 1
+            self.dirty[user_id] = data
+            self._evict_clean()
+
+    def _evict_clean(self):
+        """Drop least recently used clean profiles beyond max_profiles (caller holds the lock)"""
+        excess = len(self.profiles) - self.max_profiles
+        if excess <= 0:
+            return
+        for user_id in list(self.profiles):
+            if excess <= 0:
+                break
+            if user_id not in self.dirty and user_id not in self._flushing:
+                del self.profiles[user_id]
+                self.metrics['evictions'] += 1
+                excess -= 1
+
+    def _write(self, user_id: str, data: bytes):
+        path = self._path(user_id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        if self.legacy_suffix:
+            legacy_path = self._path(user_id, self.legacy_suffix)
+            if os.path.exists(legacy_path):
+                os.remove(legacy_path)
+        with self.lock:
+            self._known_ids().add(user_id)
+
+    def flush_sync(self) -> int:
+        """Write every dirty profile; returns the number written"""
+        with self._flush_lock:
+            with self.lock:
+                if not self.dirty:
+                    return 0
+                pending, self.dirty = self.dirty, {}
+                self._flushing = pending
+
+            start = time.perf_counter()
+            written, failed = 0, {}
+            for user_id, data in pending.items():
+                try:
+                    self._write(user_id, data)
+                    written += 1
+                except Exception as e:
+                    logger.error(f"Failed to save user profile {user_id}: {e}")
+                    failed[user_id] = data
+
+            with self.lock:
+                # A newer snapshot taken meanwhile wins over a failed one
+                for user_id, data in failed.items():
+                    self.dirty.setdefault(user_id, data)
+                self._flushing = {}
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.metrics['flushes'] += 1
+            self.metrics['profiles_written'] += written
+            self.metrics['flush_ms_total'] += elapsed_ms
+            self.metrics['last_flush_ms'] = elapsed_ms
+            self.metrics['max_flush_ms'] = max(self.metrics['max_flush_ms'], elapsed_ms)
+
+            logger.debug(f"Flushed {written} user profiles in {elapsed_ms:.1f}ms")
+            return written
+
+    async def flush(self) -> int:
+        return await asyncio.to_thread(self.flush_sync)
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush_sync()
+            except Exception as e:
+                logger.error(f"Profile flush error: {e}")
+
+    def start(self):
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name='profile-flusher', daemon=True)
+            self._flusher.start()
+            atexit.register(self.flush_sync)
+
+    def close_sync(self):
+        """Stop the periodic flush and write everything still dirty"""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush_sync()
+
+    async def close(self):
+        await asyncio.to_thread(self.close_sync)
+
+    def get_status(self) -> Dict[str, Any]:
+        flushes = self.metrics['flushes']
+        return {
+            'loaded_profiles': len(self.profiles),
+            'max_profiles': self.max_profiles,
+            'evictions': int(self.metrics['evictions']),
+            'pending_dirty': len(self.dirty),
+            'flushes': int(flushes),
+            'profiles_written': int(self.metrics['profiles_written']),
+            'coalesced_updates': int(self.metrics['coalesced_updates']),
+            'avg_flush_ms': round(self.metrics['flush_ms_total'] / flushes, 2) if flushes else None,
+            'last_flush_ms': round(self.metrics['last_flush_ms'], 2),
+            'max_flush_ms': round(self.metrics['max_flush_ms'], 2),
+            'flush_interval_s': self.flush_interval
+        }
@@ -11,16 +11,21 @@ import json
 import os
 import uuid
 
+from .state_store import get_state_store
+
 logger = logging.getLogger(__name__)
 
 class ScrapybaraManager:
     """Manages Scrapybara VM instances and autonomous task execution"""
     
-    def __init__(self):
+    def __init__(self, state_store=None):
         self.api_key = os.getenv('SCRAPYBARA_API_KEY', 'scrapy-abaf2356-01d5-4d65-88d3-eebcd177b214')
         self.active_workspaces = {}
         self.active_scouts = {}
         
+        # Workspaces are mirrored here so every worker can see them
+        self.workspace_store = (state_store or get_state_store()).namespace('workspaces')
+        
         # Initialize Scrapybara client (simulated for now)
         try:
             self._init_scrapybara_client()
@@ -28,6 +33,20 @@ class ScrapybaraManager:
         except Exception as e:
             logger.warning(f"Scrapybara initialization failed: {e}")
     
+    def _persist_workspace(self, workspace: Dict[str, Any]):
+        """Publish workspace state to the shared store"""
+        try:
+            self.workspace_store[workspace['workspace_id']] = workspace
+        except Exception as e:
+            logger.error(f"Failed to persist workspace {workspace['workspace_id']}: {e}")
+    
+    def _find_workspace(self, workspace_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a workspace locally, then in the shared store"""
+        workspace = self.active_workspaces.get(workspace_id)
+        if workspace is None:
+            workspace = self.workspace_store.get(workspace_id)
+        return workspace
+    
     def _init_scrapybara_client(self):
         """Initialize Scrapybara client"""
         # This would normally initialize the actual Scrapybara client
@@ -64,6 +83,7 @@ class ScrapybaraManager:
             
             # Store workspace
             self.active_workspaces[workspace_id] = workspace
+            self._persist_workspace(workspace)
             
             # Simulate setup process
             await self._setup_workspace(workspace)
@@ -97,27 +117,29 @@ class ScrapybaraManager:
                     'step': step,
                     'progress': int((i + 1) / len(setup_steps) * 100)
                 }
-                logger.info(f"Workspace {workspace_id}: {step}")
+                self._persist_workspace(workspace)
+                logger.debug(f"Workspace {workspace_id}: {step}", extra={'workspace_id': workspace_id})
             
             workspace['status'] = 'ready'
             workspace['ready_at'] = datetime.now().isoformat()
+            self._persist_workspace(workspace)
             
         except Exception as e:
             workspace['status'] = 'error'
             workspace['error'] = str(e)
+            self._persist_workspace(workspace)
             logger.error(f"Workspace setup error: {e}")
     
     async def get_workspace_status(self, workspace_id: str) -> Dict[str, Any]:
         """Get workspace status"""
         
-        if workspace_id not in self.active_workspaces:
+        workspace = self._find_workspace(workspace_id)
+        if workspace is None:
             return {
                 'error': 'Workspace not found',
                 'workspace_id': workspace_id
             }
         
-        workspace = self.active_workspaces[workspace_id]
-        
         # Simulate resource usage
         return {
             'workspace_id': workspace_id,
@@ -164,14 +186,13 @@ class ScrapybaraManager:
         """Execute an action in a workspace"""
         
         try:
-            if workspace_id not in self.active_workspaces:
+            workspace = self._find_workspace(workspace_id)
+            if workspace is None:
                 return {
                     'success': False,
                     'error': 'Workspace not found'
                 }
             
-            workspace = self.active_workspaces[workspace_id]
-            
             # Simulate different actions
             if action == 'run_command':
                 return await self._run_command(workspace, params.get('command', ''))
@@ -377,15 +398,16 @@ class ScrapybaraManager:
     async def stop_workspace(self, workspace_id: str) -> Dict[str, Any]:
         """Stop a workspace"""
         
-        if workspace_id not in self.active_workspaces:
+        workspace = self._find_workspace(workspace_id)
+        if workspace is None:
             return {
                 'success': False,
                 'error': 'Workspace not found'
             }
         
-        workspace = self.active_workspaces[workspace_id]
         workspace['status'] = 'stopped'
         workspace['stopped_at'] = datetime.now().isoformat()
+        self._persist_workspace(workspace)
         
         return {
             'success': True,
@@ -396,13 +418,14 @@ class ScrapybaraManager:
     async def delete_workspace(self, workspace_id: str) -> Dict[str, Any]:
         """Delete a workspace"""
         
-        if workspace_id not in self.active_workspaces:
+        if self._find_workspace(workspace_id) is None:
             return {
                 'success': False,
                 'error': 'Workspace not found'
             }
         
-        del self.active_workspaces[workspace_id]
+        self.active_workspaces.pop(workspace_id, None)
+        self.workspace_store.pop(workspace_id, None)
         
         return {
             'success': True,
@@ -414,9 +437,10 @@ class ScrapybaraManager:
         """Get Scrapybara manager status"""
         
         try:
-            active_workspaces = len([w for w in self.active_workspaces.values() 
+            workspaces = self.workspace_store.values()
+            active_workspaces = len([w for w in workspaces
                                    if w.get('status') == 'ready'])
-            total_workspaces = len(self.active_workspaces)
+            total_workspaces = len(workspaces)
             active_scouts = len([s for s in self.active_scouts.values() 
                                if s.get('status') in ['planning', 'executing']])
             
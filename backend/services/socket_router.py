@@ -0,0 +1,385 @@
+# backend/services/socket_router.py
+"""
+🐻 Mama Bear Socket Event Router
+Single dispatch point for Socket.IO events: one handler per event,
+shared middleware (auth, admission control, timing) and per-event metrics
+"""
+
+import asyncio
+import concurrent.futures
+import contextvars
+import inspect
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .logging_pipeline import set_request_id
+
+logger = logging.getLogger(__name__)
+
+# Latency histogram bucket upper bounds in milliseconds
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+class DuplicateHandlerError(Exception):
+    """A second handler was registered for an event that already has one"""
+    pass
+
+@dataclass
+class SocketEventContext:
+    """Everything middleware needs to know about one incoming event"""
+    event: str
+    args: Tuple[Any, ...]
+    sid: Optional[str] = None
+    rejected: Optional[str] = None
+
+    @property
+    def payload(self) -> Dict[str, Any]:
+        if self.args and isinstance(self.args[0], dict):
+            return self.args[0]
+        return {}
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is the overflow bucket
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, value_ms: float):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value_ms <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given percentile"""
+        if not self.count:
+            return None
+        target = self.count * pct / 100
+        running = 0
+        for i, bucket_count in enumerate(self.counts):
+            running += bucket_count
+            if running >= target:
+                return self.buckets[i] if i < len(self.buckets) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"le_{bound}" for bound in self.buckets] + ['le_inf']
+        return {
+            'buckets': dict(zip(labels, self.counts)),
+            'count': self.count,
+            'avg_ms': round(self.total_ms / self.count, 2) if self.count else None,
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'max_ms': round(self.max_ms, 2)
+        }
+
+@dataclass
+class EventMetrics:
+    """Counters and latency for one event type"""
+    received: int = 0
+    completed: int = 0
+    failed: int = 0
+    rejected: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'received': self.received,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': dict(self.rejected),
+            'latency': self.latency.to_dict()
+        }
+
+class AuthMiddleware:
+    """
+    Token check at connect time; later events are only accepted from
+    sessions that connected with the token
+    """
+
+    def __init__(self, token: str):
+        self.token = token
+        self.authenticated = set()
+        self._lock = threading.Lock()
+
+    def _presented_token(self, context: SocketEventContext) -> Optional[str]:
+        auth = context.args[0] if context.args else None
+        if isinstance(auth, dict) and auth.get('token'):
+            return auth['token']
+        try:
+            from flask import request
+            return request.args.get('token')
+        except (ImportError, RuntimeError):
+            return None  # No request context
+
+    def __call__(self, context: SocketEventContext, call_next: Callable):
+        if context.event == 'connect':
+            if self._presented_token(context) != self.token:
+                context.rejected = 'unauthorized'
+                return False  # Refuses the connection
+            with self._lock:
+                self.authenticated.add(context.sid)
+            return call_next(context)
+
+        if context.event == 'disconnect':
+            with self._lock:
+                self.authenticated.discard(context.sid)
+            return call_next(context)
+
+        if context.sid not in self.authenticated:
+            context.rejected = 'unauthorized'
+            return None
+        return call_next(context)
+
+class AdmissionControlMiddleware:
+    """Sheds events once too many are already being handled"""
+
+    def __init__(self, max_in_flight: int = 64, exempt: Tuple[str, ...] = ('connect', 'disconnect')):
+        self.max_in_flight = max_in_flight
+        self.exempt = set(exempt)
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, context: SocketEventContext, call_next: Callable):
+        if context.event in self.exempt:
+            return call_next(context)
+
+        with self._lock:
+            if self.in_flight >= self.max_in_flight:
+                context.rejected = 'overloaded'
+                return None
+            self.in_flight += 1
+        try:
+            return call_next(context)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+class TimingMiddleware:
+    """Records handler latency into the router's per-event histograms"""
+
+    def __init__(self, router: 'SocketEventRouter'):
+        self.router = router
+
+    def __call__(self, context: SocketEventContext, call_next: Callable):
+        start = time.perf_counter()
+        try:
+            return call_next(context)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self.router._lock:
+                self.router._metrics_for(context.event).latency.observe(elapsed_ms)
+            logger.debug(f"Socket event {context.event} handled in {elapsed_ms:.1f}ms")
+
+class SocketEventRouter:
+    """
+    Owns every Socket.IO event registration.
+    Handlers may be sync or async. Coroutines run on one long-lived event
+    loop thread while the Socket.IO worker thread waits for the result; they
+    run in a copy of the worker's context, so emit() and request IDs still
+    see the event's request context.
+    """
+
+    def __init__(self):
+        self.handlers: Dict[str, Callable] = {}
+        self.middleware: List[Callable] = []
+        self.metrics: Dict[str, EventMetrics] = {}
+        self.socketio = None
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+
+    def use(self, middleware: Callable):
+        """Add middleware; the first added runs outermost"""
+        self.middleware.append(middleware)
+
+    def on(self, event: str):
+        """Decorator form of register()"""
+        def decorator(handler):
+            self.register(event, handler)
+            return handler
+        return decorator
+
+    def register(self, event: str, handler: Callable):
+        with self._lock:
+            if event in self.handlers:
+                existing = self.handlers[event]
+                raise DuplicateHandlerError(
+                    f"Socket event '{event}' already handled by "
+                    f"{existing.__module__}.{existing.__qualname__}"
+                )
+            self.handlers[event] = handler
+            self._metrics_for(event)
+
+        if self.socketio is not None:
+            self._bind_event(event)
+
+    def bind(self, socketio):
+        """Attach to a SocketIO server; events registered later are bound as they arrive"""
+        self.socketio = socketio
+        for event in list(self.handlers):
+            self._bind_event(event)
+
+    def _bind_event(self, event: str):
+        def dispatcher(*args):
+            return self.dispatch(event, *args)
+        dispatcher.__name__ = f"dispatch_{event}"
+        self.socketio.on_event(event, dispatcher)
+
+    def _metrics_for(self, event: str) -> EventMetrics:
+        if event not in self.metrics:
+            self.metrics[event] = EventMetrics()
+        return self.metrics[event]
+
+    def dispatch(self, event: str, *args):
+        """Run one event through the middleware chain and its handler"""
+        context = SocketEventContext(event=event, args=args, sid=_current_sid())
+        set_request_id(context.payload.get('request_id'))
+
+        with self._lock:
+            self._metrics_for(event).received += 1
+
+        try:
+            result = self._call_chain(context, 0)
+        except Exception:
+            with self._lock:
+                self._metrics_for(event).failed += 1
+            logger.exception(f"Socket event {event} failed")
+            raise
+
+        with self._lock:
+            metrics = self._metrics_for(event)
+            if context.rejected:
+                metrics.rejected[context.rejected] += 1
+            else:
+                metrics.completed += 1
+
+        if context.rejected and event not in ('connect', 'disconnect'):
+            self._emit_rejection(context)
+        return result
+
+    def _call_chain(self, context: SocketEventContext, index: int):
+        if index < len(self.middleware):
+            return self.middleware[index](context, lambda ctx: self._call_chain(ctx, index + 1))
+        return self._invoke_handler(context)
+
+    def _invoke_handler(self, context: SocketEventContext):
+        handler = self.handlers[context.event]
+        result = handler(*_fit_args(handler, context.args))
+        if inspect.iscoroutine(result):
+            result = self.run_coroutine(result)
+        return result
+
+    def _dispatch_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name='socket-dispatch', daemon=True)
+                thread.start()
+                self._loop, self._loop_thread = loop, thread
+            return self._loop
+
+    def run_coroutine(self, coro):
+        """Run a coroutine on the dispatch loop and block the calling thread until it finishes"""
+        loop = self._dispatch_loop()
+        context = contextvars.copy_context()
+        future = concurrent.futures.Future()
+
+        def transfer(task: asyncio.Task):
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+
+        def start():
+            # Tasks copy the current context when created; create it inside the caller's
+            context.run(loop.create_task, coro).add_done_callback(transfer)
+
+        loop.call_soon_threadsafe(start)
+        return future.result()
+
+    def close(self):
+        """Stop the dispatch loop (tests and shutdown)"""
+        with self._lock:
+            loop, thread = self._loop, self._loop_thread
+            self._loop = self._loop_thread = None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(5)
+            loop.close()
+
+    def _emit_rejection(self, context: SocketEventContext):
+        logger.warning(f"Socket event {context.event} rejected: {context.rejected}")
+        try:
+            from flask_socketio import emit
+            emit('socket_error', {'event': context.event, 'error': context.rejected})
+        except (ImportError, RuntimeError):
+            pass  # No client to answer outside a Socket.IO context
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            events = {event: metrics.to_dict() for event, metrics in self.metrics.items()}
+
+        admission = next((m for m in self.middleware if isinstance(m, AdmissionControlMiddleware)), None)
+        return {
+            'events': events,
+            'registered_events': sorted(self.handlers),
+            'in_flight': admission.in_flight if admission else None,
+            'max_in_flight': admission.max_in_flight if admission else None
+        }
+
+def _current_sid() -> Optional[str]:
+    try:
+        from flask import request
+        return getattr(request, 'sid', None)
+    except (ImportError, RuntimeError):
+        return None
+
+def _fit_args(handler: Callable, args: Tuple[Any, ...]) -> Tuple[Any, ...]:
+    """Drop arguments the handler doesn't accept (e.g. connect's auth payload)"""
+    try:
+        params = inspect.signature(handler).parameters.values()
+    except (TypeError, ValueError):
+        return args
+    if any(p.kind == inspect.Parameter.VAR_POSITIONAL for p in params):
+        return args
+    positional = [p for p in params if p.kind in (inspect.Parameter.POSITIONAL_ONLY,
+                                                  inspect.Parameter.POSITIONAL_OR_KEYWORD)]
+    return args[:len(positional)]
+
+# Process-wide router
+_router: Optional[SocketEventRouter] = None
+
+def get_socket_router() -> SocketEventRouter:
+    """
+    Get the global router with the default middleware stack:
+    auth (when SOCKET_AUTH_TOKEN is set), admission control
+    (SOCKET_MAX_IN_FLIGHT) and timing
+    """
+    global _router
+
+    if _router is None:
+        router = SocketEventRouter()
+        token = os.getenv('SOCKET_AUTH_TOKEN')
+        if token:
+            router.use(AuthMiddleware(token))
+        router.use(AdmissionControlMiddleware(int(os.getenv('SOCKET_MAX_IN_FLIGHT', '64'))))
+        router.use(TimingMiddleware(router))
+        _router = router
+    return _router
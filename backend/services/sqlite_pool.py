@@ -0,0 +1,123 @@
+# backend/services/sqlite_pool.py
+"""
+🐻 Mama Bear SQLite Pool
+Long-lived SQLite connections for async services: one writer connection
+and a pool of reader connections over a WAL database, each used only from
+its own executor thread so the event loop never blocks on disk I/O
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+class SQLitePool:
+    """
+    `read(fn, ...)` runs fn(conn, ...) on one of `readers` reader threads;
+    `write(fn, ...)` runs it on the single writer thread inside a transaction.
+    WAL lets readers proceed while a write commits, and the one writer means
+    writes never contend for the database lock. Each connection keeps its
+    own prepared-statement cache (`cached_statements`), so the fixed SQL
+    used by callers is compiled once per connection.
+    """
+
+    def __init__(self, db_path: str, readers: int = 4, mmap_size: int = 256 * 1024 * 1024,
+                 cache_size_kib: int = 16 * 1024, cached_statements: int = 256, busy_timeout: float = 30.0):
+        self.db_path = db_path
+        self.readers = readers
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+        self.cached_statements = cached_statements
+        self.busy_timeout = busy_timeout
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._writer = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='sqlite-writer')
+        self._reader = concurrent.futures.ThreadPoolExecutor(max_workers=readers, thread_name_prefix='sqlite-reader')
+
+        self.metrics = defaultdict(float)
+
+        # WAL is a property of the database file; set it once up front
+        self._writer.submit(self._connection, False).result()
+
+    def _connection(self, read_only: bool) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Only ever used from the thread that opened it; check_same_thread=False just lets close() run elsewhere
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, cached_statements=self.cached_statements,
+                                   check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kib)}")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            if read_only:
+                conn.execute("PRAGMA query_only=ON")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _run_read(self, fn: Callable[..., T], args) -> T:
+        start = time.perf_counter()
+        try:
+            return fn(self._connection(True), *args)
+        finally:
+            self.metrics['reads'] += 1
+            self.metrics['read_ms_total'] += (time.perf_counter() - start) * 1000
+
+    def _run_write(self, fn: Callable[..., T], args) -> T:
+        start = time.perf_counter()
+        conn = self._connection(False)
+        try:
+            with conn:  # Commits, or rolls back if fn raises
+                return fn(conn, *args)
+        finally:
+            self.metrics['writes'] += 1
+            self.metrics['write_ms_total'] += (time.perf_counter() - start) * 1000
+
+    async def read(self, fn: Callable[..., T], *args) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._reader, self._run_read, fn, args)
+
+    async def write(self, fn: Callable[..., T], *args) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._writer, self._run_write, fn, args)
+
+    def read_sync(self, fn: Callable[..., T], *args) -> T:
+        return self._reader.submit(self._run_read, fn, args).result()
+
+    def write_sync(self, fn: Callable[..., T], *args) -> T:
+        return self._writer.submit(self._run_write, fn, args).result()
+
+    def close(self):
+        self._writer.shutdown(wait=True)
+        self._reader.shutdown(wait=True)
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+    def get_status(self) -> Dict[str, Any]:
+        reads, writes = self.metrics['reads'], self.metrics['writes']
+        return {
+            'db_path': self.db_path,
+            'journal_mode': 'wal',
+            'readers': self.readers,
+            'open_connections': len(self._connections),
+            'reads': int(reads),
+            'writes': int(writes),
+            'avg_read_ms': round(self.metrics['read_ms_total'] / reads, 3) if reads else None,
+            'avg_write_ms': round(self.metrics['write_ms_total'] / writes, 3) if writes else None
+        }
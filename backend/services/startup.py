@@ -0,0 +1,203 @@
+# backend/services/startup.py
+"""
+🐻 Mama Bear Staged Startup
+Lazy module loading, readiness state machine and startup profiling
+"""
+
+import importlib
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class StartupStage(Enum):
+    COLD = "cold"
+    IMPORTING = "importing"
+    INITIALIZING = "initializing"
+    READY = "ready"
+    DEGRADED = "degraded"
+    FAILED = "failed"
+    STOPPING = "stopping"
+    STOPPED = "stopped"
+
+# Allowed readiness transitions
+STAGE_TRANSITIONS = {
+    StartupStage.COLD: {StartupStage.IMPORTING, StartupStage.FAILED},
+    StartupStage.IMPORTING: {StartupStage.INITIALIZING, StartupStage.FAILED},
+    StartupStage.INITIALIZING: {StartupStage.READY, StartupStage.DEGRADED, StartupStage.FAILED},
+    StartupStage.READY: {StartupStage.DEGRADED, StartupStage.STOPPING},
+    StartupStage.DEGRADED: {StartupStage.READY, StartupStage.STOPPING},
+    StartupStage.FAILED: {StartupStage.COLD, StartupStage.STOPPING},
+    StartupStage.STOPPING: {StartupStage.STOPPED},
+    StartupStage.STOPPED: {StartupStage.COLD},
+}
+
+class StartupStateMachine:
+    """Tracks backend readiness through the startup stages"""
+
+    def __init__(self):
+        self.stage = StartupStage.COLD
+        self.history: List[Dict[str, Any]] = [{
+            'stage': self.stage.value,
+            'timestamp': datetime.now().isoformat()
+        }]
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def transition(self, stage: StartupStage, error: str = None):
+        """Move to a new stage, rejecting transitions the state machine does not allow"""
+        with self._lock:
+            if stage not in STAGE_TRANSITIONS[self.stage]:
+                raise ValueError(f"Invalid startup transition: {self.stage.value} -> {stage.value}")
+
+            self.stage = stage
+            self.error = error
+            self.history.append({
+                'stage': stage.value,
+                'timestamp': datetime.now().isoformat(),
+                'error': error
+            })
+
+        logger.info(f"🐻 Startup stage: {stage.value}")
+
+    @property
+    def is_ready(self) -> bool:
+        return self.stage in (StartupStage.READY, StartupStage.DEGRADED)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            'stage': self.stage.value,
+            'ready': self.is_ready,
+            'error': self.error,
+            'history': list(self.history)
+        }
+
+class StartupProfiler:
+    """Records per-module import time and per-component init time"""
+
+    def __init__(self):
+        self.module_import_times: Dict[str, float] = {}
+        self.component_init_times: Dict[str, float] = {}
+        self.component_errors: Dict[str, str] = {}
+
+    def import_module(self, module_name: str):
+        """Import a module and record how long it took (zero if already loaded)"""
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        if module_name not in self.module_import_times:
+            self.module_import_times[module_name] = elapsed_ms
+
+        return module
+
+    @contextmanager
+    def component(self, name: str):
+        """Time the initialization of a named component"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.component_errors[name] = str(e)
+            raise
+        finally:
+            self.component_init_times[name] = (time.perf_counter() - start) * 1000
+
+    @property
+    def total_import_ms(self) -> float:
+        return sum(self.module_import_times.values())
+
+    @property
+    def total_init_ms(self) -> float:
+        return sum(self.component_init_times.values())
+
+    def report(self) -> Dict[str, Any]:
+        """Startup timings, slowest first"""
+        return {
+            'total_import_ms': round(self.total_import_ms, 2),
+            'total_init_ms': round(self.total_init_ms, 2),
+            'modules': {
+                name: round(ms, 2) for name, ms in
+                sorted(self.module_import_times.items(), key=lambda x: x[1], reverse=True)
+            },
+            'components': {
+                name: round(ms, 2) for name, ms in
+                sorted(self.component_init_times.items(), key=lambda x: x[1], reverse=True)
+            },
+            'errors': dict(self.component_errors)
+        }
+
+    def log_report(self):
+        report = self.report()
+        logger.info(
+            f"⏱️ Startup: imports {report['total_import_ms']}ms, "
+            f"init {report['total_init_ms']}ms"
+        )
+        for name, ms in report['modules'].items():
+            logger.debug(f"⏱️ import {name}: {ms}ms")
+        for name, ms in report['components'].items():
+            logger.debug(f"⏱️ init {name}: {ms}ms")
+
+class LazyModule:
+    """Module proxy that defers the real import until first attribute access"""
+
+    def __init__(self, module_name: str):
+        self._module_name = module_name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = get_startup_profiler().import_module(self._module_name)
+        return self._module
+
+    def __getattr__(self, name: str):
+        return getattr(self._load(), name)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<LazyModule {self._module_name} ({state})>"
+
+def lazy_import(module_name: str) -> LazyModule:
+    """Return a proxy for a module that is only imported when first used"""
+    return LazyModule(module_name)
+
+class LazyComponent:
+    """Thread-safe lazily constructed singleton"""
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self.name = name
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    with get_startup_profiler().component(self.name):
+                        self._instance = self._factory()
+        return self._instance
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._instance is not None
+
+# Process-wide startup tracking
+startup_profiler = StartupProfiler()
+startup_state = StartupStateMachine()
+
+def get_startup_profiler() -> StartupProfiler:
+    """Get the global startup profiler"""
+    return startup_profiler
+
+def get_startup_state() -> StartupStateMachine:
+    """Get the global readiness state machine"""
+    return startup_state
@@ -0,0 +1,309 @@
+# backend/services/state_store.py
+"""
+🐻 Mama Bear Shared State Store
+Pluggable key/value store so plans, tasks and workspaces survive restarts
+and are visible to every worker process
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import MutableMapping
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def _json_default(value):
+    """JSON encoder for the types our state objects carry"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    return str(value)
+
+def encode_state(value: Any) -> str:
+    return json.dumps(value, default=_json_default)
+
+def decode_state(raw: str) -> Any:
+    return json.loads(raw)
+
+class StateStore(ABC):
+    """Namespaced key/value store holding JSON-serializable values"""
+
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        pass
+
+    @abstractmethod
+    def put(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value, optionally expiring after `ttl` seconds"""
+        pass
+
+    @abstractmethod
+    def put_if_absent(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Atomically store a value unless a live one exists; True if stored"""
+        pass
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str) -> bool:
+        pass
+
+    @abstractmethod
+    def items(self, namespace: str) -> List[Tuple[str, Any]]:
+        pass
+
+    @abstractmethod
+    def count(self, namespace: str) -> int:
+        pass
+
+    def keys(self, namespace: str) -> List[str]:
+        return [key for key, _ in self.items(namespace)]
+
+    def namespace(self, name: str) -> 'StateNamespace':
+        return StateNamespace(self, name)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {'backend': self.__class__.__name__}
+
+    def close(self):
+        pass
+
+class InMemoryStateStore(StateStore):
+    """Single-process store; values are serialized so callers never share mutable state"""
+
+    def __init__(self):
+        self._data: Dict[str, Dict[str, Tuple[str, Optional[float]]]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, namespace: str) -> Dict[str, Tuple[str, Optional[float]]]:
+        entries = self._data.setdefault(namespace, {})
+        now = time.time()
+        expired = [key for key, (_, expires_at) in entries.items() if expires_at and expires_at <= now]
+        for key in expired:
+            del entries[key]
+        return entries
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._live(namespace).get(key)
+        return decode_state(entry[0]) if entry else None
+
+    def put(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.time() + ttl if ttl else None
+        raw = encode_state(value)
+        with self._lock:
+            self._data.setdefault(namespace, {})[key] = (raw, expires_at)
+
+    def put_if_absent(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        expires_at = time.time() + ttl if ttl else None
+        raw = encode_state(value)
+        with self._lock:
+            entries = self._live(namespace)
+            if key in entries:
+                return False
+            entries[key] = (raw, expires_at)
+            return True
+
+    def delete(self, namespace: str, key: str) -> bool:
+        with self._lock:
+            return self._live(namespace).pop(key, None) is not None
+
+    def items(self, namespace: str) -> List[Tuple[str, Any]]:
+        with self._lock:
+            entries = list(self._live(namespace).items())
+        return [(key, decode_state(raw)) for key, (raw, _) in entries]
+
+    def count(self, namespace: str) -> int:
+        with self._lock:
+            return len(self._live(namespace))
+
+class SQLiteStateStore(StateStore):
+    """
+    SQLite (WAL mode) store shared by every process on a machine.
+    Each thread gets its own connection; writes are single statements in autocommit mode.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS state (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        row = self._connection().execute(
+            "SELECT value FROM state WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (namespace, key, time.time())
+        ).fetchone()
+        return decode_state(row[0]) if row else None
+
+    def put(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        now = time.time()
+        self._connection().execute("""
+            INSERT INTO state (namespace, key, value, expires_at, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (namespace, key) DO UPDATE SET
+                value = excluded.value,
+                expires_at = excluded.expires_at,
+                updated_at = excluded.updated_at
+        """, (namespace, key, encode_state(value), now + ttl if ttl else None, now))
+
+    def put_if_absent(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM state WHERE namespace = ? AND key = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+                (namespace, key, now)
+            )
+            cursor = conn.execute("""
+                INSERT OR IGNORE INTO state (namespace, key, value, expires_at, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (namespace, key, encode_state(value), now + ttl if ttl else None, now))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount == 1
+
+    def delete(self, namespace: str, key: str) -> bool:
+        cursor = self._connection().execute(
+            "DELETE FROM state WHERE namespace = ? AND key = ?", (namespace, key)
+        )
+        return cursor.rowcount > 0
+
+    def items(self, namespace: str) -> List[Tuple[str, Any]]:
+        rows = self._connection().execute(
+            "SELECT key, value FROM state WHERE namespace = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (namespace, time.time())
+        ).fetchall()
+        return [(key, decode_state(value)) for key, value in rows]
+
+    def count(self, namespace: str) -> int:
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM state WHERE namespace = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (namespace, time.time())
+        ).fetchone()[0]
+
+    def purge_expired(self) -> int:
+        cursor = self._connection().execute(
+            "DELETE FROM state WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+        )
+        return cursor.rowcount
+
+    def get_status(self) -> Dict[str, Any]:
+        return {'backend': self.__class__.__name__, 'db_path': self.db_path}
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+class StateNamespace(MutableMapping):
+    """
+    Dict-like view of one namespace.
+    Reads return fresh copies, so mutate-then-assign to persist changes.
+    """
+
+    def __init__(self, store: StateStore, name: str):
+        self.store = store
+        self.name = name
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.store.get(self.name, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        self.store.put(self.name, key, value)
+
+    def __delitem__(self, key: str):
+        if not self.store.delete(self.name, key):
+            raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        return self.store.get(self.name, key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.store.keys(self.name))
+
+    def __len__(self) -> int:
+        return self.store.count(self.name)
+
+    def items(self):
+        return self.store.items(self.name)
+
+    def values(self):
+        return [value for _, value in self.store.items(self.name)]
+
+def create_state_store(url: str) -> StateStore:
+    """
+    Build a store from a URL:
+      memory://                 - process-local, lost on restart
+      sqlite:///path/to/db      - shared by all workers on one machine
+    """
+    if url.startswith('memory://'):
+        return InMemoryStateStore()
+    if url.startswith('sqlite:///'):
+        return SQLiteStateStore(url[len('sqlite:///'):])
+    raise ValueError(f"Unsupported state store URL: {url}")
+
+# Process-wide store
+_state_store: Optional[StateStore] = None
+_state_store_lock = threading.Lock()
+
+def get_state_store() -> StateStore:
+    """Get the global state store (configured by MAMA_BEAR_STATE_STORE)"""
+    global _state_store
+
+    if _state_store is None:
+        with _state_store_lock:
+            if _state_store is None:
+                url = os.getenv('MAMA_BEAR_STATE_STORE', 'sqlite:///mama_bear_state.db')
+                _state_store = create_state_store(url)
+                logger.info(f"🗄️ State store: {url}")
+    return _state_store
+
+def set_state_store(store: StateStore):
+    """Replace the global state store"""
+    global _state_store
+    _state_store = store
+
+def get_socketio_message_queue() -> Optional[str]:
+    """
+    Message queue URL that Socket.IO uses to fan out emits across workers,
+    e.g. redis://localhost:6379/0 or any kombu URL. None means single worker.
+    """
+    return os.getenv('SOCKETIO_MESSAGE_QUEUE') or None
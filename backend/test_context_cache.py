@@ -0,0 +1,99 @@
+"""
+Podplay Sanctuary Context Cache Test
+Covers cached get_context hits, write invalidation, in-place updates
+and bounded version tracking
+"""
+import asyncio
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services.context_cache import ContextCache
+from services.memory_manager import MemoryManager
+
+def make_manager(tmp_path, monkeypatch) -> MemoryManager:
+    monkeypatch.setenv('MEM0_MEMORY_ENABLED', 'false')
+    manager = MemoryManager(db_path=str(tmp_path / 'memory.db'))
+    manager.compactor.interval = 3600
+    return manager
+
+def test_repeat_reads_hit_and_saves_invalidate(tmp_path, monkeypatch):
+    manager = make_manager(tmp_path, monkeypatch)
+
+    async def scenario():
+        await manager.save_interaction('u1', 'main_chat', "Question 1", "Answer 1")
+        first = await manager.get_context('u1', 'main_chat')
+        reads = manager.db.get_status()['reads']
+        first['recent_interactions'] = 'edited by caller'
+        second = await manager.get_context('u1', 'main_chat')
+        assert manager.db.get_status()['reads'] == reads  # Served from the cache
+        assert second['recent_interactions'] != 'edited by caller'
+
+        await manager.save_interaction('u1', 'main_chat', "Question 2", "Answer 2")
+        return await manager.get_context('u1', 'main_chat')
+
+    context = asyncio.run(scenario())
+    assert context['conversation_count'] == 2 and 'Question 2' in context['recent_interactions']
+    status = manager.context_cache.get_status()
+    assert status['hits'] == 1 and status['misses'] == 2 and status['invalidations'] == 1
+    manager.close()
+
+def test_preferences_and_session_memory_patch_cached_contexts(tmp_path, monkeypatch):
+    manager = make_manager(tmp_path, monkeypatch)
+
+    async def scenario():
+        await manager.get_context('u1', 'main_chat')
+        await manager.get_context('u1', 'scout')
+        await manager.save_user_preferences('u1', {'theme': 'dark'})
+        await manager.save_session_memory('u1', 'scout', 'draft', {'step': 2})
+        return await manager.get_context('u1', 'main_chat'), await manager.get_context('u1', 'scout')
+
+    main_chat, scout = asyncio.run(scenario())
+    assert main_chat['preferences'] == scout['preferences'] == {'theme': 'dark'}
+    assert main_chat['session_memory'] == {} and scout['session_memory'] == {'draft': {'step': 2}}
+    assert manager.context_cache.get_status()['hits'] == 2
+    manager.close()
+
+def test_puts_from_reads_overtaken_by_writes_are_dropped():
+    cache = ContextCache(max_entries=2)
+    key = ('u1', 'main_chat')
+
+    version = cache.version(key)
+    cache.invalidate(key)  # A save lands while the read is in flight
+    cache.put(key, (10, None), {'conversation_count': 1}, version)
+    assert cache.get(key, (10, None)) is None and cache.metrics['stale_puts'] == 1
+
+    cache.put(key, (10, None), {'conversation_count': 2}, cache.version(key))
+    assert cache.get(key, (10, None)) == {'conversation_count': 2}
+    assert cache.get(key, (5, None)) is None  # Different limit, different context
+
+    for page in ('vm_hub', 'scout'):
+        cache.put(('u1', page), (10, None), {}, cache.version(('u1', page)))
+    assert cache.get(key, (10, None)) is None and cache.metrics['evictions'] == 1
+
+def test_version_stamps_stay_bounded_and_updates_only_touch_the_user():
+    cache = ContextCache(max_entries=4, max_stamps=8)
+    for i in range(1000):
+        cache.invalidate((f"user{i}", 'main_chat'))  # Writes for users that are never read
+    assert cache.get_status()['version_stamps'] == 8
+
+    early = cache.version(('user1', 'main_chat'))  # Read began before its stamp was forgotten
+    cache.invalidate(('user1', 'main_chat'))
+    for i in range(20):
+        cache.invalidate((f"other{i}", 'main_chat'))
+    cache.put(('user1', 'main_chat'), (10, None), {'n': 1}, early)
+    assert cache.metrics['stale_puts'] == 1  # Forgotten stamps still reject older reads
+
+    in_flight = cache.version(('u1', 'scout'))
+    for user_id in ('u1', 'u2'):
+        cache.put((user_id, 'main_chat'), (10, None), {'preferences': {}}, cache.version((user_id, 'main_chat')))
+    cache.update('u1', lambda context: context['preferences'].update(theme='dark'))
+
+    cache.put(('u1', 'scout'), (10, None), {'preferences': {}}, in_flight)  # Never cached before the update
+    assert cache.get(('u1', 'scout'), (10, None)) is None and cache.metrics['stale_puts'] == 2
+    assert cache.get(('u1', 'main_chat'), (10, None)) == {'preferences': {'theme': 'dark'}}
+    assert cache.get(('u2', 'main_chat'), (10, None)) == {'preferences': {}}
+    assert cache.metrics['updates'] == 1
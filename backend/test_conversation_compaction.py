@@ -0,0 +1,85 @@
+"""
+Podplay Sanctuary Conversation Compaction Test
+Covers summary roll-up of older turns, token-budgeted prompt context and
+stopping the background worker
+"""
+import asyncio
+import os
+import sys
+import threading
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services.conversation_compaction import ConversationCompactor, estimate_tokens, extractive_summary, fit_to_budget
+from services.memory_manager import MemoryManager
+
+def test_fit_to_budget_keeps_newest_turns_and_trims_oversized_one():
+    turns = [{'message': f"q{i}", 'response': 'x' * 400} for i in range(10)]
+    kept, used = fit_to_budget('summary ' * 20, turns, token_budget=400)
+    assert [turn['message'] for turn in kept] == ['q2', 'q1', 'q0']
+    assert used <= 400
+
+    huge = [{'message': 'q', 'response': 'y' * 100000}]
+    kept, _ = fit_to_budget('', huge, token_budget=300)
+    assert len(kept) == 1 and len(kept[0]['response']) < 2000
+
+def test_older_turns_roll_into_summary_and_context_shrinks(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('MEM0_MEMORY_ENABLED', 'false')
+    manager = MemoryManager()
+    manager.compactor.interval = 60  # The test drives passes itself
+
+    async def scenario():
+        for i in range(30):
+            await manager.save_interaction('u1', 'main_chat', f"Question {i}. More detail.", f"Answer {i}. " + 'z' * 2000)
+        before = await manager.get_context('u1', 'main_chat', token_budget=100000)
+
+        await manager.compactor.run_pass([('u1', 'main_chat')])
+        await manager.compactor.run_pass([('u1', 'main_chat')])
+        after = await manager.get_context('u1', 'main_chat')
+        return before, after
+
+    before, after = asyncio.run(scenario())
+    assert before['conversation_summary'] == ''
+    assert after['conversation_summary'].count('- Asked:') == 24
+    assert after['turns_included'] <= manager.summary_keep_recent
+    assert after['context_tokens'] <= manager.context_token_budget
+    assert after['context_tokens'] < before['context_tokens'] / 3
+    assert after['conversation_count'] == 30
+    assert 'Question 29' in after['recent_interactions']
+
+def test_extractive_summary_is_bounded():
+    turns = [(f"Question {i}. Details.", f"Answer {i}. Long explanation.") for i in range(200)]
+    summary = asyncio.run(extractive_summary('', turns, max_chars=500))
+    assert len(summary) <= 500
+    assert 'Question 199' in summary and estimate_tokens(summary) <= 125
+
+def test_stop_waits_for_the_pass_in_flight_and_ends_the_worker():
+    entered, release = threading.Event(), threading.Event()
+
+    async def compact(user_id, page_context, summarizer):
+        entered.set()
+        release.wait(5)
+        return 1
+
+    compactor = ConversationCompactor(compact, interval=0)
+    compactor.notify('u1', 'main_chat')
+    assert entered.wait(5)
+
+    stopper = threading.Thread(target=compactor.stop)
+    stopper.start()
+    stopper.join(0.1)
+    assert stopper.is_alive()  # Still inside compact()
+
+    release.set()
+    stopper.join(5)
+    assert not stopper.is_alive() and not compactor._worker.is_alive()
+    assert compactor.get_status()['summaries_updated'] == 1
+
+    # A long coalescing wait does not hold up stop either
+    idle = ConversationCompactor(compact, interval=60)
+    idle.notify('u1', 'main_chat')
+    idle.stop(timeout=5)
+    assert not idle._worker.is_alive()
@@ -0,0 +1,67 @@
+"""
+Podplay Sanctuary Conversation History Test
+Covers keyset pagination, cursor validation and NDJSON export
+"""
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services.memory_manager import MemoryManager, decode_cursor, encode_cursor
+
+def make_manager(tmp_path, monkeypatch) -> MemoryManager:
+    monkeypatch.setenv('MEM0_MEMORY_ENABLED', 'false')
+    manager = MemoryManager(db_path=str(tmp_path / 'memory.db'))
+    manager.compactor.interval = 3600
+    return manager
+
+def seed(manager, rows):
+    """Insert (user, page, timestamp) rows directly so timestamps can tie"""
+    manager.db.write_sync(lambda conn: conn.executemany(
+        "INSERT INTO conversations (user_id, page_context, message, response, metadata, timestamp) "
+        "VALUES (?, ?, 'q', 'a', '{}', ?)", rows
+    ))
+
+def test_pages_walk_history_newest_first_across_timestamp_ties(tmp_path, monkeypatch):
+    manager = make_manager(tmp_path, monkeypatch)
+    seed(manager, [('u1', 'main_chat' if i % 2 else 'scout', f"2024-01-01 00:00:0{i // 3}") for i in range(10)]
+         + [('u2', 'main_chat', '2024-01-01 00:00:09')])
+
+    async def walk(page_context=None):
+        ids, cursor = [], None
+        while True:
+            page = await manager.get_conversation_history_page('u1', page_context, limit=3, cursor=cursor)
+            ids.extend(row['id'] for row in page['conversations'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                return ids
+
+    assert asyncio.run(walk()) == list(range(10, 0, -1))
+    assert asyncio.run(walk('main_chat')) == [10, 8, 6, 4, 2]
+    assert asyncio.run(manager.get_conversation_history('u1', limit=2))[0]['metadata'] == {}
+    manager.close()
+
+def test_malformed_cursors_are_rejected():
+    assert decode_cursor(encode_cursor('2024-01-01 00:00:00', 42)) == ('2024-01-01 00:00:00', 42)
+    for cursor in ('not-a-cursor', encode_cursor('x', 1)[:-2], 'WzEsMl0'):  # Last one decodes to [1, 2]
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+def test_export_streams_full_history_as_ndjson(tmp_path, monkeypatch):
+    manager = make_manager(tmp_path, monkeypatch)
+    seed(manager, [('u1', 'main_chat', f"2024-01-01 00:00:{i:02d}") for i in range(7)])
+    manager.db.write_sync(lambda conn: conn.execute("UPDATE conversations SET message = 'héllo' WHERE id = 7"))
+
+    lines = list(manager.export_conversation_history('u1', batch_size=3))
+    assert all(line.endswith('\n') for line in lines)
+    records = [json.loads(line) for line in lines]
+    assert [record['id'] for record in records] == list(range(7, 0, -1))
+    assert records[0]['message'] == 'héllo' and records[0]['metadata'] == {}
+    assert list(manager.export_conversation_history('nobody')) == []
+    manager.close()
@@ -0,0 +1,87 @@
+"""
+Podplay Sanctuary Conversation Retention Test
+Covers high-water-mark trimming, the background sweep and count backfill
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services.memory_manager import MemoryManager
+
+def make_manager(tmp_path, monkeypatch, keep=20, slack=5) -> MemoryManager:
+    monkeypatch.setenv('MEM0_MEMORY_ENABLED', 'false')
+    monkeypatch.setenv('CONVERSATION_RETENTION', str(keep))
+    monkeypatch.setenv('CONVERSATION_RETENTION_SLACK', str(slack))
+    monkeypatch.setenv('CONVERSATION_SWEEP_INTERVAL', '3600')
+    manager = MemoryManager(db_path=str(tmp_path / 'memory.db'))
+    manager.compactor.interval = 3600
+    return manager
+
+def page_rows(manager, user_id='u1', page='main_chat'):
+    def read(conn):
+        ids = [row[0] for row in conn.execute(
+            "SELECT id FROM conversations WHERE user_id = ? AND page_context = ? ORDER BY id", (user_id, page)
+        )]
+        count = conn.execute(
+            "SELECT row_count FROM conversation_counts WHERE user_id = ? AND page_context = ?", (user_id, page)
+        ).fetchone()[0]
+        return ids, count
+    return manager.db.read_sync(read)
+
+def test_trims_only_past_high_water_mark(tmp_path, monkeypatch):
+    manager = make_manager(tmp_path, monkeypatch)
+
+    async def save(count, page='main_chat'):
+        for i in range(count):
+            await manager.save_interaction('u1', page, f"q{i}", f"a{i}")
+
+    asyncio.run(save(25))
+    ids, count = page_rows(manager)
+    assert len(ids) == count == 25 and manager.retention_metrics['trims'] == 0
+
+    asyncio.run(save(1))
+    ids, count = page_rows(manager)
+    assert len(ids) == count == 20 and ids[-1] == 26  # Newest kept
+    assert manager.retention_metrics['trims'] == 1 and manager.retention_metrics['rows_trimmed'] == 6
+
+    asyncio.run(save(3, page='scout'))
+    assert page_rows(manager, page='scout')[1] == 3  # Other pages untouched
+    manager.close()
+
+def test_sweep_applies_lowered_retention_in_batches(tmp_path, monkeypatch):
+    manager = make_manager(tmp_path, monkeypatch)
+
+    async def save():
+        for i in range(22):
+            await manager.save_interaction('u1', 'main_chat', f"q{i}", f"a{i}")
+
+    asyncio.run(save())
+    manager.conversation_retention = 5
+    assert manager.sweep_retention(batch_rows=4) == 17
+    ids, count = page_rows(manager)
+    assert len(ids) == count == 5 and ids == list(range(18, 23))
+    assert manager.sweep_retention() == 0
+    manager.close()
+
+def test_counts_are_backfilled_for_existing_databases(tmp_path, monkeypatch):
+    db_path = tmp_path / 'memory.db'
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""
+            CREATE TABLE conversations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, page_context TEXT NOT NULL,
+                message TEXT NOT NULL, response TEXT NOT NULL, metadata TEXT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.executemany("INSERT INTO conversations (user_id, page_context, message, response) VALUES (?, ?, 'q', 'a')",
+                         [('u1', 'main_chat')] * 7 + [('u2', 'vm_hub')] * 2)
+
+    manager = make_manager(tmp_path, monkeypatch)
+    assert page_rows(manager)[1] == 7
+    assert page_rows(manager, 'u2', 'vm_hub')[1] == 2
+    manager.close()
@@ -0,0 +1,72 @@
+"""
+Podplay Sanctuary Conversation Search Test
+Covers FTS5 ranking and snippets, trigger sync with trims and index backfill
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services.memory_manager import MemoryManager, fts_query
+
+def make_manager(tmp_path, monkeypatch, keep=1000) -> MemoryManager:
+    monkeypatch.setenv('MEM0_MEMORY_ENABLED', 'false')
+    monkeypatch.setenv('CONVERSATION_RETENTION', str(keep))
+    monkeypatch.setenv('CONVERSATION_RETENTION_SLACK', '0')
+    manager = MemoryManager(db_path=str(tmp_path / 'memory.db'))
+    manager.compactor.interval = 3600
+    return manager
+
+def test_search_ranks_matches_and_scopes_to_user_and_page(tmp_path, monkeypatch):
+    manager = make_manager(tmp_path, monkeypatch)
+
+    async def scenario():
+        await manager.save_interaction('u1', 'main_chat', "How do I deploy the docker image?", "Push it, then deploy.")
+        await manager.save_interaction('u1', 'main_chat', "Lunch ideas", "Try the noodle place.")
+        await manager.save_interaction('u1', 'vm_hub', "Docker keeps crashing", "Check the logs.", {'model_used': 'x'})
+        await manager.save_interaction('u2', 'main_chat', "Docker deploys", "Someone else's turn.")
+        return (
+            await manager.search_conversations('u1', 'deploying docker'),
+            await manager.search_conversations('u1', 'docker', page_context='vm_hub'),
+            await manager.search_conversations('u1', 'NOT "OR (')  # Operators are quoted, not parsed
+        )
+
+    everywhere, vm_hub, operators = asyncio.run(scenario())
+    assert [r['message'] for r in everywhere] == ["How do I deploy the docker image?", "Docker keeps crashing"]
+    assert '[deploy]' in everywhere[0]['snippet'] and everywhere[0]['score'] < everywhere[1]['score']
+    assert len(vm_hub) == 1 and vm_hub[0]['metadata'] == {'model_used': 'x'}
+    assert operators == []
+    assert fts_query('  ') is None
+    manager.close()
+
+def test_index_follows_retention_trims(tmp_path, monkeypatch):
+    manager = make_manager(tmp_path, monkeypatch, keep=2)
+
+    async def scenario():
+        for topic in ('kubernetes', 'terraform', 'ansible'):
+            await manager.save_interaction('u1', 'main_chat', f"Question about {topic}", "Answer")
+        return [await manager.search_conversations('u1', topic) for topic in ('kubernetes', 'ansible')]
+
+    trimmed, kept = asyncio.run(scenario())
+    assert trimmed == [] and len(kept) == 1
+    # Raises if the index and the table disagree
+    manager.db.write_sync(
+        lambda conn: conn.execute("INSERT INTO conversations_fts (conversations_fts) VALUES ('integrity-check')")
+    )
+    manager.close()
+
+def test_existing_conversations_are_indexed_on_upgrade(tmp_path, monkeypatch):
+    with sqlite3.connect(tmp_path / 'memory.db') as conn:
+        MemoryManager._create_schema(conn)
+        conn.execute("INSERT INTO conversations (user_id, page_context, message, response) "
+                     "VALUES ('u1', 'main_chat', 'Old question about postgres', 'a')")
+
+    manager = make_manager(tmp_path, monkeypatch)
+    results = asyncio.run(manager.search_conversations('u1', 'postgres'))
+    assert [r['message'] for r in results] == ['Old question about postgres']
+    assert asyncio.run(manager.get_status())['full_text_search'] is True
+    manager.close()
@@ -0,0 +1,108 @@
+"""
+Podplay Sanctuary Idempotency Test
+Covers duplicates attaching to the in-flight execution, key conflicts,
+the short failure TTL, caller scoping and the socket plan path
+"""
+import asyncio
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services.idempotency import IdempotencyRegistry, run_idempotent_event, run_idempotent_request
+from services.state_store import InMemoryStateStore
+
+class RecordingStore(InMemoryStateStore):
+    """Remembers the TTL of every completed record"""
+
+    def __init__(self):
+        super().__init__()
+        self.ttls = {}
+
+    def put(self, namespace, key, value, ttl=None):
+        self.ttls[key] = ttl
+        super().put(namespace, key, value, ttl=ttl)
+
+def make_registry(**kwargs) -> IdempotencyRegistry:
+    return IdempotencyRegistry(state_store=RecordingStore(), ttl=3600, failure_ttl=5, **kwargs)
+
+def test_duplicate_attaches_to_in_flight_request_and_replays():
+    # A long poll interval: the duplicate must be woken by the owner, not by polling
+    registry = make_registry(poll_interval=5)
+    calls = []
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def operation():
+            calls.append(1)
+            await release.wait()
+            return {'status': 201, 'body': {'plan_id': 'p1'}}
+
+        first = asyncio.create_task(run_idempotent_request('plans', 'u1', 'k1', b'{"a":1}', operation, registry))
+        await asyncio.sleep(0.05)
+        second = asyncio.create_task(run_idempotent_request('plans', 'u1', 'k1', b'{"a":1}', operation, registry))
+        await asyncio.sleep(0.05)
+        release.set()
+        start = time.monotonic()
+        results = await asyncio.gather(first, second)
+        return results, time.monotonic() - start
+
+    (first, second), waited = asyncio.run(scenario())
+    assert first == (201, {'plan_id': 'p1'}, False)
+    assert second == (201, {'plan_id': 'p1'}, True)
+    assert calls == [1] and waited < 1
+    assert registry.get_status()['attached'] == 1
+
+def test_key_reuse_with_other_payload_conflicts_but_other_callers_do_not():
+    registry = make_registry()
+
+    async def operation():
+        return {'status': 200, 'body': {'ok': True}}
+
+    async def scenario():
+        await run_idempotent_request('vm_create', 'u1', 'k1', b'{"size":1}', operation, registry)
+        conflict = await run_idempotent_request('vm_create', 'u1', 'k1', b'{"size":2}', operation, registry)
+        other_user = await run_idempotent_request('vm_create', 'u2', 'k1', b'{"size":2}', operation, registry)
+        return conflict, other_user
+
+    (status, body, replayed), other_user = asyncio.run(scenario())
+    assert status == 422 and body['success'] is False and not replayed
+    assert other_user == (200, {'ok': True}, False)  # Same key, different caller: runs on its own
+
+def test_server_errors_are_kept_only_for_the_failure_ttl():
+    registry = make_registry()
+    statuses = iter([503, 200])
+
+    async def operation():
+        return {'status': next(statuses), 'body': {}}
+
+    status, _, _ = asyncio.run(run_idempotent_request('scout_execute', 'u1', 'bad', b'', operation, registry))
+    assert status == 503 and registry.store.ttls['scout_execute:u1:bad'] == 5
+
+    status, _, _ = asyncio.run(run_idempotent_request('scout_execute', 'u1', 'good', b'', operation, registry))
+    assert status == 200 and registry.store.ttls['scout_execute:u1:good'] == 3600
+
+def test_socket_plan_events_run_once_per_user_key():
+    registry = make_registry()
+    created = []
+
+    async def create():
+        created.append(len(created) + 1)
+        return {'plan_id': f"plan-{created[-1]}"}
+
+    async def scenario():
+        return [
+            await run_idempotent_event('socket_create_agent_plan', 'u1', 'k1', b'plan', create, registry),
+            await run_idempotent_event('socket_create_agent_plan', 'u1', 'k1', b'plan', create, registry),
+            await run_idempotent_event('socket_create_agent_plan', 'u1', None, b'plan', create, registry)
+        ]
+
+    assert asyncio.run(scenario()) == [
+        ({'plan_id': 'plan-1'}, False),
+        ({'plan_id': 'plan-1'}, True),
+        ({'plan_id': 'plan-2'}, False)  # No key: always runs
+    ]
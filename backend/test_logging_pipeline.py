@@ -0,0 +1,69 @@
+"""
+Podplay Sanctuary Logging Pipeline Test
+Covers debug sampling, request-id propagation, exception fields and full-queue drops
+"""
+import json
+import logging
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services.logging_pipeline import LoggingPipeline, set_request_id
+
+def make_logger(pipeline: LoggingPipeline, name: str) -> logging.Logger:
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    logger.addHandler(pipeline.queue_handler)
+    return logger
+
+def read_entries(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+def test_debug_and_tagged_records_are_sampled(tmp_path):
+    pipeline = LoggingPipeline(str(tmp_path / 'app.log'), debug_sample_rate=0.0, console=False)
+    logger = make_logger(pipeline, 'test.sampling')
+    pipeline.listener.start()
+
+    logger.debug("noisy")
+    logger.info("kept")
+    logger.info("tagged", extra={'sampled': True})
+    pipeline.stop()
+
+    assert [entry['msg'] for entry in read_entries(tmp_path / 'app.log')] == ['kept']
+    assert pipeline.get_status()['dropped_sampled'] == 2
+
+def test_request_id_extra_fields_and_exception_reach_json(tmp_path):
+    pipeline = LoggingPipeline(str(tmp_path / 'app.log'), console=False)
+    logger = make_logger(pipeline, 'test.fields')
+    pipeline.listener.start()
+
+    set_request_id('req-123')
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        logger.exception("Handling %s failed", 'chat', extra={'user_id': 'u1'})
+    set_request_id('req-456')
+    logger.info("next")
+    pipeline.stop()
+
+    failed, following = read_entries(tmp_path / 'app.log')
+    assert failed['msg'] == 'Handling chat failed' and failed['request_id'] == 'req-123'
+    assert failed['user_id'] == 'u1' and 'RuntimeError: boom' in failed['exc']
+    assert following['request_id'] == 'req-456' and 'exc' not in following
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    pipeline = LoggingPipeline(str(tmp_path / 'app.log'), queue_size=2, console=False)
+    logger = make_logger(pipeline, 'test.full')
+
+    for i in range(5):  # Listener not started: nothing drains the queue
+        logger.warning("record %d", i)
+
+    assert pipeline.get_status()['dropped_full_queue'] == 3
+    pipeline.listener.start()
+    pipeline.stop()
+    assert [entry['msg'] for entry in read_entries(tmp_path / 'app.log')] == ['record 0', 'record 1']
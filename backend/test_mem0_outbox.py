@@ -0,0 +1,143 @@
+"""
+Podplay Sanctuary Mem0 Outbox Test
+Runs the outbox sender against a local HTTP stand-in for the Mem0 API,
+standalone and as the memory manager's transactional outbox
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services.mem0_outbox import Mem0HttpTransport, Mem0Outbox, interaction_payload
+from services.memory_manager import MemoryManager
+
+class FakeMem0:
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.received = []
+        self.auth_headers = set()
+        self.lock = threading.Lock()
+
+@pytest.fixture
+def mem0_server():
+    state = FakeMem0()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            with state.lock:
+                state.auth_headers.add(self.headers.get('Authorization'))
+                failing = state.failures > 0
+                if failing:
+                    state.failures -= 1
+                else:
+                    state.received.append(body)
+            status = 503 if failing else 200
+            self.send_response(status)
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'{}')
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield state
+    server.shutdown()
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+def make_outbox(tmp_path, url, **kwargs):
+    transport = Mem0HttpTransport(base_url=url, api_key='test-key')
+    return Mem0Outbox(str(tmp_path / 'outbox.db'), transport, base_backoff=0.01, poll_interval=0.02, **kwargs)
+
+def test_records_are_uploaded_in_batches(tmp_path, mem0_server):
+    outbox = make_outbox(tmp_path, mem0_server.url, batch_size=10)
+    for i in range(25):
+        outbox.enqueue(f"m{i}", interaction_payload(f"m{i}", 'u1', f"question {i}", f"answer {i}"))
+
+    assert wait_for(lambda: outbox.get_status()['backlog'] == 0)
+    status = outbox.get_status()
+    assert status['sent'] == 25 and status['lag_seconds'] == 0.0
+    assert {body['metadata']['memory_id'] for body in mem0_server.received} == {f"m{i}" for i in range(25)}
+    assert mem0_server.auth_headers == {'Token test-key'}
+    outbox.close()
+
+def test_failures_are_retried_with_backoff(tmp_path, mem0_server):
+    mem0_server.failures = 3
+    outbox = make_outbox(tmp_path, mem0_server.url)
+    outbox.enqueue('m1', interaction_payload('m1', 'u1', 'hi', 'hello'))
+
+    assert wait_for(lambda: outbox.get_status()['sent'] == 1)
+    status = outbox.get_status()
+    assert status['failed_attempts'] == 3 and status['dead_letters'] == 0
+    assert len(mem0_server.received) == 1
+    outbox.close()
+
+def test_requeued_memory_is_uploaded_once_and_dead_letters_are_parked(tmp_path, mem0_server):
+    outbox = make_outbox(tmp_path, 'http://127.0.0.1:1', max_attempts=2)
+    outbox.enqueue('m1', interaction_payload('m1', 'u1', 'first', 'draft'))
+    outbox.enqueue('m1', interaction_payload('m1', 'u1', 'first', 'final'))
+    assert outbox.get_status()['deduplicated'] == 1
+
+    # Nothing is listening on port 1: the row is parked after max_attempts
+    assert wait_for(lambda: outbox.get_status()['dead_letters'] == 1)
+    assert outbox.get_status()['backlog'] == 0
+    outbox.close()
+
+    # A new sender pointed at a working endpoint picks up re-queued work only
+    outbox = make_outbox(tmp_path, mem0_server.url)
+    outbox.enqueue('m1', interaction_payload('m1', 'u1', 'first', 'final'))
+    assert wait_for(lambda: outbox.get_status()['sent'] == 1)
+    assert [body['messages'][1]['content'] for body in mem0_server.received] == ['final']
+    outbox.close()
+
+def test_manager_queues_uploads_in_the_conversation_transaction(tmp_path, monkeypatch, mem0_server):
+    # Rows left in the old standalone outbox file are carried over
+    legacy = Mem0Outbox(str(tmp_path / 'mem0_outbox.db'), Mem0HttpTransport(base_url='http://127.0.0.1:1'))
+    legacy.stage(legacy._connection(), 'conversation_old', interaction_payload('conversation_old', 'u1', 'q', 'a'))
+    legacy._connection().commit()
+
+    monkeypatch.setenv('MEM0_API_KEY', 'test-key')
+    monkeypatch.setenv('MEM0_API_URL', mem0_server.url)
+    manager = MemoryManager(db_path=str(tmp_path / 'sanctuary.db'))
+    assert (tmp_path / 'mem0_outbox.db.migrated').exists()
+
+    def fail_stage(conn, memory_id, payload):
+        raise RuntimeError('outbox write failed')
+
+    async def scenario():
+        assert await manager.save_interaction('u1', 'main_chat', 'hello', 'hi there')
+        real_stage, manager.mem0_outbox.stage = manager.mem0_outbox.stage, fail_stage
+        assert not await manager.save_interaction('u1', 'main_chat', 'lost', 'rolled back')
+        manager.mem0_outbox.stage = real_stage
+
+    asyncio.run(scenario())
+    assert wait_for(lambda: manager.mem0_outbox.get_status()['sent'] == 2)
+    assert {body['metadata']['memory_id'] for body in mem0_server.received} == {'conversation_old', 'conversation_1'}
+
+    # The failed upload took its conversation row down with it
+    with sqlite3.connect(str(tmp_path / 'sanctuary.db')) as conn:
+        assert conn.execute("SELECT message FROM conversations").fetchall() == [('hello',)]
+    assert asyncio.run(manager.get_status())['mem0_sync']['backlog'] == 0
+    manager.close()
@@ -0,0 +1,65 @@
+"""
+Podplay Sanctuary Memory Cache Test
+Covers entry and byte bounds, importance-aware eviction and hit/miss metrics
+"""
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services.memory_cache import MemoryRecordCache, estimate_record_size
+from services.mama_bear_memory_system import MemoryImportance, MemoryRecord, MemoryType
+
+def record(memory_id: str, importance=MemoryImportance.MEDIUM, text: str = 'hello') -> MemoryRecord:
+    return MemoryRecord(id=memory_id, type=MemoryType.CONVERSATION, content={'message': text},
+                        user_id='u1', importance=importance)
+
+def test_entry_bound_evicts_least_important_of_the_oldest_window():
+    cache = MemoryRecordCache(max_entries=3, eviction_window=2)
+    cache['critical'] = record('critical', MemoryImportance.CRITICAL)
+    cache['trivial'] = record('trivial', MemoryImportance.TRIVIAL)
+    cache['recent'] = record('recent', MemoryImportance.TRIVIAL)
+    cache['newest'] = record('newest')
+
+    # Window is [critical, trivial]: the idle critical record survives
+    assert list(cache) == ['critical', 'recent', 'newest']
+
+    cache.get('critical')  # Touch: now most recent
+    cache['another'] = record('another')
+    assert 'recent' not in cache and 'critical' in cache
+    assert cache.get_status()['evictions'] == 2
+
+def test_byte_bound_tracks_replacements_and_pops():
+    one = record('a', text='x' * 1000)
+    size = estimate_record_size(one)
+    cache = MemoryRecordCache(max_entries=100, max_bytes=size * 2 + 10)
+
+    cache['a'] = one
+    cache['a'] = record('a', text='x' * 1000)  # Replacing does not double count
+    cache['b'] = record('b', text='x' * 1000)
+    assert cache.get_status()['approx_bytes'] == size * 2
+
+    cache['c'] = record('c', text='x' * 1000)
+    status = cache.get_status()
+    assert len(cache) == 2 and status['approx_bytes'] <= cache.max_bytes
+    assert status['evicted_bytes'] == size
+
+    assert cache.pop('b').id == 'b' and cache.pop('missing') is None
+    assert cache.get_status()['approx_bytes'] == size
+
+def test_hit_rate_and_mapping_protocol():
+    cache = MemoryRecordCache()
+    cache['a'] = record('a')
+
+    assert cache['a'].id == 'a' and cache.get('b') is None
+    with pytest.raises(KeyError):
+        cache['b']
+    del cache['a']
+    assert len(cache) == 0
+
+    status = cache.get_status()
+    assert status['hits'] == 1 and status['misses'] == 2 and status['hit_rate'] == 0.333
@@ -0,0 +1,103 @@
+"""
+Podplay Sanctuary Memory Codec Test
+Covers record round-trips, schema evolution, streaming decode and pickle conversion
+"""
+import io
+import os
+import pickle
+import sys
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services import memory_codec
+from services.memory_codec import CodecError, RecordSchema, iter_decode, write_frame
+from services.memory_segment_store import SegmentLogStore
+from services.mama_bear_memory_system import (
+    MEMORY_RECORD_SCHEMA, MemoryImportance, MemoryRecord, MemoryType, UserProfile
+)
+
+def make_record(i: int = 1) -> MemoryRecord:
+    return MemoryRecord(
+        id=f"m{i}",
+        type=MemoryType.CONVERSATION,
+        content={
+            'user_message': 'How do I deploy? 🐻',
+            'agent_response': 'Like this.',
+            'metadata': {'scores': [0.1, -2.5, 3.0, 1e-9], 'ok': True, 'missing': None, 'n': -(2 ** 70)},
+            'timestamp': datetime(2024, 5, 1, 12, 30, tzinfo=timezone(timedelta(hours=-5)))
+        },
+        user_id='u1',
+        agent_id='devops',
+        importance=MemoryImportance.HIGH,
+        tags=['deploy', 'docker'],
+        created_at=datetime(2024, 5, 1, 12, 0, 0, 123456),
+        embedding=[0.25] * 16
+    )
+
+def test_memory_record_round_trip_is_exact_and_smaller_than_pickle():
+    record = make_record()
+    data = MEMORY_RECORD_SCHEMA.encode(record)
+
+    assert memory_codec.decode(data) == record
+    assert len(data) < len(pickle.dumps(record))
+
+    profile = UserProfile(user_id='u1', preferred_agents=['scout'])
+    assert memory_codec.loads(memory_codec.schema_for(profile).encode(profile)) == profile
+
+def test_schema_evolution_skips_unknown_and_defaults_missing_fields():
+    @dataclass
+    class NoteV1:
+        id: str
+        text: str = ''
+
+    @dataclass
+    class NoteV2:
+        id: str
+        text: str = ''
+        pinned: bool = False
+
+    v1 = RecordSchema(90, NoteV1, {1: 'id', 2: 'text'})
+    v2 = RecordSchema(90, NoteV2, {1: 'id', 2: 'text', 3: 'pinned'})
+
+    assert v1.decode(v2.encode(NoteV2('n1', 'hello', pinned=True))) == NoteV1('n1', 'hello')
+    assert v2.decode(v1.encode(NoteV1('n1', 'hello'))) == NoteV2('n1', 'hello', pinned=False)
+
+    newer_format = bytearray(v1.encode(NoteV1('n1')))
+    newer_format[2] = memory_codec.FORMAT_VERSION + 1
+    with pytest.raises(CodecError):
+        v1.decode(bytes(newer_format))
+
+def test_streaming_decode_and_pickle_policy():
+    stream = io.BytesIO()
+    for i in range(5):
+        write_frame(stream, MEMORY_RECORD_SCHEMA.encode(make_record(i)))
+    stream.write(b'\x40\x00\x00\x00torn')
+    stream.seek(0)
+    assert [record.id for record in iter_decode(stream)] == [f"m{i}" for i in range(5)]
+
+    legacy = pickle.dumps(make_record())
+    assert memory_codec.loads(legacy) == make_record()
+    with pytest.raises(CodecError):
+        memory_codec.loads(legacy, allow_pickle=False)
+
+def test_converter_rewrites_store_values_and_profile_files(tmp_path):
+    store = SegmentLogStore(str(tmp_path / 'segments'))
+    store.put('m1', pickle.dumps(make_record(1)))
+    store.put('m2', MEMORY_RECORD_SCHEMA.encode(make_record(2)))
+    profiles = tmp_path / 'profiles'
+    profiles.mkdir()
+    (profiles / 'u1.pkl').write_bytes(pickle.dumps(UserProfile(user_id='u1')))
+
+    assert memory_codec.convert_segment_store(store) == {'scanned': 2, 'converted': 1, 'failed': 0}
+    assert memory_codec.loads(store.get('m1'), allow_pickle=False) == make_record(1)
+    store.close()
+
+    assert memory_codec.convert_pickle_directory(str(profiles))['converted'] == 1
+    assert sorted(os.listdir(profiles)) == ['u1.rec']
+    assert memory_codec.loads((profiles / 'u1.rec').read_bytes(), allow_pickle=False).user_id == 'u1'
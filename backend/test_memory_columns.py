@@ -0,0 +1,127 @@
+"""
+Podplay Sanctuary Memory Columns Test
+Covers vectorized metadata filters, time-ordered user rows, deletion/compaction
+and lazy top-K context
+"""
+import asyncio
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services.memory_columns import MemoryColumns
+from services.memory_timeline import MemoryTimeline
+from services.mama_bear_memory_system import (
+    EnhancedMemoryManager, MemoryImportance, MemoryRecord, MemoryType
+)
+
+NOW = datetime.now()
+
+def make_records():
+    records = []
+    for i in range(200):
+        records.append(MemoryRecord(
+            id=f"m{i}",
+            type=MemoryType.CONVERSATION if i % 4 else MemoryType.LEARNING_INSIGHT,
+            content={'i': i},
+            user_id=f"u{i % 2}",
+            agent_id=['research', 'devops', None][i % 3],
+            importance=list(MemoryImportance)[i % 5],
+            created_at=NOW - timedelta(hours=i)
+        ))
+    return records
+
+def test_filters_match_timeline():
+    columns, timeline = MemoryColumns(initial_capacity=8), MemoryTimeline()
+    for record in make_records():
+        columns.add(record)
+        timeline.add(record)
+
+    queries = [
+        dict(user_id='u0'),
+        dict(user_id='u0', agent_id='research', since=NOW - timedelta(days=7), min_importance=MemoryImportance.HIGH.value),
+        dict(user_id='u1', memory_type='conversation', limit=7),
+        dict(user_id='u1', agent_id='unknown'),
+        dict(user_id='nobody')
+    ]
+    for query in queries:
+        assert columns.recent(**query) == timeline.recent(**query)
+
+    meta = columns.get_meta('m10')
+    assert (meta.user_id, meta.agent_id, meta.type, meta.importance) == ('u0', 'devops', 'conversation', 5)
+    assert columns.get_status()['capacity'] == 256
+
+def test_removal_and_compaction_keep_rows_consistent():
+    columns = MemoryColumns()
+    records = make_records()
+    for record in records:
+        columns.add(record)
+    for record in records[:150]:
+        assert columns.remove(record.id).id == record.id
+    columns._compact()
+
+    assert len(columns) == 50 and columns.get_status()['rows'] == 50
+    assert 'm10' not in columns and columns.remove('m10') is None
+    assert columns.recent('u0', limit=3) == ['m150', 'm152', 'm154']
+    columns.touch('m150', NOW.timestamp())
+    assert columns.columns['access_count'][columns.rows['m150']] == 1
+
+def test_context_loads_only_top_k(tmp_path):
+    manager = EnhancedMemoryManager(local_storage_path=str(tmp_path))
+
+    async def scenario():
+        for record in make_records():
+            await manager._store_memory(record)
+            manager._update_indices(record)
+        manager.memory_cache.clear()
+
+        context = await manager.get_relevant_context('u0', 'anything', agent_id='research', limit=3)
+        loaded = len(manager.memory_cache)
+        filtered = await manager.query_memories('u0', agent_id='research', days=7,
+                                                min_importance=MemoryImportance.HIGH, limit=50)
+        await manager.shutdown()
+        return context, loaded, filtered
+
+    context, loaded, filtered = asyncio.run(scenario())
+    assert len(context) == 3 and loaded == 3
+    expected = [f"m{i}" for i in range(0, 168, 6) if i % 5 in (0, 1)]
+    assert [memory['id'] for memory in filtered] == expected
+
+def test_user_rows_stay_time_ordered_and_live():
+    columns, timeline = MemoryColumns(), MemoryTimeline()
+    records = make_records()
+    random.Random(7).shuffle(records)  # Out-of-order creation times, as after a restart
+    for record in records:
+        columns.add(record)
+        timeline.add(record)
+    for record in records[::3]:
+        columns.remove(record.id)
+        timeline.remove(record.id)
+
+    user = columns.users.lookup('u0')
+    created = columns.user_created[user].tolist()
+    assert created == sorted(created) and len(created) == len(timeline.by_user['u0'])
+    assert all(columns.columns['alive'][row] for row in columns.user_rows[user])
+
+    queries = [
+        dict(user_id='u0', since=NOW - timedelta(hours=30)),
+        dict(user_id='u1', limit=500),
+        dict(user_id='u1', agent_id='devops', min_importance=MemoryImportance.HIGH.value, limit=3)
+    ]
+    for query in queries:
+        assert columns.recent(**query) == timeline.recent(**query)
+
+def test_sparse_matches_walk_back_past_the_first_window():
+    columns = MemoryColumns()
+    for i in range(3000):
+        columns.add(MemoryRecord(id=f"m{i}", type=MemoryType.CONVERSATION, content={}, user_id='u0',
+                                 agent_id='rare' if i % 1000 == 0 else 'common',
+                                 importance=MemoryImportance.MEDIUM, created_at=NOW - timedelta(minutes=3000 - i)))
+
+    assert columns.recent('u0', agent_id='rare', limit=5) == ['m2000', 'm1000', 'm0']
+    assert columns.recent('u0', agent_id='rare', since=NOW - timedelta(minutes=1500)) == ['m2000']
+    assert columns.recent('u0', limit=2) == ['m2999', 'm2998']
@@ -0,0 +1,99 @@
+"""
+Podplay Sanctuary Memory Context Test
+Covers concurrent context sources, per-source budgets and debug metadata
+"""
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services.mama_bear_memory_system import (
+    EnhancedMemoryManager, MemoryImportance, MemoryRecord, MemoryType, context_source_budgets
+)
+
+def make_record(i: int, message: str, agent_id: str = 'research', hours_old: int = 1) -> MemoryRecord:
+    return MemoryRecord(
+        id=f"m{i}",
+        type=MemoryType.CONVERSATION,
+        content={'user_message': message, 'agent_response': 'noted'},
+        user_id='u1',
+        agent_id=agent_id,
+        importance=MemoryImportance.MEDIUM,
+        created_at=datetime.now() - timedelta(hours=hours_old)
+    )
+
+async def seeded_manager(path) -> EnhancedMemoryManager:
+    manager = EnhancedMemoryManager(local_storage_path=str(path))
+    records = [
+        make_record(1, 'kubernetes rollout stuck', hours_old=200),
+        make_record(2, 'weekend plans', hours_old=2),
+        make_record(3, 'agent only', agent_id='devops', hours_old=100),
+        make_record(4, 'kubernetes rollout again', hours_old=1)
+    ]
+    for record in records:
+        await manager._store_memory(record)
+        manager._update_indices(record)
+    manager.memory_cache.clear()
+    return manager
+
+def test_sources_merge_by_id_and_report_contribution(tmp_path):
+    async def scenario():
+        manager = await seeded_manager(tmp_path)
+        results, debug = await manager.get_relevant_context_with_debug('u1', 'kubernetes rollout', agent_id='devops', limit=3)
+        await manager.shutdown()
+        return manager, results, debug
+
+    manager, results, debug = asyncio.run(scenario())
+    ids = [memory['id'] for memory in results]
+    assert ids[0] == 'm4' and set(ids) <= {'m1', 'm2', 'm3', 'm4'} and len(ids) == 3
+    assert 'bm25' in results[0]
+
+    sources = debug['sources']
+    assert {name for name, source in sources.items() if source['status'] == 'ok'} >= {'recent', 'keyword', 'agent'}
+    assert sources['recent']['candidates'] == 2 and sources['keyword']['candidates'] == 2
+    assert sources['agent']['candidates'] == 1
+    assert sum(source['contributed'] for source in sources.values()) >= len(results)
+    assert debug['records_loaded'] == 3
+
+def test_slow_source_is_dropped_within_budget(tmp_path):
+    async def scenario():
+        manager = await seeded_manager(tmp_path)
+        manager.context_source_budgets_ms['keyword'] = 20
+        search = manager.search_index.search
+
+        def slow_search(*args, **kwargs):
+            time.sleep(0.5)
+            finished.append(True)
+            return search(*args, **kwargs)
+
+        manager.search_index.search = slow_search
+        results, debug = await manager.get_relevant_context_with_debug('u1', 'kubernetes rollout', limit=5)
+        assert finished == []  # Replied while the search is still running
+        await manager.shutdown()
+        return results, debug
+
+    finished = []
+    results, debug = asyncio.run(scenario())
+    assert finished == [True]  # The budget cut the wait short, not the work
+    assert debug['sources']['keyword']['status'] == 'timeout'
+    assert debug['total_ms'] < 400
+    ids = [memory['id'] for memory in results]
+    assert ids[0] == 'm4' and 'm2' in ids  # Recent source still answered
+
+def test_each_record_is_loaded_once_per_request(tmp_path):
+    async def scenario():
+        manager = await seeded_manager(tmp_path)
+        await manager.get_relevant_context('u1', 'kubernetes rollout', agent_id='research', limit=5)
+        counts = {memory_id: manager.memory_cache[memory_id].access_count for memory_id in manager.memory_cache}
+        await manager.shutdown()
+        return counts
+
+    counts = asyncio.run(scenario())
+    assert counts and set(counts.values()) == {1}
+    assert context_source_budgets('{"semantic": 500}')['semantic'] == 500.0
+    assert context_source_budgets('not json')['semantic'] == 250
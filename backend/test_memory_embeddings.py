@@ -0,0 +1,101 @@
+"""
+Podplay Sanctuary Memory Embeddings Test
+Covers the hashed TF-IDF encoder, IVF recall against brute force,
+remove/compact and concurrent search while the index changes
+"""
+import os
+import sys
+import threading
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services.memory_embeddings import HashedTfidfEncoder, MemoryEmbeddingService, UserVectorIndex
+
+def clustered_vectors(count: int, dim: int = 64, clusters: int = 40, seed: int = 3):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(clusters, size=count)] + 0.3 * rng.normal(size=(count, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+def test_encoder_scores_related_text_higher_and_learns_idf_only_on_writes():
+    encoder = HashedTfidfEncoder(dim=256)
+    docker = encoder.encode("deploy the docker image to the staging cluster")
+    related = encoder.encode("docker image deploy to staging", update_stats=False)
+    unrelated = encoder.encode("favourite pasta recipes for dinner", update_stats=False)
+
+    assert abs(np.linalg.norm(docker) - 1.0) < 1e-5
+    assert float(docker @ related) > float(docker @ unrelated)
+    assert encoder.doc_count == 1
+    assert not encoder.encode("!!!").any()  # No tokens, zero vector
+
+def test_ivf_recall_matches_brute_force_and_covers_the_unindexed_tail():
+    vectors = clustered_vectors(4000)
+    index = UserVectorIndex(64, ivf_threshold=1000, nprobe=8)
+    index.add_many([f"m{i}" for i in range(3000)], vectors[:3000])
+    assert index.needs_ivf() and index.search(vectors[0], 10) == index.search(vectors[0], 10, exact=True)
+
+    assert index.build_ivf() and not index.needs_ivf()
+    index.add_many([f"m{i}" for i in range(3000, 4000)], vectors[3000:])  # Added after the build
+
+    recalls = []
+    for query in vectors[::97]:
+        truth = {memory_id for memory_id, _ in index.search(query, 10, exact=True)}
+        approx = {memory_id for memory_id, _ in index.search(query, 10)}
+        recalls.append(len(truth & approx) / 10)
+    assert np.mean(recalls) >= 0.9
+    assert index.search(vectors[3500], 1)[0][0] == 'm3500'
+
+def test_remove_and_compact_keep_ids_consistent():
+    vectors = clustered_vectors(2000)
+    index = UserVectorIndex(64, ivf_threshold=1000)
+    index.add_many([f"m{i}" for i in range(2000)], vectors)
+    index.build_ivf()
+
+    for i in range(0, 2000, 2):
+        index.remove(f"m{i}")
+
+    assert index.layout >= 1 and index.ivf is None  # Compacted: rows renumbered, IVF dropped
+    assert len(index) == 1000 and index.size < 2000
+    for i in (1, 777, 1999):
+        assert index.search(vectors[i], 1)[0][0] == f"m{i}"
+    assert all(int(memory_id[1:]) % 2 for memory_id, _ in index.search(vectors[0], 50))
+
+def test_concurrent_search_during_adds_removes_and_background_builds():
+    vectors = clustered_vectors(6000)
+    service = MemoryEmbeddingService(dim=64, ivf_threshold=1500)
+    errors, done = [], threading.Event()
+
+    def writer():
+        try:
+            for i in range(6000):
+                service.add('u1', f"m{i}", vectors[i])
+                if i % 3 == 0 and i > 100:
+                    service.remove('u1', f"m{i - 100}")
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    def reader():
+        while not done.is_set():
+            try:
+                service.search('u1', vectors[len(errors) % 100], 5)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(60)
+    service.wait_for_index_builds(timeout=30)
+
+    assert errors == []
+    status = service.get_status()
+    assert status['ivf_builds'] >= 1 and status['ivf_builds_pending'] == 0
+    assert service.search('u1', vectors[5999], 1)[0][0] == 'm5999'
+    service.shutdown()
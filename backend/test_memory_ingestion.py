@@ -0,0 +1,109 @@
+"""
+Podplay Sanctuary Memory Ingestion Test
+Covers batched background processing, backpressure, journal replay and
+dead-lettering of items that keep failing
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services.memory_ingestion import IngestionJournal, InteractionIngestionQueue
+
+def test_items_are_processed_in_batches(tmp_path):
+    processed = []
+
+    async def process(items):
+        processed.append([item['n'] for item in items])
+
+    ingestion = InteractionIngestionQueue(process, str(tmp_path / 'journal'), batch_size=10, batch_window=0.05)
+
+    async def submit_all():
+        for n in range(25):
+            await ingestion.submit({'n': n})
+
+    asyncio.run(submit_all())
+    assert ingestion.drain(timeout=5)
+    assert sorted(n for batch in processed for n in batch) == list(range(25))
+    assert len(processed) < 25
+    assert ingestion.get_status()['processed'] == 25
+
+def test_full_queue_falls_back_to_inline_processing(tmp_path):
+    release = threading.Event()
+    inline = []
+
+    async def process(items):
+        if threading.current_thread().name == 'memory-ingestion':
+            release.wait(5)
+        else:
+            inline.extend(item['n'] for item in items)
+
+    ingestion = InteractionIngestionQueue(process, str(tmp_path / 'journal'), max_queue=2, batch_size=1,
+                                          enqueue_timeout=0.05)
+
+    async def submit_all():
+        for n in range(6):
+            await ingestion.submit({'n': n})
+
+    asyncio.run(submit_all())
+    release.set()
+    assert ingestion.drain(timeout=5)
+    assert inline and ingestion.get_status()['inline_fallbacks'] == len(inline)
+
+def test_unfinished_items_are_replayed_after_restart(tmp_path):
+    path = str(tmp_path / 'journal')
+    journal = IngestionJournal(path)
+    first = journal.append({'n': 1})
+    journal.append({'n': 2})
+    journal.mark_done([first])
+    journal.close()
+
+    replayed = []
+
+    async def process(items):
+        replayed.extend(item['n'] for item in items)
+
+    ingestion = InteractionIngestionQueue(process, path)
+    ingestion.start()
+
+    async def submit():
+        await ingestion.submit({'n': 3})
+
+    asyncio.run(submit())
+    assert ingestion.drain(timeout=5)
+    assert replayed == [2, 3]
+    assert ingestion.get_status()['recovered'] == 1
+
+def test_failing_item_is_dead_lettered_without_losing_its_batch(tmp_path):
+    path = str(tmp_path / 'journal')
+    processed = []
+
+    async def process(items):
+        if any(item['n'] == 2 for item in items):
+            raise ValueError('bad item')
+        processed.extend(item['n'] for item in items)
+
+    ingestion = InteractionIngestionQueue(process, path, batch_size=10, batch_window=0.1)
+
+    async def submit_all():
+        for n in range(5):
+            await ingestion.submit({'n': n})
+
+    asyncio.run(submit_all())
+    assert ingestion.drain(timeout=5)
+    assert sorted(processed) == [0, 1, 3, 4]
+    status = ingestion.get_status()
+    assert status['processed'] == 4 and status['failed'] == 1
+
+    with open(f"{path}.dead") as f:
+        dead = [json.loads(line) for line in f]
+    assert [entry['item'] for entry in dead] == [{'n': 2}] and dead[0]['error'] == 'bad item'
+
+    # Neither the processed items nor the dead-lettered one are replayed
+    ingestion.journal.close()
+    assert IngestionJournal(path).recover() == []
@@ -0,0 +1,57 @@
+"""
+Podplay Sanctuary Memory Patterns Test
+Covers streaming aggregates, forward decay and compaction
+"""
+import json
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services.memory_patterns import PatternAggregator
+
+DAY = 86400
+
+def test_counts_and_rates_update_per_interaction():
+    patterns = PatternAggregator()
+    patterns.record('u1', {'agent_id': 'research', 'success': True, 'topics': ['coding'], 'complexity_score': 2}, 0)
+    patterns.record('u1', {'agent_id': 'research', 'success': False, 'topics': ['coding', 'debugging']}, 10)
+    patterns.record('u1', {'agent_id': 'devops', 'success': True, 'complexity_score': 8}, 20)
+
+    summary = patterns.get('u1', now=20)
+    assert summary['interactions'] == 3
+    assert summary['agent_success']['research'] == {'successes': 1, 'total': 2, 'rate': 0.5}
+    assert summary['topic_counts'] == {'coding': 2, 'debugging': 1}
+    assert summary['complexity']['trend'] > 0
+    assert patterns.agent_success_rates('u1') == {'research': 0.5, 'devops': 1.0}
+    assert patterns.get('nobody') is None
+
+def test_weights_decay_by_half_life_and_compaction_preserves_them():
+    patterns = PatternAggregator(half_life_days=1)
+    patterns.record('u1', {'topics': ['coding']}, 0)
+    patterns.record('u1', {'topics': ['planning']}, DAY)
+
+    weights = patterns.get('u1', now=DAY)['topic_weights']
+    assert weights == {'planning': 1.0, 'coding': 0.5}
+
+    patterns.compact(now=DAY)
+    assert patterns.get('u1', now=2 * DAY)['topic_weights'] == {'planning': 0.5, 'coding': 0.25}
+
+    # Long-idle weights fall below min_weight and are pruned
+    assert patterns.compact(now=20 * DAY)['pruned'] == 2
+    assert patterns.get('u1', now=20 * DAY)['topic_weights'] == {}
+    assert patterns.get('u1', now=20 * DAY)['topic_counts'] == {'coding': 1, 'planning': 1}
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / 'aggregates.json')
+    patterns = PatternAggregator()
+    patterns.record('u1', {'agent_id': 'research', 'topics': ['coding'], 'complexity_score': 4}, 100)
+    patterns.save(path)
+    assert json.loads(open(path).read())['users']['u1']['agent_counts'] == {'research': [1, 1]}
+
+    restored = PatternAggregator()
+    assert restored.load(path)
+    assert restored.watermark == 100
+    assert restored.get('u1', now=100) == patterns.get('u1', now=100)
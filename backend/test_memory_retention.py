@@ -0,0 +1,43 @@
+"""
+Podplay Sanctuary Memory Retention Test
+Covers per-type TTL policy, expiry ordering, sliding expiry and cancellation
+"""
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services.memory_retention import DAY, RetentionPolicy, RetentionScheduler
+
+def test_policy_overrides_per_type_and_falls_back_to_default():
+    policy = RetentionPolicy.from_json('{"conversation": {"LOW": 30, "trivial": 1}}')
+    assert policy.ttl('conversation', 'LOW') == 30 * DAY
+    assert policy.ttl('conversation', 'TRIVIAL') == DAY
+    assert policy.ttl('agent_context', 'TRIVIAL') == 7 * DAY
+    assert policy.ttl('agent_context', 'CRITICAL') is None
+    assert RetentionPolicy.from_json('not json').ttl('conversation', 'TRIVIAL') == 7 * DAY
+
+def test_expired_memories_pop_in_order_and_in_batches():
+    scheduler = RetentionScheduler()
+    for i in range(5):
+        scheduler.schedule(f"m{i}", 'conversation', 'TRIVIAL', created_ts=i * 10)
+    assert scheduler.schedule('kept', 'conversation', 'HIGH', created_ts=0) is None
+
+    now = 7 * DAY + 25
+    assert scheduler.pop_expired(now, limit=2) == ['m0', 'm1']
+    assert scheduler.pop_expired(now) == ['m2']
+    assert scheduler.pop_expired(now) == []
+    assert len(scheduler) == 2
+
+def test_reads_slide_expiry_and_cancel_removes_entry():
+    scheduler = RetentionScheduler()
+    scheduler.schedule('read', 'conversation', 'TRIVIAL', created_ts=0)
+    scheduler.schedule('deleted', 'conversation', 'TRIVIAL', created_ts=0)
+    scheduler.touch('read', timestamp=5 * DAY)
+    scheduler.cancel('deleted')
+
+    assert scheduler.pop_expired(8 * DAY) == []
+    assert scheduler.metrics['extended'] == 1
+    assert scheduler.pop_expired(12 * DAY) == ['read']
@@ -0,0 +1,57 @@
+"""
+Podplay Sanctuary Memory Search Test
+Covers tokenizing, BM25 ranking, document frequency upkeep on replace/remove
+and per-user isolation
+"""
+import math
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services.memory_search import BM25Index, tokenize
+
+def test_tokenize_drops_stopwords_and_single_characters():
+    assert tokenize("How do I deploy the Docker_image to k8s? A b") == ['deploy', 'docker_image', 'k8s']
+    assert tokenize("the and of") == []
+
+def test_rare_terms_and_short_documents_rank_higher():
+    index = BM25Index()
+    index.add('u1', 'm1', "python deploy script")
+    index.add('u1', 'm2', "python notes")
+    index.add('u1', 'm3', "python python tutorial with many extra padding words here")
+
+    # 'deploy' is rare, 'python' is everywhere: the rare match wins
+    results = index.search('u1', "python deploy")
+    assert results[0][0] == 'm1' and len(results) == 3
+
+    # Same tf, shorter document scores higher
+    scores = index.score('u1', "notes tutorial python", ['m2', 'm3', 'unknown'])
+    assert scores['m2'] > scores['m3'] and scores['unknown'] == 0.0
+
+    # search and score agree
+    scored = index.score('u1', "python deploy", ['m1', 'm2', 'm3'])
+    assert all(math.isclose(score, scored[memory_id]) for memory_id, score in results)
+    assert index.search('u1', "the and") == [] and index.search('u2', "python") == []
+
+def test_replace_and_remove_keep_postings_and_lengths_consistent():
+    index = BM25Index()
+    index.add('u1', 'm1', "docker compose docker")
+    index.add('u1', 'm2', "docker swarm")
+    user = index.users['u1']
+    assert user.postings['docker'] == {'m1': 2, 'm2': 1} and user.total_length == 5
+
+    index.add('u1', 'm1', "kubernetes cluster")  # Replace: old terms leave the postings
+    assert user.postings['docker'] == {'m2': 1} and 'compose' not in user.postings
+    assert user.total_length == 4 and user.avg_length == 2.0
+
+    # df=1 of N=2: idf = log(1 + 1.5/1.5)
+    assert math.isclose(index._idf(user, 'docker'), math.log(2))
+
+    index.remove('u1', 'm2')
+    index.remove('u1', 'missing')
+    assert 'docker' not in user.postings and user.doc_count == 1 and user.total_length == 2
+    assert index.search('u1', "docker") == []
+    assert index.get_status() == {'users': 1, 'documents': 1, 'terms': 2}
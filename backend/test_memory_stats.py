@@ -0,0 +1,108 @@
+"""
+Podplay Sanctuary Memory Stats Test
+Covers trigger-maintained status counters, upgrades, reconciliation
+and session expiry
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services.memory_manager import MemoryManager
+
+def make_manager(tmp_path, monkeypatch, keep=1000) -> MemoryManager:
+    monkeypatch.setenv('MEM0_MEMORY_ENABLED', 'false')
+    monkeypatch.setenv('CONVERSATION_RETENTION', str(keep))
+    monkeypatch.setenv('CONVERSATION_RETENTION_SLACK', '0')
+    manager = MemoryManager(db_path=str(tmp_path / 'memory.db'))
+    manager.compactor.interval = 3600
+    return manager
+
+def counts(manager):
+    status = asyncio.run(manager.get_status())
+    return status['total_conversations'], status['unique_users'], status['active_sessions']
+
+def test_counters_follow_saves_trims_and_deletes(tmp_path, monkeypatch):
+    manager = make_manager(tmp_path, monkeypatch, keep=3)
+
+    async def scenario():
+        for i in range(5):
+            await manager.save_interaction('u1', 'main_chat', f"q{i}", "a")
+        await manager.save_interaction('u1', 'scout', "q", "a")
+        await manager.save_interaction('u2', 'main_chat', "q", "a")
+        await manager.save_session_memory('u1', 'main_chat', 'draft', 1)
+        await manager.save_session_memory('u1', 'main_chat', 'draft', 2)  # Overwrite, not a second row
+
+    asyncio.run(scenario())
+    assert counts(manager) == (5, 2, 1)  # u1/main_chat trimmed to 3
+
+    manager.db.write_sync(lambda conn: conn.execute("DELETE FROM conversations WHERE user_id = 'u2'"))
+    assert counts(manager) == (4, 1, 1)
+    manager.db.write_sync(lambda conn: conn.execute("DELETE FROM conversations WHERE page_context = 'main_chat'"))
+    assert counts(manager) == (1, 1, 1)  # u1 still has scout
+    manager.close()
+
+def test_stats_are_backfilled_for_existing_databases(tmp_path, monkeypatch):
+    with sqlite3.connect(tmp_path / 'memory.db') as conn:
+        conn.execute("""
+            CREATE TABLE conversations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, page_context TEXT NOT NULL,
+                message TEXT NOT NULL, response TEXT NOT NULL, metadata TEXT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.executemany("INSERT INTO conversations (user_id, page_context, message, response) VALUES (?, ?, 'q', 'a')",
+                         [('u1', 'main_chat')] * 4 + [('u1', 'vm_hub')] * 2 + [('u2', 'scout')])
+
+    manager = make_manager(tmp_path, monkeypatch)
+    assert counts(manager) == (7, 2, 0)
+    asyncio.run(manager.save_interaction('u3', 'main_chat', "q", "a"))
+    assert counts(manager) == (8, 3, 0)
+    manager.close()
+
+def test_reconcile_corrects_drift_and_purges_expired_sessions(tmp_path, monkeypatch):
+    manager = make_manager(tmp_path, monkeypatch)
+
+    async def scenario():
+        await manager.save_interaction('u1', 'main_chat', "q", "a")
+        await manager.save_session_memory('u1', 'main_chat', 'live', 1)
+        await manager.save_session_memory('u1', 'main_chat', 'stale', 1, expires_in_hours=-48)
+
+    asyncio.run(scenario())
+    assert counts(manager) == (1, 1, 2)
+
+    manager.db.write_sync(lambda conn: conn.execute("UPDATE memory_stats SET value = 40 WHERE name = 'conversations'"))
+    assert manager.reconcile_stats() == {'conversations': -39}
+    assert counts(manager) == (1, 1, 1)
+    assert manager.stats_metrics['expired_sessions_purged'] == 1 and manager.reconcile_stats() == {}
+    manager.close()
+
+def test_session_expiry_uses_one_clock_whatever_the_local_timezone(tmp_path, monkeypatch):
+    manager = make_manager(tmp_path, monkeypatch)
+    original_tz = os.environ.get('TZ')
+
+    def read():
+        return asyncio.run(manager.get_session_memory('u1', 'main_chat'))
+
+    try:
+        for tz in ('Etc/GMT+10', 'Etc/GMT-10'):  # UTC-10 and UTC+10
+            os.environ['TZ'] = tz
+            time.tzset()
+            asyncio.run(manager.save_session_memory('u1', 'main_chat', 'live', 1, expires_in_hours=1))
+            asyncio.run(manager.save_session_memory('u1', 'main_chat', 'stale', 1, expires_in_hours=-1))
+            assert read() == {'live': 1}
+
+            manager.reconcile_stats()
+            assert read() == {'live': 1} and counts(manager)[2] == 1  # Only the expired row was purged
+    finally:
+        if original_tz is None:
+            os.environ.pop('TZ', None)
+        else:
+            os.environ['TZ'] = original_tz
+        time.tzset()
+        manager.close()
@@ -0,0 +1,141 @@
+"""
+Podplay Sanctuary Memory System Test
+Covers the enhanced memory manager across restarts, under concurrent
+ingestion and in background maintenance, with startup and requests on
+separate event loops as in app.py
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services.mama_bear_memory_system import EnhancedMemoryManager, MemoryImportance, MemoryRecord, MemoryType
+
+def start_manager(path) -> EnhancedMemoryManager:
+    manager = EnhancedMemoryManager(local_storage_path=str(path))
+    asyncio.run(manager.async_init())  # Startup loop closes here, like app.py's asyncio.run(startup())
+    return manager
+
+def test_restart_rebuilds_indices_before_startup_returns(tmp_path):
+    manager = start_manager(tmp_path)
+    for i in range(5):
+        asyncio.run(manager.save_interaction('u1', f"kubernetes rollout question {i}", 'try a canary'))
+    asyncio.run(manager.save_interaction('u1', 'weekend pasta recipes', 'carbonara'))
+    assert manager.ingestion.drain(timeout=10)
+    doc_freq = manager.embeddings.encoder.doc_freq.copy()
+    asyncio.run(manager.shutdown())
+
+    restarted = start_manager(tmp_path)
+    assert len(restarted.timeline) == 6
+    # Query IDF weights match the ones the stored vectors were written with
+    assert restarted.embeddings.encoder.doc_count == 6
+    assert (restarted.embeddings.encoder.doc_freq == doc_freq).all()
+
+    results = asyncio.run(restarted.get_relevant_context('u1', 'kubernetes rollout', limit=3))
+    assert len(results) == 3 and all('kubernetes' in memory['content']['user_message'] for memory in results)
+    assert asyncio.run(restarted.get_user_patterns('u1'))['recent_patterns']
+    asyncio.run(restarted.shutdown())
+
+def test_reads_stay_consistent_while_ingestion_writes(tmp_path):
+    manager = start_manager(tmp_path)
+    errors, done = [], threading.Event()
+
+    def writer():
+        try:
+            for i in range(150):
+                asyncio.run(manager.save_interaction(f"u{i % 3}", f"docker deploy question {i}", 'check the logs',
+                                                     {'agent_id': 'devops' if i % 2 else 'research'}))
+            assert manager.ingestion.drain(timeout=30)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    def reader(user_id):
+        async def read():
+            _, debug = await manager.get_relevant_context_with_debug(user_id, 'docker deploy', agent_id='devops')
+            failed = [name for name, source in debug['sources'].items() if source['status'] == 'error']
+            assert not failed, failed
+            await manager.query_memories(user_id, days=1)
+            await manager.get_user_patterns(user_id)
+            await manager.get_status()
+
+        while not done.is_set():
+            try:
+                asyncio.run(read())
+            except Exception as e:
+                errors.append(e)
+
+    def deleter():
+        while not done.is_set():
+            for memory_id in manager.timeline.recent('u2', limit=2):
+                asyncio.run(manager._delete_memory(memory_id))
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=writer), threading.Thread(target=deleter)]
+    threads += [threading.Thread(target=reader, args=(f"u{i}",)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(60)
+
+    assert errors == []
+    # Every surviving memory is in every index; deleted ones are in none
+    alive = {user_id: set(manager.timeline.recent(user_id, limit=1000)) for user_id in ('u0', 'u1', 'u2')}
+    assert len(alive['u0']) == 50 and len(alive['u1']) == 50
+    for user_id, memory_ids in alive.items():
+        assert set(manager.search_index.users[user_id].doc_lengths) == memory_ids
+    assert manager.search_index.get_status()['documents'] == len(manager.timeline)
+    assert manager.embeddings.get_status()['vectors'] == len(manager.timeline)
+    asyncio.run(manager.shutdown())
+
+def test_pattern_compaction_runs_after_the_startup_loop_is_gone(tmp_path, monkeypatch):
+    monkeypatch.setenv('PATTERN_COMPACTION_INTERVAL', '0.05')
+    manager = start_manager(tmp_path)
+    asyncio.run(manager.save_interaction('u1', 'review my code', 'done', {'agent_id': 'research'}))
+    assert manager.ingestion.drain(timeout=10)
+
+    def saved_users():
+        try:
+            with open(manager.patterns_path) as f:
+                return json.load(f)['users']
+        except (OSError, ValueError):
+            return {}
+
+    deadline = time.monotonic() + 10
+    while 'u1' not in saved_users() and time.monotonic() < deadline:
+        time.sleep(0.02)  # Saving the aggregates is the last step of a compaction pass
+    assert saved_users()['u1']['interactions'] == 1
+    assert manager.patterns.get_status()['pending_compaction'] == 0
+    assert asyncio.run(manager._load_user_profile('u1')).success_patterns == {'research': 1.0}
+    asyncio.run(manager.shutdown())
+
+def test_retention_expires_memories_from_the_maintenance_thread(tmp_path, monkeypatch):
+    monkeypatch.setenv('MEMORY_RETENTION_INTERVAL', '0.05')
+    monkeypatch.setenv('MEMORY_RETENTION_POLICY', json.dumps({'conversation': {'medium': 1}}))
+    manager = start_manager(tmp_path)
+
+    async def seed():
+        for i, days_old in enumerate((3, 2, 0)):
+            record = MemoryRecord(id=f"m{i}", type=MemoryType.CONVERSATION, content={'user_message': 'hello'},
+                                  user_id='u1', importance=MemoryImportance.MEDIUM,
+                                  created_at=datetime.now() - timedelta(days=days_old))
+            await manager._store_memory(record)
+            manager._update_indices(record)
+
+    asyncio.run(seed())
+
+    deadline = time.monotonic() + 10
+    while manager.retention.get_status()['reclaimed_records'] < 2 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert manager.retention.get_status()['reclaimed_records'] == 2
+    assert manager.timeline.recent('u1') == ['m2']
+    assert 'm0' not in manager.segment_store and 'm0' not in manager.memory_cache
+    asyncio.run(manager.shutdown())
@@ -0,0 +1,97 @@
+"""
+Podplay Sanctuary Profile Store Test
+Covers lazy loading, coalesced dirty flushes, atomic replacement,
+snapshots taken at mark time, clean-entry eviction and flush on close
+"""
+import asyncio
+import json
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services.profile_store import ProfileStore
+
+def make_store(path, **kwargs) -> ProfileStore:
+    return ProfileStore(str(path), factory=lambda user_id: {'user_id': user_id, 'visits': 0},
+                        flush_interval=60, dumps=lambda profile: json.dumps(profile).encode(),
+                        loads=json.loads, suffix='.json', **kwargs)
+
+def test_profiles_load_lazily_and_updates_coalesce(tmp_path):
+    (tmp_path / 'u1.json').write_bytes(json.dumps({'user_id': 'u1', 'visits': 7}).encode())
+    store = make_store(tmp_path)
+    assert store.profiles == {} and len(store) == 1 and 'u1' in store
+
+    profile = asyncio.run(store.get('u1'))
+    assert profile['visits'] == 7 and store.get_status()['pending_dirty'] == 0
+
+    for _ in range(5):
+        profile['visits'] += 1
+        store.mark_dirty('u1')
+    assert store.flush_sync() == 1 and store.get_status()['coalesced_updates'] == 4
+    assert json.loads((tmp_path / 'u1.json').read_bytes())['visits'] == 12
+
+    asyncio.run(store.get('u2'))  # Created profiles are written on the next flush
+    assert len(store) == 2 and store.flush_sync() == 1 and store.flush_sync() == 0
+
+def test_writes_replace_atomically_and_track_stored_ids(tmp_path, monkeypatch):
+    store = make_store(tmp_path)
+    profile = asyncio.run(store.get('u1'))
+    store.flush_sync()
+
+    calls = []
+    real_replace, real_fsync = os.replace, os.fsync
+
+    def replace(src, dst):
+        calls.append(('replace', os.path.basename(src), os.path.basename(dst)))
+        real_replace(src, dst)
+
+    def fsync(fd):
+        calls.append(('fsync',))
+        real_fsync(fd)
+
+    def listdir(path):
+        raise AssertionError('profile directory listed again')
+
+    monkeypatch.setattr(os, 'replace', replace)
+    monkeypatch.setattr(os, 'fsync', fsync)
+    monkeypatch.setattr(os, 'listdir', listdir)
+
+    profile['visits'] = 1
+    store.mark_dirty('u1')
+    store.flush_sync()
+    assert calls == [('fsync',), ('replace', 'u1.json.tmp', 'u1.json')]  # Data is durable before the swap
+    assert not (tmp_path / 'u1.json.tmp').exists()
+    assert len(store) == 1 and store.stored_user_ids() == ['u1']  # No directory scan per call
+
+def test_flush_writes_the_snapshot_taken_when_marked(tmp_path):
+    store = make_store(tmp_path)
+    profile = asyncio.run(store.get('u1'))
+    profile['visits'] = 1
+    store.mark_dirty('u1')
+    profile['visits'] = 99  # Changed after marking, never marked again
+
+    store.flush_sync()
+    assert json.loads((tmp_path / 'u1.json').read_bytes())['visits'] == 1
+
+def test_clean_profiles_are_evicted_and_close_flushes(tmp_path):
+    store = make_store(tmp_path, max_profiles=2)
+    store.start()
+    for user_id in ('u1', 'u2', 'u3'):
+        asyncio.run(store.get(user_id))
+    assert len(store.profiles) == 3  # All dirty: nothing can be dropped yet
+
+    store.flush_sync()
+    held = asyncio.run(store.get('u4'))
+    assert list(store.profiles) == ['u3', 'u4'] and store.get_status()['evictions'] == 2
+
+    store.flush_sync()
+    asyncio.run(store.get('u1'))  # Reloaded from disk, pushes out u3
+    held['visits'] = 5
+    store.mark_dirty('u4', held)
+    asyncio.run(store.close())
+
+    assert json.loads((tmp_path / 'u4.json').read_bytes())['visits'] == 5
+    assert store.get_status()['pending_dirty'] == 0 and len(store) == 4
@@ -0,0 +1,103 @@
+"""
+Podplay Sanctuary Socket Router Test
+Checks one-handler-per-event registration, middleware and per-event metrics
+"""
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services.logging_pipeline import get_request_id
+from services.socket_router import (
+    AdmissionControlMiddleware, AuthMiddleware, DuplicateHandlerError,
+    SocketEventRouter, TimingMiddleware
+)
+
+def _router(*middleware):
+    router = SocketEventRouter()
+    for m in middleware:
+        router.use(m)
+    router.use(TimingMiddleware(router))
+    return router
+
+def test_duplicate_handler_rejected():
+    router = _router()
+    router.register('mama_bear_message', lambda data: None)
+    with pytest.raises(DuplicateHandlerError):
+        router.register('mama_bear_message', lambda data: None)
+
+def test_async_handlers_run_once_and_are_timed():
+    router = _router()
+    calls = []
+
+    @router.on('mama_bear_message')
+    async def handle(data):
+        calls.append(data['message'])
+        return 'ok'
+
+    assert router.dispatch('mama_bear_message', {'message': 'hi'}) == 'ok'
+    assert calls == ['hi']
+
+    metrics = router.get_metrics()['events']['mama_bear_message']
+    assert metrics['received'] == 1 and metrics['completed'] == 1
+    assert metrics['latency']['count'] == 1
+
+def test_handler_without_payload_parameter():
+    router = _router()
+    router.register('get_system_status', lambda: 'status')
+    assert router.dispatch('get_system_status', {'unused': True}) == 'status'
+
+def test_admission_control_sheds_load():
+    admission = AdmissionControlMiddleware(max_in_flight=1)
+    router = _router(admission)
+    entered, release = threading.Event(), threading.Event()
+
+    @router.on('slow')
+    def slow(data):
+        entered.set()
+        release.wait(5)
+
+    worker = threading.Thread(target=router.dispatch, args=('slow', {}))
+    worker.start()
+    entered.wait(5)
+    router.dispatch('slow', {})
+    release.set()
+    worker.join(5)
+
+    metrics = router.get_metrics()['events']['slow']
+    assert metrics['completed'] == 1
+    assert metrics['rejected'] == {'overloaded': 1}
+    assert admission.in_flight == 0
+
+def test_auth_refuses_connect_without_token():
+    router = _router(AuthMiddleware('secret'))
+    router.register('connect', lambda: True)
+    router.register('mama_bear_message', lambda data: 'handled')
+
+    assert router.dispatch('connect', {'token': 'wrong'}) is False
+    assert router.dispatch('mama_bear_message', {'message': 'hi'}) is None
+    assert router.get_metrics()['events']['mama_bear_message']['rejected'] == {'unauthorized': 1}
+
+def test_coroutines_share_one_loop_and_see_the_event_context():
+    router = _router()
+    seen = []
+
+    @router.on('mama_bear_message')
+    async def handle(data):
+        seen.append((id(asyncio.get_running_loop()), get_request_id(), threading.current_thread().name))
+
+    router.dispatch('mama_bear_message', {'request_id': 'r1'})
+    worker = threading.Thread(target=router.dispatch, args=('mama_bear_message', {'request_id': 'r2'}))
+    worker.start()
+    worker.join(5)
+    router.close()
+
+    assert len({loop for loop, _, _ in seen}) == 1
+    assert [request_id for _, request_id, _ in seen] == ['r1', 'r2']
+    assert {thread for _, _, thread in seen} == {'socket-dispatch'}
@@ -0,0 +1,70 @@
+"""
+Podplay Sanctuary SQLite Pool Test
+Covers WAL setup, transactional writes and MemoryManager running on the pool
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import threading
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services.memory_manager import MemoryManager
+from services.sqlite_pool import SQLitePool
+
+def test_connections_use_wal_and_readers_are_query_only(tmp_path):
+    pool = SQLitePool(str(tmp_path / 'pool.db'), readers=2)
+    pool.write_sync(lambda conn: conn.execute("CREATE TABLE items (value INTEGER)"))
+
+    assert pool.read_sync(lambda conn: conn.execute("PRAGMA journal_mode").fetchone()[0]) == 'wal'
+    assert pool.read_sync(lambda conn: conn.execute("PRAGMA synchronous").fetchone()[0]) == 1  # NORMAL
+    with pytest.raises(sqlite3.OperationalError):
+        pool.read_sync(lambda conn: conn.execute("INSERT INTO items VALUES (1)"))
+    pool.close()
+
+def test_writes_are_transactional_and_reads_run_off_the_loop(tmp_path):
+    pool = SQLitePool(str(tmp_path / 'pool.db'), readers=2)
+    pool.write_sync(lambda conn: conn.execute("CREATE TABLE items (value INTEGER)"))
+
+    def failing_write(conn):
+        conn.execute("INSERT INTO items VALUES (1)")
+        raise RuntimeError("boom")
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await pool.write(failing_write)
+        await asyncio.gather(*[pool.write(lambda conn, i=i: conn.execute("INSERT INTO items VALUES (?)", (i,)))
+                               for i in range(50)])
+        return await asyncio.gather(*[
+            pool.read(lambda conn: (conn.execute("SELECT COUNT(*) FROM items").fetchone()[0], threading.current_thread().name))
+            for _ in range(8)
+        ])
+
+    results = asyncio.run(scenario())
+    assert {count for count, _ in results} == {50}
+    assert all(name.startswith('sqlite-reader') for _, name in results)
+    assert pool.get_status()['writes'] == 52
+    pool.close()
+
+def test_memory_manager_round_trip_on_pool(tmp_path, monkeypatch):
+    monkeypatch.setenv('MEM0_MEMORY_ENABLED', 'false')
+    manager = MemoryManager(db_path=str(tmp_path / 'nested' / 'memory.db'))
+
+    async def scenario():
+        for i in range(3):
+            assert await manager.save_interaction('u1', 'main_chat', f"Question {i}", f"Answer {i}")
+        await manager.save_user_preferences('u1', {'theme': 'dark'})
+        await manager.save_session_memory('u1', 'main_chat', 'draft', {'step': 2})
+        return await manager.get_context('u1', 'main_chat'), await manager.get_status()
+
+    context, status = asyncio.run(scenario())
+    assert context['conversation_count'] == 3 and 'Question 2' in context['recent_interactions']
+    assert context['preferences'] == {'theme': 'dark'}
+    assert context['session_memory'] == {'draft': {'step': 2}}
+    assert status['total_conversations'] == 3 and status['database']['reads'] >= 2
+    manager.close()
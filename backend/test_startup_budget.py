@@ -0,0 +1,80 @@
+"""
+Podplay Sanctuary Startup Budget Test
+Fails if importing the service layer regresses past the startup budget
+or starts pulling heavy SDKs in at import time
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services.startup import StartupStateMachine, StartupStage
+
+# Total import budget for the service modules below, in milliseconds
+IMPORT_BUDGET_MS = float(os.getenv('STARTUP_IMPORT_BUDGET_MS', '750'))
+
+SERVICE_MODULES = [
+    'services.mama_bear_model_manager',
+    'services.gemini_quota_manager',
+    'services.mama_bear_memory_system',
+    'services.mama_bear_orchestration',
+    'services.mama_bear_workflow_logic',
+    'services.mama_bear_specialized_variants',
+    'services.scrapybara_manager',
+    'services.enhanced_scrapybara_manager',
+    'services.enhanced_mama_bear_orchestrator',
+]
+
+HEAVY_MODULES = ['google.generativeai', 'google.oauth2', 'scrapybara', 'mem0', 'aiofiles']
+
+PROFILE_SCRIPT = """
+import json, os, sys
+from services.startup import get_startup_profiler
+profiler = get_startup_profiler()
+for name in json.loads(sys.argv[1]):
+    profiler.import_module(name)
+report = profiler.report()
+report['heavy_loaded'] = [m for m in json.loads(sys.argv[2]) if m in sys.modules]
+report['memory_dir_created'] = os.path.exists('mama_bear_memory')
+print(json.dumps(report))
+"""
+
+def _profile_cold_imports(tmp_path):
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR)
+    result = subprocess.run(
+        [sys.executable, '-c', PROFILE_SCRIPT, json.dumps(SERVICE_MODULES), json.dumps(HEAVY_MODULES)],
+        cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def test_service_imports_within_budget(tmp_path):
+    report = _profile_cold_imports(tmp_path)
+    assert report['total_import_ms'] <= IMPORT_BUDGET_MS, (
+        f"Service imports took {report['total_import_ms']}ms "
+        f"(budget {IMPORT_BUDGET_MS}ms): {report['modules']}"
+    )
+
+def test_service_imports_do_not_load_heavy_sdks(tmp_path):
+    report = _profile_cold_imports(tmp_path)
+    assert report['heavy_loaded'] == []
+
+def test_service_imports_have_no_side_effects(tmp_path):
+    report = _profile_cold_imports(tmp_path)
+    assert not report['memory_dir_created']
+
+def test_readiness_transitions():
+    state = StartupStateMachine()
+    state.transition(StartupStage.IMPORTING)
+    state.transition(StartupStage.INITIALIZING)
+    state.transition(StartupStage.READY)
+    assert state.is_ready
+
+    with pytest.raises(ValueError):
+        state.transition(StartupStage.IMPORTING)  # READY -> IMPORTING is not a valid transition
@@ -0,0 +1,104 @@
+"""
+Podplay Sanctuary Shared State Test
+Runs several worker processes against one SQLite state store and checks
+that plans, tasks and workspaces created by one worker are served by another
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services.state_store import SQLiteStateStore
+
+class StubModelManager:
+    """Returns a fixed two-step decomposition instead of calling Gemini"""
+
+    async def generate_response(self, prompt, model_preference="auto", required_capabilities=None):
+        return {'success': True, 'content': json.dumps([
+            {'id': 'research', 'title': 'Research', 'agent': 'research_specialist'},
+            {'id': 'deploy', 'title': 'Deploy', 'agent': 'devops_specialist', 'dependencies': ['research']}
+        ])}
+
+def _create_plan_worker(db_path, results):
+    from services.mama_bear_orchestration import AgentOrchestrator
+
+    orchestrator = AgentOrchestrator(None, StubModelManager(), None, state_store=SQLiteStateStore(db_path))
+    plan = asyncio.run(orchestrator.create_plan('Ship it', 'Research then deploy', 'nathan'))
+    results.put(plan['id'])
+
+def _run_subtask_worker(db_path, plan_id, results):
+    from services.mama_bear_orchestration import AgentOrchestrator
+
+    orchestrator = AgentOrchestrator(None, StubModelManager(), None, state_store=SQLiteStateStore(db_path))
+    plan = orchestrator.get_plan(plan_id)
+    plan['subtasks'][0]['status'] = 'completed'
+    orchestrator.store_plan(plan)
+    results.put(os.getpid())
+
+def _workspace_worker(db_path, results):
+    from services.scrapybara_manager import ScrapybaraManager
+
+    manager = ScrapybaraManager(state_store=SQLiteStateStore(db_path))
+    workspace = {'workspace_id': f"workspace_{os.getpid()}", 'status': 'ready', 'user_id': 'nathan'}
+    manager.active_workspaces[workspace['workspace_id']] = workspace
+    manager._persist_workspace(workspace)
+    results.put(workspace['workspace_id'])
+
+def _counter_worker(db_path, worker_index, writes):
+    store = SQLiteStateStore(db_path)
+    for i in range(writes):
+        store.put('counters', f"{worker_index}:{i}", {'worker': worker_index, 'i': i})
+
+def _spawn(target, *args):
+    ctx = multiprocessing.get_context('spawn')
+    process = ctx.Process(target=target, args=args)
+    process.start()
+    return process
+
+def _join(processes):
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+def test_plan_visible_across_workers(tmp_path):
+    db_path = str(tmp_path / 'state.db')
+    results = multiprocessing.get_context('spawn').Queue()
+
+    _join([_spawn(_create_plan_worker, db_path, results)])
+    plan_id = results.get(timeout=10)
+
+    _join([_spawn(_run_subtask_worker, db_path, plan_id, results)])
+    results.get(timeout=10)
+
+    from services.mama_bear_orchestration import AgentOrchestrator
+    orchestrator = AgentOrchestrator(None, StubModelManager(), None, state_store=SQLiteStateStore(db_path))
+    plan = orchestrator.get_plan(plan_id)
+    assert [s['id'] for s in plan['subtasks']] == ['research', 'deploy']
+    assert plan['subtasks'][0]['status'] == 'completed'
+
+def test_workspaces_visible_across_workers(tmp_path):
+    db_path = str(tmp_path / 'state.db')
+    results = multiprocessing.get_context('spawn').Queue()
+
+    _join([_spawn(_workspace_worker, db_path, results) for _ in range(3)])
+    workspace_ids = {results.get(timeout=10) for _ in range(3)}
+
+    from services.scrapybara_manager import ScrapybaraManager
+    manager = ScrapybaraManager(state_store=SQLiteStateStore(db_path))
+    for workspace_id in workspace_ids:
+        status = asyncio.run(manager.get_workspace_status(workspace_id))
+        assert status['status'] == 'ready'
+    assert asyncio.run(manager.get_status())['total_workspaces'] == 3
+
+def test_concurrent_writers(tmp_path):
+    db_path = str(tmp_path / 'state.db')
+    SQLiteStateStore(db_path)
+
+    _join([_spawn(_counter_worker, db_path, index, 200) for index in range(4)])
+
+    assert SQLiteStateStore(db_path).count('counters') == 800